@@ -5,13 +5,34 @@ from flask import Flask
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
+from .profiling import ProfilingMiddleware
+from .routing import ReplicaRouter, RoutingSession, replica_binds
+
 load_dotenv()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_FLASK')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db = SQLAlchemy(app)
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+app.config['PRINCIPAL_CACHE_TTL'] = int(
+    os.getenv('PRINCIPAL_CACHE_TTL') or 60)
+app.config['SQLALCHEMY_BINDS'] = replica_binds([
+    url.strip()
+    for url in (os.getenv('DATABASE_REPLICA_URLS') or '').split(',')
+    if url.strip()
+])
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+replica_router = ReplicaRouter(
+    app, db,
+    max_lag=float(os.getenv('REPLICA_MAX_LAG') or 5),
+    check_interval=float(os.getenv('REPLICA_CHECK_INTERVAL') or 1),
+)
 migrate = Migrate(app, db)
+profiler = ProfilingMiddleware(
+    app,
+    n_plus_one_threshold=int(os.getenv('N_PLUS_ONE_THRESHOLD') or 10),
+    server_timing=os.getenv('SERVER_TIMING', '').lower() == 'true',
+)
 
-from . import admin, admin_views, cli_commands, forms, utils, views # noqa
+from . import admin, admin_views, auth, cli_commands, events, forms, utils, views # noqa
@@ -7,6 +7,7 @@ from models import (
     AdminUser,
     Application,
     ApplicationCheckStatus,
+    Broadcast,
     CheckIsBlocked,
     Question,
     User,
@@ -17,11 +18,13 @@ from .admin_views import (
     AdminUserModelView,
     AppCheckStatusModelView,
     ApplicationModelView,
+    BroadcastModelView,
     CheckIsBlockedModelView,
     CustomAdminIndexView,
     QuestionModelView,
     UserModelView,
 )
+from .auth import AdminPrincipal, principals
 
 
 def init_login() -> None:
@@ -30,9 +33,9 @@ def init_login() -> None:
     login_manager.init_app(app)
 
     @login_manager.user_loader
-    def load_user(user_id: int) -> Optional[AdminUser]:
-        """Загружает пользователя из базы данных."""
-        return db.session.query(AdminUser).get(user_id)
+    def load_user(user_id: str) -> Optional[AdminPrincipal]:
+        """Загружает пользователя из кэша или из базы данных."""
+        return principals.get(int(user_id))
 
 
 init_login()
@@ -51,6 +54,7 @@ admin.add_view(AppCheckStatusModelView(ApplicationCheckStatus, db.session,
                                        name='Журнал заявок'))
 admin.add_view(CheckIsBlockedModelView(CheckIsBlocked, db.session,
                                        name='Журнал блокировок'))
+admin.add_view(BroadcastModelView(Broadcast, db.session, name='Рассылки'))
 admin.add_view(QuestionModelView(Question, db.session, name='Вопросы'))
 admin.add_view(AdminUserModelView(AdminUser, db.session,
                                   name='Сотрудники'))
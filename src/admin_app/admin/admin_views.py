@@ -10,13 +10,44 @@ from flask import (
     url_for,
 )
 from flask_admin import expose, helpers
+from flask_admin.actions import action
 from flask_admin.contrib.sqla import ModelView
 from flask_admin.form import Select2Field
 from markupsafe import Markup
-
-from .constants import APP_STATUSES, messages
+from wtforms import Form, ValidationError, validators
+
+from models import (
+    ADMIN_CONTACTS_PAYLOAD,
+    USER_PAYLOAD_PREFIX,
+    AdminUser,
+    Application,
+    Broadcast,
+    User,
+)
+from repository import cancel_broadcasts, release_applications
+
+from .auth import principals
+from .constants import (
+    ANSWER_TYPES,
+    APP_STATUSES,
+    ASSIGNMENT_TIMEOUT,
+    BLOCK_REASONS,
+    BROADCAST_REFRESH_INTERVAL,
+    BROADCAST_SEGMENTS,
+    BROADCAST_STATUSES,
+    DASHBOARD_DAYS,
+    messages,
+)
 from .forms import LoginForm
-from .utils import get_amount_opened_apps
+from .routing import replica_reads
+from .utils import (
+    assigned_to_other,
+    get_amount_opened_apps,
+    get_broadcast_progress,
+    get_dashboard_stats,
+    notify_bot,
+    take_next_application,
+)
 
 
 class CustomAdminIndexView(admin.AdminIndexView):
@@ -31,12 +62,15 @@ class CustomAdminIndexView(admin.AdminIndexView):
     def index(self) -> Response:
         """Проверяет, авторизован ли пользователь.
 
-        Выводит на главную страницу сообщение о количестве открытых заявок.
+        Выводит на главную страницу сообщение о количестве открытых заявок
+        и графики по данным сводных таблиц.
         """
         if not login.current_user.is_authenticated:
             return redirect(url_for(".login_view"))
         amount = get_amount_opened_apps()
         flash(messages.AMOUNT_OPENED_APPS.format(amount=amount), 'info')
+        self._template_args["stats"] = get_dashboard_stats(DASHBOARD_DAYS)
+        self._template_args["days"] = DASHBOARD_DAYS
         return super().index()
 
     @expose("/login/", methods=("GET", "POST"))
@@ -44,8 +78,7 @@ class CustomAdminIndexView(admin.AdminIndexView):
         """Определяет логику входа пользователя в систему."""
         form = LoginForm(request.form)
         if helpers.validate_form_on_submit(form):
-            user = form.get_user()
-            login.login_user(user)
+            login.login_user(principals.remember(form.get_user()))
         if login.current_user.is_authenticated:
             return redirect(url_for(".index"))
         self._template_args["form"] = form
@@ -59,7 +92,18 @@ class CustomAdminIndexView(admin.AdminIndexView):
         return redirect(url_for(".index"))
 
 
-class CustomModelView(ModelView):
+class ReplicaListModelView(ModelView):
+
+    """Представление модели, список записей которого читается с реплики."""
+
+    @expose('/')
+    def index_view(self) -> Response:
+        """Выводит список записей с реплики, если она достаточно свежая."""
+        with replica_reads():
+            return super().index_view()
+
+
+class CustomModelView(ReplicaListModelView):
 
     """Вкладки, доступные только авторизованным пользователям."""
 
@@ -85,7 +129,7 @@ class CustomModelView(ModelView):
         return login.current_user.role != 'operator'
 
 
-class SuperModelView(ModelView):
+class SuperModelView(ReplicaListModelView):
 
     """Класс представления вкладок, доступных только администратору."""
 
@@ -114,6 +158,17 @@ class AdminUserModelView(SuperModelView):
     form_columns = ('login', 'password', 'email', 'role')
     column_sortable_list = ('login', 'password', 'email', 'role')
 
+    def after_model_change(self, form: Form, model: AdminUser,
+                           is_created: bool) -> None:
+        """Сбрасывает кэши сотрудника в админке и контакта в боте."""
+        principals.invalidate(model.id)
+        notify_bot(ADMIN_CONTACTS_PAYLOAD)
+
+    def after_model_delete(self, model: AdminUser) -> None:
+        """Сбрасывает кэши сотрудника в админке и контакта в боте."""
+        principals.invalidate(model.id)
+        notify_bot(ADMIN_CONTACTS_PAYLOAD)
+
 
 class UserModelView(SuperModelView):
 
@@ -131,18 +186,36 @@ class UserModelView(SuperModelView):
     column_editable_list = ['is_blocked']
     column_searchable_list = ['id']
 
+    def after_model_change(self, form: Form, model: User,
+                           is_created: bool) -> None:
+        """Сбрасывает в боте кэш блокировки клиента."""
+        notify_bot(f'{USER_PAYLOAD_PREFIX}{model.id}')
+
+    def after_model_delete(self, model: User) -> None:
+        """Сбрасывает в боте кэш блокировки клиента."""
+        notify_bot(f'{USER_PAYLOAD_PREFIX}{model.id}')
+
 
 class ApplicationModelView(CustomModelView):
 
-    """Класс представления для модели Application."""
+    """Класс представления для модели Application.
+
+    Кнопка «Взять следующую заявку» закрепляет за оператором самую старую
+    свободную открытую заявку и открывает ее на редактирование. Пока
+    закрепление действует, изменить заявку, в том числе из списка, может
+    только взявший ее оператор.
+    """
 
-    column_list = ('id', 'user', 'answers', 'status', 'comment')
+    list_template = 'admin/application_list.html'
+    column_list = ('id', 'user', 'answers', 'status', 'comment',
+                   'assigned_to')
     column_labels = {
         'id': 'Номер заявки',
         'user': 'Клиент',
         'answers': 'Текст заявки',
         'status': 'Статус заявки',
         'comment': 'Комментарий',
+        'assigned_to': 'Оператор',
     }
     form_columns = ('user', 'answers', 'status', 'comment')
     column_formatters = {
@@ -161,6 +234,32 @@ class ApplicationModelView(CustomModelView):
     column_editable_list = ('status', 'comment')
     column_sortable_list = ('id', 'answers', 'status', 'comment')
 
+    @expose('/take/', methods=('POST',))
+    def take_view(self) -> Response:
+        """Закрепляет за оператором следующую заявку и открывает ее."""
+        application_id = take_next_application(login.current_user.login)
+        if application_id is None:
+            flash(messages.NO_FREE_APPLICATIONS, 'info')
+            return redirect(url_for('.index_view'))
+        flash(messages.APPLICATION_TAKEN.format(
+            id=application_id, minutes=ASSIGNMENT_TIMEOUT // 60), 'info')
+        return redirect(url_for('.edit_view', id=application_id))
+
+    def on_model_change(self, form: Form, model: Application,
+                        is_created: bool) -> None:
+        """Запрещает менять заявку, закрепленную за другим оператором."""
+        if assigned_to_other(model, login.current_user.login):
+            raise ValidationError(messages.APPLICATION_ASSIGNED.format(
+                operator=model.assigned_to))
+
+    @action('release', 'Вернуть в очередь')
+    def action_release(self, ids: list[str]) -> None:
+        """Снимает закрепление выбранных заявок за операторами."""
+        count = release_applications(self.session,
+                                     [int(id_) for id_ in ids])
+        self.session.commit()
+        flash(messages.APPLICATIONS_RELEASED.format(count=count), 'info')
+
 
 class AppCheckStatusModelView(CustomModelView):
 
@@ -194,6 +293,19 @@ class QuestionModelView(SuperModelView):
     column_labels = {
         'number': 'Номер',
         'question': 'Вопрос',
+        'answer_type': 'Тип ответа',
+        'min_words': 'Минимум слов',
+        'max_length': 'Максимальная длина',
+    }
+    column_descriptions = {
+        'min_words': 'Проверяется только для текстовых ответов.',
+        'max_length': 'Пустое значение снимает ограничение.',
+    }
+    form_choices = {'answer_type': ANSWER_TYPES}
+    form_args = {
+        'min_words': {'validators': [validators.NumberRange(min=0)]},
+        'max_length': {'validators': [
+            validators.Optional(), validators.NumberRange(min=1)]},
     }
 
 
@@ -203,7 +315,7 @@ class CheckIsBlockedModelView(SuperModelView):
 
     column_list = (
         'id', 'user_id', 'name', 'email',
-        'phone', 'timestamp',
+        'phone', 'timestamp', 'reason',
     )
     column_labels = {
         'id': 'Номер',
@@ -212,7 +324,77 @@ class CheckIsBlockedModelView(SuperModelView):
         'email': 'Почта',
         'phone': 'Телефон',
         'timestamp': 'Дата блокировки',
+        'reason': 'Причина',
+    }
+    column_formatters = {
+        'reason': lambda v, c, m, p: BLOCK_REASONS.get(m.reason, m.reason),
     }
     column_sortable_list = (
-        'id', 'user_id', 'name', 'email', 'phone', 'timestamp',
+        'id', 'user_id', 'name', 'email', 'phone', 'timestamp', 'reason',
+    )
+
+
+class BroadcastModelView(CustomModelView):
+
+    """Класс представления для модели Broadcast.
+
+    Рассылку может создать любой сотрудник, отправляет ее бот. Изменить
+    текст после создания нельзя, незавершенную рассылку можно отменить.
+    Прогресс отправки в списке обновляется без перезагрузки страницы.
+    """
+
+    list_template = 'admin/broadcast_list.html'
+    can_create = True
+    can_edit = False
+    column_list = (
+        'id', 'created_at', 'text', 'segment', 'status', 'sent',
+        'created_by',
     )
+    column_labels = {
+        'id': 'Номер',
+        'created_at': 'Создана',
+        'text': 'Текст',
+        'segment': 'Получатели',
+        'status': 'Статус',
+        'sent': 'Прогресс',
+        'created_by': 'Автор',
+    }
+    column_sortable_list = ('id', 'created_at', 'status')
+    column_default_sort = ('id', True)
+    column_formatters = {
+        'segment': lambda v, c, m, p: dict(BROADCAST_SEGMENTS)[
+            m.segment or ''],
+        'status': lambda v, c, m, p: Markup(
+            '<span data-broadcast-status="{}">{}</span>',
+        ).format(m.id, BROADCAST_STATUSES[m.status]),
+        'sent': lambda v, c, m, p: Markup(
+            '<span data-broadcast="{id}" data-active="{active:d}">'
+            '{progress}</span>',
+        ).format(**get_broadcast_progress(m)),
+    }
+    form_columns = ('text', 'segment')
+    form_choices = {'segment': BROADCAST_SEGMENTS}
+    form_args = {
+        'text': {'label': 'Текст',
+                 'validators': [validators.InputRequired(),
+                                validators.Length(max=4096)]},
+        'segment': {'label': 'Получатели'},
+    }
+
+    def render(self, template: str, **kwargs: Dict[str, Any]) -> str:
+        """Передает в шаблон период обновления прогресса."""
+        kwargs['refresh_interval'] = BROADCAST_REFRESH_INTERVAL
+        return super().render(template, **kwargs)
+
+    def on_model_change(self, form: Form, model: Broadcast,
+                        is_created: bool) -> None:
+        """Запоминает автора рассылки."""
+        model.segment = model.segment or None
+        model.created_by = login.current_user.login
+
+    @action('cancel', 'Отменить', 'Отменить выбранные рассылки?')
+    def action_cancel(self, ids: list[str]) -> None:
+        """Отменяет выбранные незавершенные рассылки."""
+        count = cancel_broadcasts(self.session, [int(id_) for id_ in ids])
+        self.session.commit()
+        flash(messages.BROADCASTS_CANCELLED.format(count=count), 'info')
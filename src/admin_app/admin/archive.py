@@ -0,0 +1,196 @@
+import gzip
+import json
+from datetime import date, datetime
+from typing import Iterable, Optional
+
+import pytz
+from sqlalchemy import delete, insert, text
+from sqlalchemy.orm import selectinload
+
+from models import (
+    Application,
+    ApplicationArchive,
+    ApplicationCheckStatus,
+    ApplicationCheckStatusArchive,
+    ApplicationStatus,
+    CheckIsBlocked,
+    CheckIsBlockedArchive,
+)
+
+from . import db
+from .constants import CLOSED_APP_STATUS, TIME_ZONE
+from .utils import parse_audit_timestamp
+
+PARTITION_NAME = '{table}_{year:04d}_{month:02d}'
+
+
+def month_start(value: datetime) -> date:
+    """Возвращает первый день месяца для даты."""
+    return date(value.year, value.month, 1)
+
+
+def shift_months(value: date, months: int) -> date:
+    """Сдвигает первый день месяца на заданное число месяцев."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archive_cutoff(months: int) -> datetime:
+    """Возвращает границу архивации: начало месяца N месяцев назад."""
+    tz = pytz.timezone(TIME_ZONE)
+    start = shift_months(month_start(datetime.now(tz)), -months)
+    return tz.localize(datetime(start.year, start.month, start.day))
+
+
+def ensure_month_partitions(table_name: str, months: Iterable[date]) -> None:
+    """Создает недостающие месячные секции архивной таблицы в PostgreSQL."""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    tz = pytz.timezone(TIME_ZONE)
+    for month in sorted(set(months)):
+        upper = shift_months(month, 1)
+        name = PARTITION_NAME.format(
+            table=table_name, year=month.year, month=month.month,
+        )
+        lower_bound = tz.localize(datetime(month.year, month.month, 1))
+        upper_bound = tz.localize(datetime(upper.year, upper.month, 1))
+        db.session.execute(text(
+            f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name} '
+            f"FOR VALUES FROM ('{lower_bound.isoformat()}') "
+            f"TO ('{upper_bound.isoformat()}')",
+        ))
+
+
+def dump_records(path: Optional[str], records: list[dict]) -> None:
+    """Дописывает архивные записи в сжатый JSONL-файл."""
+    if not path or not records:
+        return
+    with gzip.open(path, 'at', encoding='utf-8') as dump:
+        for record in records:
+            dump.write(json.dumps(record, ensure_ascii=False, default=str))
+            dump.write('\n')
+
+
+def archive_applications_batch(
+        cutoff: datetime, batch_size: int, dump: Optional[str],
+) -> tuple[int, int]:
+    """Переносит в архив одну пачку закрытых заявок старше cutoff.
+
+    Возвращает количество перенесенных заявок и записей журнала.
+    """
+    applications = db.session.execute(
+        db.select(Application)
+        .join(ApplicationStatus, Application.status_id == ApplicationStatus.id)
+        .filter(ApplicationStatus.status == CLOSED_APP_STATUS)
+        .filter(Application.timestamp < cutoff)
+        .order_by(Application.id)
+        .limit(batch_size)
+        .options(selectinload(Application.check_statuses)),
+    ).scalars().all()
+    if not applications:
+        return 0, 0
+
+    app_rows = [
+        {
+            'id': application.id,
+            'timestamp': application.timestamp,
+            'user_id': application.user_id,
+            'status': CLOSED_APP_STATUS,
+            'answers': application.answers,
+            'comment': application.comment,
+        }
+        for application in applications
+    ]
+    status_rows = [
+        {
+            'id': entry.id,
+            'application_timestamp': application.timestamp,
+            'application_id': application.id,
+            'old_status': entry.old_status,
+            'new_status': entry.new_status,
+            'changed_by': entry.changed_by,
+            'timestamp': entry.timestamp,
+        }
+        for application in applications
+        for entry in application.check_statuses
+    ]
+    months = [month_start(row['timestamp']) for row in app_rows]
+    ensure_month_partitions(ApplicationArchive.__tablename__, months)
+    ensure_month_partitions(
+        ApplicationCheckStatusArchive.__tablename__, months,
+    )
+
+    ids = [row['id'] for row in app_rows]
+    db.session.execute(insert(ApplicationArchive), app_rows)
+    if status_rows:
+        db.session.execute(
+            insert(ApplicationCheckStatusArchive), status_rows,
+        )
+    db.session.execute(
+        delete(ApplicationCheckStatus)
+        .where(ApplicationCheckStatus.application_id.in_(ids))
+        .execution_options(synchronize_session=False),
+    )
+    db.session.execute(
+        delete(Application)
+        .where(Application.id.in_(ids))
+        .execution_options(synchronize_session=False),
+    )
+    db.session.commit()
+    db.session.expunge_all()
+
+    statuses_by_app: dict[int, list[dict]] = {}
+    for row in status_rows:
+        statuses_by_app.setdefault(row['application_id'], []).append(row)
+    dump_records(dump, [
+        {**row, 'kind': 'application',
+         'check_statuses': statuses_by_app.get(row['id'], [])}
+        for row in app_rows
+    ])
+    return len(app_rows), len(status_rows)
+
+
+def archive_blocked_history_batch(
+        cutoff: datetime, after_id: int, batch_size: int,
+        dump: Optional[str],
+) -> tuple[Optional[int], int]:
+    """Переносит в архив записи журнала блокировок старше cutoff из пачки.
+
+    Метка времени журнала хранится строкой, поэтому пачка выбирается по
+    идентификатору после after_id, а возраст проверяется при разборе.
+    Возвращает последний просмотренный идентификатор (None, если записей
+    больше нет) и количество перенесенных записей.
+    """
+    entries = db.session.execute(
+        db.select(CheckIsBlocked.id, CheckIsBlocked.timestamp,
+                  CheckIsBlocked.user_id, CheckIsBlocked.reason)
+        .filter(CheckIsBlocked.id > after_id)
+        .order_by(CheckIsBlocked.id)
+        .limit(batch_size),
+    ).all()
+    if not entries:
+        return None, 0
+    rows = []
+    for entry in entries:
+        blocked_at = parse_audit_timestamp(entry.timestamp)
+        if blocked_at is not None and blocked_at < cutoff:
+            rows.append({
+                'id': entry.id,
+                'blocked_at': blocked_at,
+                'user_id': entry.user_id,
+                'reason': entry.reason,
+            })
+    if rows:
+        ensure_month_partitions(
+            CheckIsBlockedArchive.__tablename__,
+            [month_start(row['blocked_at']) for row in rows],
+        )
+        db.session.execute(insert(CheckIsBlockedArchive), rows)
+        db.session.execute(
+            delete(CheckIsBlocked)
+            .where(CheckIsBlocked.id.in_([row['id'] for row in rows]))
+            .execution_options(synchronize_session=False),
+        )
+    db.session.commit()
+    dump_records(dump, [{**row, 'kind': 'blocked'} for row in rows])
+    return entries[-1].id, len(rows)
@@ -0,0 +1,64 @@
+import time
+from typing import Optional
+
+from flask_login import UserMixin
+
+from models import AdminUser
+from repository import get_admin
+
+from . import app, db
+
+
+class AdminPrincipal(UserMixin):
+
+    """Авторизованный сотрудник, не привязанный к сессии БД."""
+
+    def __init__(self, user: AdminUser) -> None:
+        """Копирует поля сотрудника, нужные представлениям и шаблонам."""
+        self.id = user.id
+        self.login = user.login
+        self.email = user.email
+        self.role = user.role
+
+
+class PrincipalCache:
+
+    """Кэш авторизованных сотрудников в памяти процесса.
+
+    Flask-Login загружает пользователя на каждый запрос, в том числе на
+    опрос /api/new_applications из каждой открытой вкладки. Запись живет
+    ttl секунд и сбрасывается при изменении сотрудника в админке; другие
+    воркеры Gunicorn увидят изменение по истечении ttl.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        """Задает время жизни записей в секундах."""
+        self.ttl = ttl
+        self.entries: dict[int, tuple[float, AdminPrincipal]] = {}
+
+    def get(self, admin_id: int) -> Optional[AdminPrincipal]:
+        """Возвращает сотрудника из кэша или загружает его из БД."""
+        entry = self.entries.get(admin_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        user = get_admin(db.session, admin_id)
+        if user is None:
+            self.invalidate(admin_id)
+            return None
+        return self.remember(user)
+
+    def remember(self, user: AdminUser) -> AdminPrincipal:
+        """Сохраняет сотрудника, уже загруженного из БД."""
+        principal = AdminPrincipal(user)
+        self.entries[user.id] = (time.monotonic() + self.ttl, principal)
+        return principal
+
+    def invalidate(self, admin_id: Optional[int] = None) -> None:
+        """Сбрасывает запись сотрудника или весь кэш."""
+        if admin_id is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(admin_id, None)
+
+
+principals = PrincipalCache(app.config['PRINCIPAL_CACHE_TTL'])
@@ -1,9 +1,29 @@
+import time
+from typing import Optional
+
 import click
 
 from models import AdminUser, ApplicationStatus, Question
+from repository import get_admin_by_login, has_rows
 
 from . import app, db
-from .constants import APP_STATUSES, QUESTIONS, messages
+from .archive import (
+    archive_applications_batch,
+    archive_blocked_history_batch,
+    archive_cutoff,
+)
+from .constants import (
+    APP_STATUSES,
+    ARCHIVE_AFTER_MONTHS,
+    ARCHIVE_BATCH_SIZE,
+    IMPORT_BATCH_SIZE,
+    QUESTIONS,
+    ROLLUP_BATCH_SIZE,
+    ROLLUP_SETTLE_SECONDS,
+    messages,
+)
+from .importer import TABLE_IMPORTS, import_batches
+from .rollups import update_rollups
 
 
 @app.cli.command('create_superuser')
@@ -11,9 +31,7 @@ from .constants import APP_STATUSES, QUESTIONS, messages
 @click.argument('password')
 def create_superuser(login: str, password: str) -> None:
     """Создает суперпользователя."""
-    if db.session.execute(
-        db.select(AdminUser).filter_by(login=login),
-    ).scalars().first():
+    if get_admin_by_login(db.session, login) is not None:
         click.echo(messages.SUPURUSER_EXISTS.format(login=login))
         return
     superuser = AdminUser(login=login, password=password)
@@ -25,7 +43,7 @@ def create_superuser(login: str, password: str) -> None:
 @app.cli.command('create_questions')
 def create_questions() -> None:
     """Создает записи в таблице вопросов'."""
-    if db.session.execute(db.select(Question)).scalars().all():
+    if has_rows(db.session, Question):
         click.echo(messages.QUESTIONS_ALREADY_EXIST)
         return
     questions = [
@@ -40,7 +58,7 @@ def create_questions() -> None:
 @app.cli.command('create_statuses')
 def create_statuses() -> None:
     """Создает записи в таблице статусов."""
-    if db.session.execute(db.select(ApplicationStatus)).scalars().all():
+    if has_rows(db.session, ApplicationStatus):
         click.echo(messages.STATUSES_ALREADY_EXIST)
         return
     statuses = [
@@ -49,3 +67,75 @@ def create_statuses() -> None:
     db.session.add_all(statuses)
     db.session.commit()
     click.echo(messages.STATUSES_CREATED)
+
+
+@app.cli.command('archive_applications')
+@click.option('--months', default=ARCHIVE_AFTER_MONTHS, show_default=True,
+              help='Архивировать закрытые заявки старше N месяцев.')
+@click.option('--batch-size', default=ARCHIVE_BATCH_SIZE, show_default=True,
+              help='Количество заявок или записей журнала блокировок, '
+                   'переносимых за одну транзакцию.')
+@click.option('--dump', type=click.Path(dir_okay=False), default=None,
+              help='Дополнительно сохранить записи в сжатый файл .jsonl.gz.')
+def archive_applications(
+        months: int, batch_size: int, dump: Optional[str],
+) -> None:
+    """Переносит закрытые заявки и журналы в архивные секции."""
+    cutoff = archive_cutoff(months)
+    total_applications = total_statuses = 0
+    while True:
+        applications, statuses = archive_applications_batch(
+            cutoff, batch_size, dump,
+        )
+        if not applications:
+            break
+        total_applications += applications
+        total_statuses += statuses
+    blocked = 0
+    last_id = 0
+    while last_id is not None:
+        last_id, archived = archive_blocked_history_batch(
+            cutoff, last_id, batch_size, dump,
+        )
+        blocked += archived
+    click.echo(messages.APPLICATIONS_ARCHIVED.format(
+        applications=total_applications,
+        statuses=total_statuses,
+        blocked=blocked,
+    ))
+
+
+@app.cli.command('update_rollups')
+@click.option('--batch-size', default=ROLLUP_BATCH_SIZE, show_default=True,
+              help='Количество записей, обрабатываемых за одну транзакцию.')
+@click.option('--settle-seconds', default=ROLLUP_SETTLE_SECONDS,
+              show_default=True,
+              help='Откладывать записи, созданные менее N секунд назад.')
+def update_rollups_command(batch_size: int, settle_seconds: int) -> None:
+    """Инкрементально обновляет сводные таблицы для аналитики."""
+    applications, statuses = update_rollups(batch_size, settle_seconds)
+    click.echo(messages.ROLLUPS_UPDATED.format(
+        applications=applications, statuses=statuses,
+    ))
+
+
+@app.cli.command('import_data')
+@click.argument('table', type=click.Choice(list(TABLE_IMPORTS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True,
+              help='Количество строк, загружаемых за одну транзакцию.')
+@click.option('--rejects', type=click.Path(dir_okay=False), default=None,
+              help='Сохранить отклоненные строки в файл .jsonl.')
+@click.option('--restart', is_flag=True,
+              help='Загрузить файл с начала, а не с последней пачки.')
+def import_data(table: str, path: str, batch_size: int,
+                rejects: Optional[str], restart: bool) -> None:
+    """Загружает клиентов, заявки или журнал статусов из CSV или JSONL."""
+    started = time.monotonic()
+    for stats in import_batches(table, path, batch_size, rejects, restart):
+        processed = stats['imported'] + stats['rejected'] + stats['skipped']
+        rate = round(processed / (time.monotonic() - started))
+        click.echo(messages.IMPORT_PROGRESS.format(
+            table=table, rate=rate, **stats,
+        ))
+    click.echo(messages.IMPORT_FINISHED.format(table=table, path=path))
@@ -2,6 +2,50 @@ APP_STATUSES = ['открыта', 'в работе', 'закрыта']
 
 DEFAULT_APP_STATUS = 'открыта'
 
+ANSWER_TYPES = [('text', 'Текст'), ('email', 'Email'), ('phone', 'Телефон')]
+
+BLOCK_REASONS = {
+    None: 'Администратор',
+    'flood': 'Флуд, временная блокировка',
+}
+
+CLOSED_APP_STATUS = 'закрыта'
+
+ARCHIVE_AFTER_MONTHS = 6
+
+ARCHIVE_BATCH_SIZE = 1000
+
+ROLLUP_BATCH_SIZE = 5000
+
+ROLLUP_SETTLE_SECONDS = 5 * 60
+
+IMPORT_BATCH_SIZE = 50000
+
+DASHBOARD_DAYS = 30
+
+FEED_POLL_INTERVAL = 2
+
+FEED_WAIT_TIMEOUT = 25
+
+FEED_HISTORY = 1000
+
+ASSIGNMENT_TIMEOUT = 30 * 60
+
+BROADCAST_STATUSES = {
+    'pending': 'Ожидает отправки',
+    'sending': 'Отправляется',
+    'done': 'Отправлена',
+    'cancelled': 'Отменена',
+}
+
+BROADCAST_SEGMENTS = [
+    ('', 'Все клиенты'),
+    *((status, f'Клиенты с заявкой в статусе "{status}"')
+      for status in APP_STATUSES),
+]
+
+BROADCAST_REFRESH_INTERVAL = 3
+
 QUESTIONS = {
     1: 'Вид бизнеса: чем и как долго занимаешься?',
     2: ('Какие ограничения испытываешь в настоящий момент, '
@@ -13,6 +57,8 @@ QUESTIONS = {
 
 TIME_ZONE = 'Europe/Moscow'
 
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
 
 class Messages:
 
@@ -26,12 +72,49 @@ class Messages:
     QUESTIONS_CREATED = 'Таблица вопросов заполнена'
     STATUSES_ALREADY_EXIST = 'Таблица статусов уже заполнена'
     STATUSES_CREATED = 'Таблица статусов заполнена'
+    APPLICATIONS_ARCHIVED = (
+        'Перенесено в архив: заявок - {applications}, '
+        'записей журнала заявок - {statuses}, '
+        'записей журнала блокировок - {blocked}'
+    )
+
+    ROLLUPS_UPDATED = (
+        'Сводки обновлены: заявок - {applications}, '
+        'записей журнала заявок - {statuses}'
+    )
+
+    IMPORT_PROGRESS = (
+        '{table}: прочитано строк - {lines}, загружено - {imported}, '
+        'отклонено - {rejected}, пропущено - {skipped}, '
+        '{rate} строк/с'
+    )
+    IMPORT_FINISHED = 'Импорт {table} из {path} завершен'
+
+    BROADCAST_PROGRESS = (
+        'Отправлено {sent} из {total}, заблокировали бота - {blocked}, '
+        'не доставлено - {failed}'
+    )
+    BROADCASTS_CANCELLED = 'Отменено рассылок: {count}'
+    APPLICATION_TAKEN = (
+        'Заявка № {id} закреплена за вами на {minutes} мин. '
+        'Чтобы заявка не вернулась в очередь, смените ее статус'
+    )
+    NO_FREE_APPLICATIONS = 'Свободных заявок в статусе "открыта" нет'
+    APPLICATIONS_RELEASED = 'Возвращено в очередь заявок: {count}'
+    APPLICATION_ASSIGNED = (
+        'Заявка закреплена за оператором {operator}, изменить ее может '
+        'только он'
+    )
 
     # сообщения об ошибках
     UNREGISTERED_USER = 'Такой пользователь не зарегистрирован'
     INVALID_PASSWORD = 'Неверный пароль, повторите попытку'
     LOG_OUT = 'Вы вышли из системы.'
     NOT_ACCESS = 'Вы не авторизованы. Пожалуйста, войдите в систему.'
+    IMPORT_REQUIRED = 'Не заполнено поле {field}'
+    IMPORT_INVALID = 'Неверное значение поля {field}'
+    IMPORT_DUPLICATE = 'Значение поля {field} повторяется в пачке'
+    IMPORT_BAD_LINE = 'Строку не удалось разобрать'
 
 
 messages = Messages()
@@ -0,0 +1,55 @@
+import flask_login as login
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import (
+    Application,
+    ApplicationCheckStatus,
+    ApplicationStatus,
+    CheckIsBlocked,
+    StatusNotification,
+    User,
+)
+
+from . import db
+
+
+@event.listens_for(db.session, 'before_flush')
+def log_status_change(session: Session, flush_context: object,
+                      instances: list) -> None:
+    """Логирует изменение статуса заявки и ставит уведомление в очередь.
+
+    Уведомление сохраняется в той же транзакции, а отправляет его бот
+    одной сводкой по всем заявкам клиента, измененным за короткое время.
+    """
+    for instance in session.dirty:
+        if isinstance(instance, Application):
+            old_status = session.get(ApplicationStatus,
+                                     instance.status_id).status
+            new_status = instance.status.status
+
+            if old_status != new_status:
+                session.add(ApplicationCheckStatus(
+                    application_id=instance.id,
+                    old_status=old_status,
+                    new_status=new_status,
+                    changed_by=login.current_user.login,
+                ))
+                session.add(StatusNotification(
+                    user_id=instance.user_id,
+                    application_id=instance.id,
+                    old_status=old_status,
+                    new_status=new_status,
+                ))
+
+
+@event.listens_for(User.is_blocked, 'set')
+def user_blocked_listener(target: User, value: bool,
+                          oldvalue: bool, initiator: any) -> None:
+    """Отражает заблокированного клиента в разделе 'История блокировок'."""
+    if value and not oldvalue:
+        session = Session.object_session(target)
+        if session is not None:
+            new_block_record = CheckIsBlocked(user_id=target.id)
+            session.add(new_block_record)
+            session.commit()
@@ -0,0 +1,100 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from repository import get_application_ids_after, get_latest_application_id
+
+from . import app, db
+from .constants import FEED_HISTORY, FEED_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+FEED_ERROR_MESSAGE = 'Не удалось обновить ленту новых заявок: {error}'
+
+
+class ApplicationFeed:
+
+    """Лента новых заявок для long-poll запросов.
+
+    Базу опрашивает один фоновый поток на процесс, а ожидающие запросы
+    только ждут уведомления и не занимают соединения с БД. Поток
+    запускается при первом запросе, то есть уже в воркере Gunicorn.
+    """
+
+    def __init__(self, interval: float, history: int) -> None:
+        """Задает период опроса БД и число хранимых идентификаторов."""
+        self.interval = interval
+        self.history = history
+        self.reset()
+
+    def reset(self) -> None:
+        """Сбрасывает состояние ленты, например унаследованное при fork."""
+        self.condition = threading.Condition()
+        self.latest_id: Optional[int] = None
+        self.recent_ids: list[int] = []
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Запускает фоновый поток, если он еще не запущен."""
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name='application-feed', daemon=True,
+                )
+                self.thread.start()
+
+    def run(self) -> None:
+        """Периодически обновляет ленту."""
+        while True:
+            try:
+                self.refresh()
+            except SQLAlchemyError as error:
+                logger.error(FEED_ERROR_MESSAGE.format(error=error))
+            time.sleep(self.interval)
+
+    def refresh(self) -> None:
+        """Загружает идентификаторы новых заявок и будит ожидающих."""
+        new_ids = []
+        with app.app_context():
+            if self.latest_id is None:
+                latest_id = get_latest_application_id(db.session)
+            else:
+                new_ids = get_application_ids_after(
+                    db.session, self.latest_id, self.history,
+                )
+                latest_id = new_ids[-1] if new_ids else self.latest_id
+        with self.condition:
+            if new_ids:
+                self.recent_ids = (self.recent_ids + new_ids)[-self.history:]
+            if latest_id != self.latest_id:
+                self.latest_id = latest_id
+                self.condition.notify_all()
+
+    def wait(self, after: Optional[int],
+             timeout: float) -> tuple[int, int]:
+        """Ждет заявок новее after не дольше timeout секунд.
+
+        Возвращает идентификатор последней заявки и количество заявок
+        новее after. Без after ответ возвращается после первого опроса БД.
+        """
+        self.start()
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.latest_id is not None and (
+                    after is None or self.latest_id > after),
+                timeout,
+            )
+            if self.latest_id is None:
+                return after or 0, 0
+            if after is None:
+                return self.latest_id, 0
+            return self.latest_id, len(self.recent_ids) - bisect.bisect_right(
+                self.recent_ids, after,
+            )
+
+
+feed = ApplicationFeed(FEED_POLL_INTERVAL, FEED_HISTORY)
@@ -3,6 +3,7 @@ from typing import Optional
 from wtforms import Field, fields, form, validators
 
 from models import AdminUser
+from repository import get_admin_by_login
 
 from . import db
 from .constants import messages
@@ -20,6 +21,7 @@ class LoginForm(form.Form):
         'Пароль',
         validators=[validators.InputRequired()],
     )
+    user: Optional[AdminUser] = None
 
     def validate_login(self, field: Field) -> None:
         """Выполняет валидацию имени пользователя и пароля."""
@@ -34,7 +36,11 @@ class LoginForm(form.Form):
             )
 
     def get_user(self) -> Optional[AdminUser]:
-        """Получает пользователя из БД по полю 'login'."""
-        return db.session.query(AdminUser).filter_by(
-            login=self.login.data,
-        ).first()
+        """Получает пользователя из БД по полю 'login'.
+
+        Найденный пользователь запоминается, чтобы проверка формы и вход
+        не выполняли запрос дважды.
+        """
+        if self.user is None:
+            self.user = get_admin_by_login(db.session, self.login.data)
+        return self.user
@@ -0,0 +1,435 @@
+import csv
+import gzip
+import io
+import json
+import os
+import re
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+import pytz
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    exists,
+    func,
+    or_,
+    select,
+    text,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from contacts import normalize_email, normalize_phone
+from models import (
+    TIMESTAMP_FORMAT,
+    Application,
+    ApplicationCheckStatus,
+    ApplicationStatus,
+    ImportCheckpoint,
+    User,
+)
+
+from . import db
+from .constants import APP_STATUSES, DEFAULT_APP_STATUS, TIME_ZONE, messages
+
+TRUE_VALUES = frozenset(('1', 'true', 't', 'yes', 'y', 'да'))
+FALSE_VALUES = frozenset(('0', 'false', 'f', 'no', 'n', 'нет'))
+INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+COPY_SQL = 'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)'
+# Время журнала в формате TIMESTAMP_FORMAT: ЧЧ:ММ ДД.ММ.ГГГГ.
+JOURNAL_TIME_PATTERN = re.compile(r'(\d{2}):(\d{2}) (\d{2})\.(\d{2})\.(\d{4})')
+
+staging = MetaData()
+
+Record = Optional[dict]
+Row = tuple
+
+
+class InvalidField(ValueError):
+
+    """Значение поля строки не прошло проверку."""
+
+
+def field_value(record: dict, field: str) -> Optional[str]:
+    """Возвращает значение поля строкой без пробелов по краям или None."""
+    value = record.get(field)
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def required(record: dict, field: str) -> str:
+    """Возвращает обязательное значение поля."""
+    value = field_value(record, field)
+    if value is None:
+        raise InvalidField(messages.IMPORT_REQUIRED.format(field=field))
+    return value
+
+
+def convert(record: dict, field: str, value: Optional[str],
+            converter: Callable[[str], Optional[object]]) -> object:
+    """Преобразует заполненное значение поля, проверяя его формат."""
+    if value is None:
+        return None
+    try:
+        converted = converter(value)
+    except ValueError:
+        converted = None
+    if converted is None:
+        raise InvalidField(messages.IMPORT_INVALID.format(field=field))
+    return converted
+
+
+def parse_flag(value: str) -> Optional[bool]:
+    """Распознает логическое значение."""
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    return None
+
+
+def parse_time(value: str) -> datetime:
+    """Разбирает время в ISO 8601 или в формате журнала админки.
+
+    Время без часового пояса считается московским.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        parsed = datetime.strptime(value, TIMESTAMP_FORMAT)
+    if parsed.tzinfo is None:
+        return pytz.timezone(TIME_ZONE).localize(parsed)
+    return parsed
+
+
+def parse_journal_time(value: str) -> str:
+    """Приводит время к строковому формату журнала админки.
+
+    Время в формате журнала проверяется и сохраняется как есть, без
+    перевода в часовой пояс и обратно.
+    """
+    match = JOURNAL_TIME_PATTERN.fullmatch(value)
+    if match is not None:
+        hour, minute, day, month, year = map(int, match.groups())
+        datetime(year, month, day, hour, minute)
+        return value
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(pytz.timezone(TIME_ZONE))
+    return parsed.strftime(TIMESTAMP_FORMAT)
+
+
+def parse_status(value: str) -> Optional[str]:
+    """Проверяет название статуса заявки."""
+    return value if value in APP_STATUSES else None
+
+
+def parse_user(record: dict, statuses: dict[str, int]) -> Row:
+    """Проверяет клиента по правилам бота для телефона и email."""
+    return (
+        required(record, 'id'),
+        required(record, 'name'),
+        convert(record, 'email', field_value(record, 'email'),
+                normalize_email),
+        convert(record, 'phone', field_value(record, 'phone'),
+                normalize_phone),
+        convert(record, 'is_blocked',
+                field_value(record, 'is_blocked'), parse_flag),
+    )
+
+
+def parse_application(record: dict, statuses: dict[str, int]) -> Row:
+    """Проверяет заявку и находит идентификатор ее статуса."""
+    status = field_value(record, 'status') or DEFAULT_APP_STATUS
+    return (
+        convert(record, 'id', required(record, 'id'), int),
+        required(record, 'user_id'),
+        convert(record, 'status', status, statuses.get),
+        required(record, 'answers'),
+        field_value(record, 'comment'),
+        convert(record, 'timestamp', required(record, 'timestamp'),
+                parse_time),
+    )
+
+
+def parse_check_status(record: dict, statuses: dict[str, int]) -> Row:
+    """Проверяет запись журнала изменений статусов заявки."""
+    return (
+        convert(record, 'id', required(record, 'id'), int),
+        convert(record, 'application_id', required(record, 'application_id'),
+                int),
+        convert(record, 'old_status', required(record, 'old_status'),
+                parse_status),
+        convert(record, 'new_status', required(record, 'new_status'),
+                parse_status),
+        required(record, 'changed_by'),
+        convert(record, 'timestamp', required(record, 'timestamp'),
+                parse_journal_time),
+    )
+
+
+def staging_table(name: str, *columns: Column) -> Table:
+    """Описывает временную таблицу для загрузки пачки строк."""
+    return Table(name, staging, *columns, prefixes=['TEMPORARY'])
+
+
+class TableImport:
+
+    """Загрузка строк файла в таблицу через временную таблицу.
+
+    Пачка строк копируется во временную таблицу, а затем переносится в
+    целевую одним INSERT ... SELECT с обновлением существующих записей.
+    Строки, для которых нет связанной записи, пропускаются условием.
+    Пустые в файле поля из defaults не перезаписывают значение
+    существующей записи, а новой записи задают значение по умолчанию.
+    """
+
+    def __init__(self, target: Table, columns: Iterable[Column],
+                 parse: Callable[[dict, dict[str, int]], Row],
+                 condition: Callable[[Table], object],
+                 unique: tuple[str, ...] = (),
+                 defaults: Optional[dict[str, object]] = None) -> None:
+        """Задает целевую таблицу, проверку строк и условие переноса."""
+        self.target = target
+        self.staging = staging_table(f'import_{target.name}', *columns)
+        self.parse = parse
+        self.condition = condition
+        self.unique = unique
+        self.defaults = defaults or {}
+
+    def parse_batch(
+            self, batch: list[tuple[int, Record]], statuses: dict[str, int],
+    ) -> tuple[list[Row], list[dict]]:
+        """Проверяет пачку строк.
+
+        Возвращает строки для загрузки и отклоненные строки. Из строк с
+        одинаковым id остается последняя.
+        """
+        rows: dict[object, tuple[int, Record, Row]] = {}
+        rejected = []
+        for line, record in batch:
+            try:
+                if not isinstance(record, dict):
+                    raise InvalidField(messages.IMPORT_BAD_LINE)
+                row = self.parse(record, statuses)
+            except InvalidField as error:
+                rejected.append(
+                    {'line': line, 'error': str(error), 'record': record})
+                continue
+            rows[row[0]] = (line, record, row)
+        for field in self.unique:
+            index = self.staging.c.keys().index(field)
+            seen = set()
+            for key, (line, record, row) in list(rows.items()):
+                if row[index] is None:
+                    continue
+                if row[index] in seen:
+                    del rows[key]
+                    rejected.append({
+                        'line': line,
+                        'error': messages.IMPORT_DUPLICATE.format(
+                            field=field),
+                        'record': record,
+                    })
+                seen.add(row[index])
+        return [row for _, _, row in rows.values()], rejected
+
+    def load(self, connection: Connection, rows: list[Row]) -> None:
+        """Копирует строки во временную таблицу.
+
+        В PostgreSQL строки передаются командой COPY, в остальных БД -
+        одним INSERT с несколькими наборами параметров.
+        """
+        if connection.dialect.name != 'postgresql':
+            connection.execute(self.staging.insert(), [
+                dict(zip(self.staging.c.keys(), row)) for row in rows])
+            return
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(rows)
+        buffer.seek(0)
+        columns = ', '.join(f'"{name}"' for name in self.staging.c.keys())
+        with connection.connection.cursor() as cursor:
+            cursor.copy_expert(COPY_SQL.format(
+                table=self.staging.name, columns=columns), buffer)
+
+    def source_columns(self) -> list:
+        """Возвращает столбцы временной таблицы для переноса.
+
+        Пустое поле из defaults заменяется значением существующей записи,
+        а если записи нет - значением по умолчанию.
+        """
+        columns = []
+        for column in self.staging.c:
+            if column.name in self.defaults:
+                existing = select(self.target.c[column.name]).where(
+                    self.target.c.id == self.staging.c.id).scalar_subquery()
+                column = func.coalesce(
+                    column, existing, self.defaults[column.name],
+                ).label(column.name)
+            columns.append(column)
+        return columns
+
+    def upsert(self, connection: Connection) -> int:
+        """Переносит строки в целевую таблицу и возвращает их количество."""
+        names = self.staging.c.keys()
+        statement = INSERTS[connection.dialect.name](self.target).from_select(
+            names,
+            select(*self.source_columns()).where(
+                self.condition(self.staging)),
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[self.target.c.id],
+            set_={name: statement.excluded[name]
+                  for name in names if name != 'id'},
+        )
+        return connection.execute(statement).rowcount
+
+    def update_sequence(self, connection: Connection) -> None:
+        """Сдвигает последовательность id за импортированные записи."""
+        if connection.dialect.name != 'postgresql':
+            return
+        table = self.target.name
+        sequence = connection.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"),
+            {'table': table},
+        ).scalar()
+        if sequence is None:
+            return
+        connection.execute(
+            text(f'SELECT setval(:sequence, max(id)) FROM {table} '
+                 f'HAVING max(id) > (SELECT last_value FROM {sequence})'),
+            {'sequence': sequence},
+        )
+
+
+users = User.__table__
+applications = Application.__table__
+
+TABLE_IMPORTS = {
+    'users': TableImport(
+        users,
+        [Column('id', String), Column('name', String),
+         Column('email', String), Column('phone', String),
+         Column('is_blocked', Boolean)],
+        parse_user,
+        lambda source: or_(source.c.email.is_(None), ~exists().where(
+            users.c.email == source.c.email, users.c.id != source.c.id)),
+        unique=('email',),
+        defaults={'is_blocked': False},
+    ),
+    'applications': TableImport(
+        applications,
+        [Column('id', Integer), Column('user_id', String),
+         Column('status_id', Integer), Column('answers', Text),
+         Column('comment', String),
+         Column('timestamp', DateTime(timezone=True))],
+        parse_application,
+        lambda source: exists().where(users.c.id == source.c.user_id),
+    ),
+    'check_status': TableImport(
+        ApplicationCheckStatus.__table__,
+        [Column('id', Integer), Column('application_id', Integer),
+         Column('old_status', String), Column('new_status', String),
+         Column('changed_by', String), Column('timestamp', String)],
+        parse_check_status,
+        lambda source: exists().where(
+            applications.c.id == source.c.application_id),
+    ),
+}
+
+
+def open_source(path: str) -> TextIO:
+    """Открывает файл импорта, в том числе сжатый gzip."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def read_records(stream: TextIO, path: str) -> Iterator[Record]:
+    """Читает записи из CSV с заголовком или из JSONL.
+
+    Для строки JSONL, которую не удалось разобрать, возвращает None.
+    """
+    if path.removesuffix('.gz').endswith('.csv'):
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def get_import_checkpoint(source: str) -> ImportCheckpoint:
+    """Получает отметку импорта файла, создавая ее при первом запуске."""
+    checkpoint = db.session.get(ImportCheckpoint, source)
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint(source=source, lines=0)
+        db.session.add(checkpoint)
+    return checkpoint
+
+
+def dump_rejected(path: Optional[str], rejected: list[dict]) -> None:
+    """Дописывает отклоненные строки в JSONL-файл."""
+    if not path or not rejected:
+        return
+    with open(path, 'a', encoding='utf-8') as dump:
+        for entry in rejected:
+            dump.write(json.dumps(entry, ensure_ascii=False, default=str))
+            dump.write('\n')
+
+
+def import_batches(name: str, path: str, batch_size: int,
+                   rejects: Optional[str] = None,
+                   restart: bool = False) -> Iterator[dict[str, int]]:
+    """Загружает файл в таблицу name пачками по batch_size строк.
+
+    Каждая пачка загружается в отдельной транзакции вместе с отметкой
+    прочитанных строк, поэтому после прерывания импорт продолжается с
+    первой незагруженной пачки. После каждой пачки возвращает счетчики:
+    прочитано строк файла всего, загружено, отклонено проверкой и
+    пропущено из-за отсутствующих связанных записей.
+    """
+    table_import = TABLE_IMPORTS[name]
+    checkpoint = get_import_checkpoint(f'{name}:{os.path.abspath(path)}')
+    if restart:
+        checkpoint.lines = 0
+    statuses = {
+        status.status: status.id
+        for status in db.session.execute(
+            db.select(ApplicationStatus)).scalars()
+    }
+    stats = {'lines': checkpoint.lines, 'imported': 0, 'rejected': 0,
+             'skipped': 0}
+    with open_source(path) as stream:
+        records = islice(enumerate(read_records(stream, path), 1),
+                         checkpoint.lines, None)
+        while batch := list(islice(records, batch_size)):
+            rows, rejected = table_import.parse_batch(batch, statuses)
+            connection = db.session.connection()
+            imported = 0
+            if rows:
+                table_import.staging.create(connection)
+                table_import.load(connection, rows)
+                imported = table_import.upsert(connection)
+                table_import.staging.drop(connection)
+                table_import.update_sequence(connection)
+            checkpoint.lines = batch[-1][0]
+            db.session.commit()
+            dump_rejected(rejects, rejected)
+            stats['lines'] = batch[-1][0]
+            stats['imported'] += imported
+            stats['rejected'] += len(rejected)
+            stats['skipped'] += len(rows) - imported
+            yield stats
+    db.session.commit()
@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExecutionContext
+from werkzeug.exceptions import HTTPException
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_ENDPOINT = 'unknown'
+N_PLUS_ONE_MESSAGE = (
+    'Возможная проблема N+1 в {endpoint}: запрос выполнен {count} раз '
+    'за один HTTP-запрос: {statement}'
+)
+
+
+class RequestStats:
+
+    """Статистика SQL-запросов в рамках одного HTTP-запроса."""
+
+    __slots__ = ('queries', 'seconds', 'statements')
+
+    def __init__(self) -> None:
+        """Создает пустую статистику."""
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+
+class EndpointStats:
+
+    """Накопленная статистика по одному endpoint Flask."""
+
+    __slots__ = ('requests', 'seconds', 'queries', 'query_seconds',
+                 'n_plus_one')
+
+    def __init__(self) -> None:
+        """Создает пустую статистику."""
+        self.requests = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.n_plus_one = 0
+
+
+class ProfilingMiddleware:
+
+    """WSGI-middleware, замеряющее время запросов и SQL по endpoint.
+
+    Статистика хранится в памяти процесса, поэтому при запуске
+    нескольких воркеров Gunicorn каждый отдает свои значения.
+    """
+
+    def __init__(self, app: Flask, n_plus_one_threshold: int,
+                 server_timing: bool) -> None:
+        """Оборачивает WSGI-приложение Flask и подключает события SQL."""
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.server_timing = server_timing
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        app.wsgi_app = self
+        event.listen(Engine, 'before_cursor_execute',
+                     self.before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute',
+                     self.after_cursor_execute)
+
+    def before_cursor_execute(
+            self, conn: Connection, cursor: object, statement: str,
+            parameters: object, context: ExecutionContext,
+            executemany: bool,
+    ) -> None:
+        """Запоминает время начала SQL-запроса."""
+        context._query_started = time.perf_counter()
+
+    def after_cursor_execute(
+            self, conn: Connection, cursor: object, statement: str,
+            parameters: object, context: ExecutionContext,
+            executemany: bool,
+    ) -> None:
+        """Учитывает SQL-запрос в статистике текущего HTTP-запроса."""
+        stats = getattr(self.local, 'stats', None)
+        if stats is None:
+            return
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - context._query_started
+        stats.statements[statement] += 1
+
+    def resolve_endpoint(self, environ: dict) -> str:
+        """Определяет endpoint Flask по окружению WSGI."""
+        try:
+            endpoint, _ = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return UNKNOWN_ENDPOINT
+        return endpoint
+
+    def __call__(self, environ: dict,
+                 start_response: Callable) -> Iterable[bytes]:
+        """Обрабатывает запрос, собирая статистику."""
+        endpoint = self.resolve_endpoint(environ)
+        stats = RequestStats()
+        self.local.stats = stats
+        started = time.perf_counter()
+
+        def profiled_start_response(
+                status: str, headers: list[tuple[str, str]],
+                exc_info: Optional[tuple] = None,
+        ) -> Callable:
+            if self.server_timing:
+                elapsed = (time.perf_counter() - started) * 1000
+                headers.append(('Server-Timing', (
+                    f'app;dur={elapsed:.1f}, '
+                    f'db;dur={stats.seconds * 1000:.1f};'
+                    f'desc="{stats.queries} queries"'
+                )))
+            return start_response(status, headers, exc_info)
+
+        try:
+            return self.wsgi_app(environ, profiled_start_response)
+        finally:
+            self.local.stats = None
+            self.record(endpoint, time.perf_counter() - started, stats)
+
+    def record(self, endpoint: str, elapsed: float,
+               stats: RequestStats) -> None:
+        """Добавляет результаты запроса в статистику endpoint."""
+        repeated = None
+        if stats.statements:
+            statement, count = stats.statements.most_common(1)[0]
+            if count > self.n_plus_one_threshold:
+                repeated = statement
+                logger.warning(N_PLUS_ONE_MESSAGE.format(
+                    endpoint=endpoint, count=count, statement=statement,
+                ))
+        with self.lock:
+            endpoint_stats = self.endpoints.get(endpoint)
+            if endpoint_stats is None:
+                endpoint_stats = self.endpoints[endpoint] = EndpointStats()
+            endpoint_stats.requests += 1
+            endpoint_stats.seconds += elapsed
+            endpoint_stats.queries += stats.queries
+            endpoint_stats.query_seconds += stats.seconds
+            if repeated is not None:
+                endpoint_stats.n_plus_one += 1
+
+    def render(self) -> str:
+        """Возвращает статистику в текстовом формате Prometheus."""
+        metrics = (
+            ('admin_requests_total', 'counter',
+             'Количество HTTP-запросов.', 'requests'),
+            ('admin_request_duration_seconds_total', 'counter',
+             'Суммарное время обработки HTTP-запросов.', 'seconds'),
+            ('admin_sql_queries_total', 'counter',
+             'Количество SQL-запросов.', 'queries'),
+            ('admin_sql_duration_seconds_total', 'counter',
+             'Суммарное время SQL-запросов.', 'query_seconds'),
+            ('admin_n_plus_one_total', 'counter',
+             'Количество HTTP-запросов с повторяющимися SQL-запросами.',
+             'n_plus_one'),
+        )
+        with self.lock:
+            snapshot = {
+                endpoint: {field: getattr(stats, field)
+                           for field in EndpointStats.__slots__}
+                for endpoint, stats in self.endpoints.items()
+            }
+        lines = []
+        for name, kind, documentation, field in metrics:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(
+                f'{name}{{endpoint="{endpoint}"}} {values[field]}'
+                for endpoint, values in sorted(snapshot.items())
+            )
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,194 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional, Sequence, TypeVar
+
+import pytz
+
+from models import (
+    Application,
+    ApplicationCheckStatus,
+    ApplicationDailyRollup,
+    ApplicationHourlyRollup,
+    RollupCheckpoint,
+    StatusDailyRollup,
+)
+
+from . import db
+from .constants import ROLLUP_SETTLE_SECONDS, TIME_ZONE
+from .utils import parse_audit_timestamp
+
+APPLICATIONS_CHECKPOINT = 'applications'
+STATUSES_CHECKPOINT = 'check_status'
+AUDIT_TIMESTAMP_PRECISION = timedelta(minutes=1)
+
+Row = TypeVar('Row')
+
+
+def to_local(value: datetime) -> datetime:
+    """Приводит время к часовому поясу приложения."""
+    tz = pytz.timezone(TIME_ZONE)
+    if value.tzinfo is None:
+        return tz.localize(value)
+    return value.astimezone(tz)
+
+
+def get_checkpoint(name: str) -> RollupCheckpoint:
+    """Получает отметку обработки, создавая ее при первом запуске."""
+    checkpoint = db.session.get(RollupCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = RollupCheckpoint(name=name, last_id=0)
+        db.session.add(checkpoint)
+    return checkpoint
+
+
+def settled_prefix(rows: Sequence[Row],
+                   created_at: Callable[[Row], Optional[datetime]],
+                   settled_before: datetime) -> Sequence[Row]:
+    """Оставляет начало пачки до первой записи, созданной после границы.
+
+    Идентификаторы выдаются до фиксации транзакции, поэтому запись с
+    меньшим номером может появиться позже записей с большими. Отметка
+    сдвигается только по записям старше settled_before: к этому моменту
+    транзакции, начатые раньше них, уже завершены.
+    """
+    for index, row in enumerate(rows):
+        timestamp = created_at(row)
+        if timestamp is not None and timestamp >= settled_before:
+            return rows[:index]
+    return rows
+
+
+def add_to_rollup(model: type, key: tuple, **increments: int) -> None:
+    """Увеличивает счетчики строки сводки, создавая ее при необходимости."""
+    row = db.session.get(model, key)
+    if row is None:
+        primary_key = model.__table__.primary_key.columns.keys()
+        row = model(**dict(zip(primary_key, key)))
+        for column in model.__table__.columns.keys():
+            if column not in primary_key:
+                setattr(row, column, 0)
+        db.session.add(row)
+    for field, value in increments.items():
+        setattr(row, field, getattr(row, field) + value)
+
+
+def rollup_applications(batch_size: int, settled_before: datetime) -> int:
+    """Добавляет в сводки пачку новых заявок, созданных до settled_before.
+
+    Возвращает количество обработанных заявок.
+    """
+    checkpoint = get_checkpoint(APPLICATIONS_CHECKPOINT)
+    rows = db.session.execute(
+        db.select(Application.id, Application.timestamp)
+        .where(Application.id > checkpoint.last_id)
+        .order_by(Application.id)
+        .limit(batch_size),
+    ).all()
+    rows = settled_prefix(
+        rows, lambda row: row.timestamp and to_local(row.timestamp),
+        settled_before,
+    )
+    if not rows:
+        return 0
+
+    daily: dict[date, int] = defaultdict(int)
+    hourly: dict[datetime, int] = defaultdict(int)
+    for _, timestamp in rows:
+        if timestamp is None:
+            continue
+        local = to_local(timestamp)
+        daily[local.date()] += 1
+        hourly[local.replace(minute=0, second=0, microsecond=0)] += 1
+    for day, intake in daily.items():
+        add_to_rollup(ApplicationDailyRollup, (day,), intake=intake)
+    for hour, intake in hourly.items():
+        add_to_rollup(ApplicationHourlyRollup, (hour,), intake=intake)
+
+    checkpoint.last_id = rows[-1].id
+    db.session.commit()
+    return len(rows)
+
+
+def rollup_statuses(batch_size: int, settled_before: datetime) -> int:
+    """Добавляет в сводки пачку новых записей журнала до settled_before.
+
+    Время в статусе считается от предыдущего изменения статуса заявки
+    или от ее создания. Первое изменение статуса считается первым ответом
+    и относится ко дню поступления заявки.
+    """
+    checkpoint = get_checkpoint(STATUSES_CHECKPOINT)
+    new_entries = db.session.execute(
+        db.select(ApplicationCheckStatus.id,
+                  ApplicationCheckStatus.application_id,
+                  ApplicationCheckStatus.timestamp)
+        .where(ApplicationCheckStatus.id > checkpoint.last_id)
+        .order_by(ApplicationCheckStatus.id)
+        .limit(batch_size),
+    ).all()
+    new_entries = settled_prefix(
+        new_entries, lambda entry: parse_audit_timestamp(entry.timestamp),
+        settled_before - AUDIT_TIMESTAMP_PRECISION,
+    )
+    if not new_entries:
+        return 0
+
+    last_id = new_entries[-1].id
+    application_ids = {entry.application_id for entry in new_entries}
+    created = dict(db.session.execute(
+        db.select(Application.id, Application.timestamp)
+        .where(Application.id.in_(application_ids)),
+    ).all())
+    history = db.session.execute(
+        db.select(ApplicationCheckStatus)
+        .where(ApplicationCheckStatus.application_id.in_(application_ids))
+        .where(ApplicationCheckStatus.id <= last_id)
+        .order_by(ApplicationCheckStatus.id),
+    ).scalars().all()
+
+    previous: dict[int, Optional[datetime]] = {
+        app_id: to_local(timestamp) if timestamp else None
+        for app_id, timestamp in created.items()
+    }
+    seen: set[int] = set()
+    for entry in history:
+        changed_at = parse_audit_timestamp(entry.timestamp)
+        started_at = previous.get(entry.application_id)
+        is_first = entry.application_id not in seen
+        seen.add(entry.application_id)
+        previous[entry.application_id] = changed_at
+        if entry.id <= checkpoint.last_id or changed_at is None:
+            continue
+        seconds = 0
+        if started_at is not None:
+            seconds = max(int((changed_at - started_at).total_seconds()), 0)
+        add_to_rollup(
+            StatusDailyRollup, (changed_at.date(), entry.old_status),
+            transitions=1, seconds_in_status=seconds,
+        )
+        if is_first and started_at is not None:
+            add_to_rollup(
+                ApplicationDailyRollup, (started_at.date(),),
+                first_responses=1, first_response_seconds=seconds,
+            )
+
+    checkpoint.last_id = last_id
+    db.session.commit()
+    return len(new_entries)
+
+
+def update_rollups(batch_size: int,
+                   settle_seconds: int = ROLLUP_SETTLE_SECONDS,
+                   ) -> tuple[int, int]:
+    """Инкрементально обновляет все сводки.
+
+    Записи моложе settle_seconds откладываются до следующего запуска.
+    Возвращает количество обработанных заявок и записей журнала.
+    """
+    settled_before = datetime.now(pytz.utc) - timedelta(
+        seconds=settle_seconds)
+    applications = statuses = 0
+    while processed := rollup_applications(batch_size, settled_before):
+        applications += processed
+    while processed := rollup_statuses(batch_size, settled_before):
+        statuses += processed
+    return applications, statuses
@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from flask import Flask, current_app, g, has_request_context, session
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, orm
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import ClauseElement, Select
+
+from replicas import ReplicaSet
+from repository import get_replay_position, get_wal_position
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = 'replica_'
+READ_ENGINE_KEY = 'read_engine'
+WRITTEN_AT_KEY = 'db_written_at'
+HAS_CHANGES_KEY = 'has_changes'
+EXTENSION_KEY = 'replicas'
+REPLICA_CHECK_ERROR = 'Не удалось проверить реплику {key}: {error}'
+PRIMARY_CHECK_ERROR = 'Не удалось получить позицию WAL основной БД: {error}'
+
+
+def replica_binds(urls: list[str]) -> dict[str, str]:
+    """Возвращает привязки Flask-SQLAlchemy для адресов реплик."""
+    return {f'{REPLICA_BIND_PREFIX}{index}': url
+            for index, url in enumerate(urls)}
+
+
+class RoutingSession(Session):
+
+    """Сессия, отправляющая SELECT из блока replica_reads на реплику.
+
+    Запись и чтение при сохранении изменений всегда идут в основную БД.
+    """
+
+    def get_bind(self, mapper: Optional[object] = None,
+                 clause: Optional[ClauseElement] = None,
+                 bind: Optional[Engine] = None, **kwargs: object) -> Engine:
+        """Выбирает реплику для SELECT внутри блока replica_reads."""
+        if (bind is None and not self._flushing
+                and isinstance(clause, Select)):
+            engine = g.get(READ_ENGINE_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def mark_changes(db_session: orm.Session, flush_context: object) -> None:
+    """Отмечает транзакцию, в которой были изменения."""
+    db_session.info[HAS_CHANGES_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def remember_write(db_session: orm.Session) -> None:
+    """Запоминает в сессии Flask момент записи сотрудника.
+
+    Пока реплики не получили эту запись, чтение сотрудника идет из
+    основной БД, в том числе в других воркерах Gunicorn.
+    """
+    if (db_session.info.pop(HAS_CHANGES_KEY, False) and has_request_context()
+            and current_app.extensions[EXTENSION_KEY].keys):
+        session[WRITTEN_AT_KEY] = time.time()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def forget_changes(db_session: orm.Session) -> None:
+    """Сбрасывает отметку отмененной транзакции."""
+    db_session.info.pop(HAS_CHANGES_KEY, None)
+
+
+class ReplicaRouter:
+
+    """Выбор реплики для чтения в админке.
+
+    Отставание реплик проверяется не чаще раза в check_interval секунд
+    при очередном чтении, без фонового потока. Время берется по часам
+    системы, чтобы момент записи из cookie был понятен всем воркерам.
+    """
+
+    def __init__(self, app: Flask, db: SQLAlchemy, max_lag: float,
+                 check_interval: float) -> None:
+        """Регистрирует маршрутизатор в приложении."""
+        self.db = db
+        self.keys = sorted(key for key in app.config['SQLALCHEMY_BINDS']
+                           if key.startswith(REPLICA_BIND_PREFIX))
+        self.replicas = ReplicaSet(len(self.keys), max_lag, clock=time.time)
+        self.check_interval = check_interval
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        app.extensions[EXTENSION_KEY] = self
+
+    def check(self) -> None:
+        """Обновляет отставание реплик по позициям WAL."""
+        checked_at = time.time()
+        engines = self.db.engines
+        try:
+            with orm.Session(engines[None]) as db_session:
+                position = get_wal_position(db_session)
+        except SQLAlchemyError as error:
+            logger.error(PRIMARY_CHECK_ERROR.format(error=error))
+            return
+        self.replicas.add_primary_position(checked_at, position)
+        for index, key in enumerate(self.keys):
+            try:
+                with orm.Session(engines[key]) as db_session:
+                    replay_position = get_replay_position(db_session)
+            except SQLAlchemyError as error:
+                logger.error(REPLICA_CHECK_ERROR.format(key=key, error=error))
+                replay_position = None
+            self.replicas.update_replica(index, replay_position)
+
+    def choose(self) -> Optional[Engine]:
+        """Возвращает движок свежей реплики или None для основной БД."""
+        if not self.keys:
+            return None
+        if (time.time() - self.checked_at >= self.check_interval
+                and self.lock.acquire(blocking=False)):
+            try:
+                self.checked_at = time.time()
+                self.check()
+            finally:
+                self.lock.release()
+        written_at = (session.get(WRITTEN_AT_KEY)
+                      if has_request_context() else None)
+        index = self.replicas.choose(written_at)
+        return None if index is None else self.db.engines[self.keys[index]]
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """Направляет SELECT внутри блока на свежую реплику, если она есть."""
+    router = current_app.extensions[EXTENSION_KEY]
+    previous = g.get(READ_ENGINE_KEY)
+    setattr(g, READ_ENGINE_KEY, router.choose())
+    try:
+        yield
+    finally:
+        setattr(g, READ_ENGINE_KEY, previous)
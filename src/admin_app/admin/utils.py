@@ -1,28 +1,165 @@
 from datetime import datetime, timedelta
+from typing import Optional
 
 import pytz
-from sqlalchemy import func
+from sqlalchemy import func, text
 
-from models import Application, ApplicationStatus
+from models import (
+    BROADCAST_PENDING,
+    BROADCAST_SENDING,
+    CACHE_INVALIDATION_CHANNEL,
+    TIMESTAMP_FORMAT,
+    Application,
+    ApplicationDailyRollup,
+    ApplicationHourlyRollup,
+    Broadcast,
+    StatusDailyRollup,
+)
+from repository import (
+    claim_application,
+    count_applications_in_status,
+    count_applications_since,
+)
 
 from . import db
-from .constants import DEFAULT_APP_STATUS, TIME_ZONE
+from .constants import (
+    ASSIGNMENT_TIMEOUT,
+    BROADCAST_STATUSES,
+    DEFAULT_APP_STATUS,
+    TIME_ZONE,
+    messages,
+)
+from .routing import replica_reads
+
+
+def notify_bot(payload: str) -> None:
+    """Сообщает боту через NOTIFY, что закэшированные данные изменились.
+
+    Вне PostgreSQL ничего не делает: бот обновит кэш по истечении TTL.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+    db.session.execute(
+        text('SELECT pg_notify(:channel, :payload)'),
+        {'channel': CACHE_INVALIDATION_CHANNEL, 'payload': payload},
+    )
+    db.session.commit()
+
+
+def take_next_application(operator: str) -> Optional[int]:
+    """Закрепляет за оператором следующую открытую заявку из очереди.
+
+    Закрепление действует ASSIGNMENT_TIMEOUT секунд: если за это время
+    заявка осталась открытой, ее может взять другой оператор.
+    """
+    expires_before = datetime.now(pytz.utc) - timedelta(
+        seconds=ASSIGNMENT_TIMEOUT)
+    application_id = claim_application(
+        db.session, operator, DEFAULT_APP_STATUS, expires_before)
+    db.session.commit()
+    return application_id
+
+
+def assigned_to_other(application: Application, operator: str) -> bool:
+    """Проверяет, закреплена ли заявка за другим оператором.
+
+    Закрепление действует ASSIGNMENT_TIMEOUT секунд после взятия заявки.
+    """
+    if application.assigned_to in (None, operator):
+        return False
+    assigned_at = application.assigned_at
+    if assigned_at.tzinfo is None:
+        assigned_at = pytz.utc.localize(assigned_at)
+    return datetime.now(pytz.utc) - assigned_at < timedelta(
+        seconds=ASSIGNMENT_TIMEOUT)
+
+
+def get_broadcast_progress(broadcast: Broadcast) -> dict:
+    """Описывает статус и прогресс отправки рассылки."""
+    return {
+        'id': broadcast.id,
+        'status': BROADCAST_STATUSES[broadcast.status],
+        'progress': messages.BROADCAST_PROGRESS.format(
+            sent=broadcast.sent, total=broadcast.total,
+            blocked=broadcast.blocked, failed=broadcast.failed),
+        'active': broadcast.status in (BROADCAST_PENDING, BROADCAST_SENDING),
+    }
 
 
 def get_amount_opened_apps() -> int:
     """Получает из БД количество заявок в статусе 'открыта'."""
-    return db.session.execute(
-        db.select(func.count()).select_from(Application)
-        .join(ApplicationStatus, Application.status_id == ApplicationStatus.id)
-        .filter(ApplicationStatus.status == DEFAULT_APP_STATUS),
-    ).scalar()
+    with replica_reads():
+        return count_applications_in_status(db.session, DEFAULT_APP_STATUS)
 
 
 def get_amount_new_apps() -> int:
     """Получает из БД количество новых заявок за последние 10 секунд."""
     moscow_tz = pytz.timezone(TIME_ZONE)
     last_check = datetime.now(moscow_tz) - timedelta(seconds=10)
-    return db.session.execute(
-        db.select(func.count(Application.id))
-        .where(Application.timestamp > last_check),
-    ).scalar()
+    return count_applications_since(db.session, last_check)
+
+
+def parse_audit_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Преобразует строковую метку времени журнала в datetime."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.strptime(value, TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+    return pytz.timezone(TIME_ZONE).localize(parsed)
+
+
+def with_percent(rows: list[dict]) -> list[dict]:
+    """Добавляет к точкам графика долю от максимального значения."""
+    peak = max((row['value'] for row in rows), default=0) or 1
+    for row in rows:
+        row['percent'] = round(row['value'] * 100 / peak)
+    return rows
+
+
+def get_dashboard_stats(days: int) -> dict[str, list[dict]]:
+    """Получает данные для графиков главной страницы из сводных таблиц."""
+    now = datetime.now(pytz.timezone(TIME_ZONE))
+    since = now.date() - timedelta(days=days - 1)
+    with replica_reads():
+        daily = db.session.execute(
+            db.select(ApplicationDailyRollup)
+            .where(ApplicationDailyRollup.day >= since)
+            .order_by(ApplicationDailyRollup.day),
+        ).scalars().all()
+        hourly = db.session.execute(
+            db.select(ApplicationHourlyRollup)
+            .where(ApplicationHourlyRollup.hour > now - timedelta(hours=24))
+            .order_by(ApplicationHourlyRollup.hour),
+        ).scalars().all()
+        statuses = db.session.execute(
+            db.select(
+                StatusDailyRollup.status,
+                func.sum(StatusDailyRollup.transitions),
+                func.sum(StatusDailyRollup.seconds_in_status),
+            )
+            .where(StatusDailyRollup.day >= since)
+            .group_by(StatusDailyRollup.status)
+            .order_by(StatusDailyRollup.status),
+        ).all()
+    return {
+        'intake': with_percent([
+            {'label': row.day.strftime('%d.%m'), 'value': row.intake}
+            for row in daily
+        ]),
+        'first_response': with_percent([
+            {'label': row.day.strftime('%d.%m'),
+             'value': round(
+                 row.first_response_seconds / row.first_responses / 60)}
+            for row in daily if row.first_responses
+        ]),
+        'hourly': with_percent([
+            {'label': row.hour.strftime('%H:00'), 'value': row.intake}
+            for row in hourly
+        ]),
+        'statuses': with_percent([
+            {'label': status, 'value': round(seconds / transitions / 3600, 1)}
+            for status, transitions, seconds in statuses if transitions
+        ]),
+    }
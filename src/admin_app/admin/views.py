@@ -1,7 +1,12 @@
-from flask import Response, jsonify, redirect, url_for
+import flask_login as login
+from flask import Response, abort, jsonify, redirect, request, url_for
 
-from . import app
-from .utils import get_amount_new_apps
+from repository import get_broadcasts
+
+from . import app, db, profiler
+from .constants import FEED_WAIT_TIMEOUT, METRICS_CONTENT_TYPE
+from .feed import feed
+from .utils import get_amount_new_apps, get_broadcast_progress
 
 
 @app.route('/')
@@ -18,3 +23,58 @@ def new_applications() -> Response:
     """
     new_applications = get_amount_new_apps()
     return jsonify({'new_applications': new_applications})
+
+
+@app.route('/api/applications/feed', methods=['GET'])
+def applications_feed() -> Response:
+    """Ждет новых заявок и возвращает их количество в формате json.
+
+    Параметр 'after' — последний известный вкладке идентификатор заявки.
+    Без него ответ возвращается сразу с текущим идентификатором. Сессия
+    БД закрывается до ожидания, чтобы запрос не удерживал соединение.
+    """
+    if not login.current_user.is_authenticated:
+        abort(401)
+    db.session.close()
+    latest_id, new_applications = feed.wait(
+        request.args.get('after', type=int), FEED_WAIT_TIMEOUT,
+    )
+    return jsonify({
+        'latest_id': latest_id,
+        'new_applications': new_applications,
+    })
+
+
+@app.route('/api/broadcasts/progress', methods=['GET'])
+def broadcasts_progress() -> Response:
+    """Возвращает статус и прогресс отправки рассылок в формате json.
+
+    Идентификаторы рассылок передаются повторяющимся параметром 'id'.
+    """
+    if not login.current_user.is_authenticated:
+        abort(401)
+    broadcasts = get_broadcasts(
+        db.session, request.args.getlist('id', type=int))
+    return jsonify({
+        'broadcasts': [get_broadcast_progress(broadcast)
+                       for broadcast in broadcasts],
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics() -> Response:
+    """Возвращает статистику запросов в формате Prometheus.
+
+    Доступ по заголовку 'Authorization: Bearer <METRICS_TOKEN>'
+    или для авторизованного администратора.
+    """
+    token = app.config['METRICS_TOKEN']
+    authorized = (
+        token and request.headers.get('Authorization') == f'Bearer {token}'
+    ) or (
+        login.current_user.is_authenticated
+        and login.current_user.role == 'admin'
+    )
+    if not authorized:
+        abort(403)
+    return Response(profiler.render(), content_type=METRICS_CONTENT_TYPE)
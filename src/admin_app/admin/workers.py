@@ -0,0 +1,31 @@
+import gc
+
+from . import app, db
+from .auth import principals
+from .feed import feed
+
+
+def dispose_engines() -> None:
+    """Закрывает соединения в пулах всех движков SQLAlchemy."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def prepare_master() -> None:
+    """Готовит загруженное в мастере Gunicorn приложение к fork.
+
+    Соединения с БД не должны достаться воркерам по наследству, а
+    объекты, созданные при импорте, переносятся в постоянное поколение
+    сборщика мусора: он не обходит их и не пишет в их заголовки, поэтому
+    страницы памяти остаются общими с мастером.
+    """
+    dispose_engines()
+    gc.freeze()
+
+
+def init_worker() -> None:
+    """Создает заново ресурсы процесса в новом воркере."""
+    dispose_engines()
+    feed.reset()
+    principals.invalidate()
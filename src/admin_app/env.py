@@ -1,13 +1,15 @@
 from __future__ import with_statement
 
 import logging
+import re
 from logging.config import fileConfig
-from typing import List
+from typing import List, Optional
 
 from alembic import context
 from alembic.migration import MigrationContext
 from alembic.script import Script
 from flask import current_app
+from sqlalchemy.schema import SchemaItem
 
 from models import Base
 
@@ -18,6 +20,10 @@ logger = logging.getLogger('alembic.env')
 
 target_metadata = Base.metadata
 
+# Месячные секции архивных таблиц создаются командой archive_applications
+# и не описаны в моделях, поэтому autogenerate не должен их удалять.
+ARCHIVE_PARTITION = re.compile(r'^\w+_archive_\d{4}_\d{2}$')
+
 config.set_main_option(
     'sqlalchemy.url',
     str(
@@ -26,11 +32,20 @@ config.set_main_option(
 )
 
 
+def include_object(
+        obj: SchemaItem, name: Optional[str], type_: str, reflected: bool,
+        compare_to: Optional[SchemaItem],
+) -> bool:
+    """Исключает секции архивных таблиц из сравнения схемы."""
+    return not (type_ == 'table' and ARCHIVE_PARTITION.match(name or ''))
+
+
 def run_migrations_offline() -> None:
     """Запускаем миграции в оффлайн-режиме."""
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url, target_metadata=target_metadata, literal_binds=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -55,6 +70,7 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args,
         )
 
@@ -0,0 +1,34 @@
+import os
+
+from gunicorn.arbiter import Arbiter
+from gunicorn.workers.base import Worker
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS') or 4)
+# Потоковые воркеры: ожидающие long-poll запросы занимают поток,
+# а не весь процесс, и не мешают обычным страницам админки.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS') or 64)
+timeout = int(os.getenv('GUNICORN_TIMEOUT') or 60)
+# Приложение загружается один раз в мастере, а воркеры получают его
+# при fork и делят память с мастером, пока не изменят ее страницы.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def when_ready(server: Arbiter) -> None:
+    """Готовит загруженное приложение к запуску воркеров."""
+    if server.cfg.preload_app:
+        from admin.workers import prepare_master
+        prepare_master()
+
+
+def post_fork(server: Arbiter, worker: Worker) -> None:
+    """Создает заново ресурсы, унаследованные воркером от мастера."""
+    if server.cfg.preload_app:
+        from admin.workers import init_worker
+        init_worker()
+
+
+def post_worker_init(worker: Worker) -> None:
+    """Сообщает, что воркер загрузил приложение и готов к запросам."""
+    worker.log.info('Воркер %s готов к запросам', worker.pid)
@@ -18,6 +18,7 @@ else
     flask create_statuses
 fi
 
-# Запуск приложения через Gunicorn на 4 процессах
+# Запуск приложения через Gunicorn: 4 процесса с потоковыми воркерами,
+# настройки в gunicorn.conf.py
 echo "Запуск Gunicorn..."
-exec gunicorn -w 4 -b 0.0.0.0:8000 admin:app
+exec gunicorn -c gunicorn.conf.py admin:app
@@ -0,0 +1,124 @@
+"""Общий код замеров админ-панели.
+
+Запускается с зависимостями админки: модули админки импортируются
+только внутри функций, после setup_environment.
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import cli
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+ADMIN_DIR = SRC_DIR / 'admin_app'
+LOGIN = 'admin'
+PASSWORD = 'password'
+GUNICORN_START_TIMEOUT = 30
+
+
+def setup_environment(database_url: Optional[str] = None) -> Optional[Path]:
+    """Готовит окружение для импорта админки и ее процессов.
+
+    Если адрес БД не задан, создает временную базу SQLite и возвращает
+    путь к ее файлу.
+    """
+    sqlite_path = None
+    if database_url is None:
+        sqlite_path = Path(tempfile.mkdtemp()) / 'admin.sqlite3'
+        database_url = f'sqlite:///{sqlite_path}'
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('SECRET_FLASK', 'benchmark')
+    for path in (str(SRC_DIR), str(ADMIN_DIR)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return sqlite_path
+
+
+def run_benchmark(parser: argparse.ArgumentParser, measure: cli.Measure,
+                  argv: Optional[list[str]] = None) -> dict:
+    """Выполняет замер админки в окружении setup_environment.
+
+    Подробности в cli.run_benchmark.
+    """
+    return cli.run_benchmark(parser, measure, setup_environment, argv)
+
+
+def admin_environment() -> dict[str, str]:
+    """Возвращает переменные окружения для процессов админки."""
+    return {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join((str(SRC_DIR), str(ADMIN_DIR))),
+    }
+
+
+def prepare_database(users: int) -> None:
+    """Создает таблицы, сотрудника и клиентов в отдельном процессе."""
+    script = (
+        'from admin import app, db\n'
+        'from models import AdminUser, Base, User\n'
+        'with app.app_context():\n'
+        '    Base.metadata.create_all(db.engine)\n'
+        f'    db.session.add(AdminUser(login={LOGIN!r}, '
+        f'password={PASSWORD!r}, role="admin"))\n'
+        '    db.session.add_all(User(id=str(index), name=f"user{index}") '
+        f'for index in range({users}))\n'
+        '    db.session.commit()\n'
+    )
+    subprocess.run([sys.executable, '-c', script], check=True,
+                   env=admin_environment(), cwd=ADMIN_DIR)
+
+
+def free_port() -> int:
+    """Возвращает свободный локальный порт."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(port: int, options: tuple[str, ...] = (),
+                   environment: Optional[dict[str, str]] = None,
+                   log_level: str = 'warning',
+                   capture_log: bool = False) -> subprocess.Popen:
+    """Запускает Gunicorn с gunicorn.conf.py и ждет открытия порта.
+
+    options дописываются в командную строку, environment - в окружение
+    процесса. При capture_log лог Gunicorn доступен в server.stderr.
+    """
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+               '--bind', f'127.0.0.1:{port}', '--log-level', log_level,
+               *options, 'admin:app']
+    server = subprocess.Popen(
+        command, cwd=ADMIN_DIR,
+        env={**admin_environment(), **(environment or {})},
+        stderr=subprocess.PIPE if capture_log else None, text=True,
+    )
+    deadline = time.monotonic() + GUNICORN_START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(
+        f'Gunicorn не запустился за {GUNICORN_START_TIMEOUT} секунд')
+
+
+def log_in(port: int) -> str:
+    """Входит в админку и возвращает cookie сессии."""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request(
+        'POST', '/admin/login/', body=f'login={LOGIN}&password={PASSWORD}',
+        headers={'Content-Type': 'application/x-www-form-urlencoded'},
+    )
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.getheader('Set-Cookie').split(';', 1)[0]
@@ -0,0 +1,123 @@
+"""Нагрузочный тест админки с открытыми long-poll соединениями.
+
+Запускается с зависимостями админки. Поднимает Gunicorn с настройками
+из gunicorn.conf.py, открывает заданное число ожидающих запросов к ленте
+новых заявок, как это делают открытые вкладки главной страницы, и
+одновременно замеряет время ответа списка клиентов. Для сравнения с
+прежним запуском передайте --worker-class sync --threads 1: при
+threads больше 1 Gunicorn сам заменяет sync на gthread.
+
+Пример запуска::
+
+    python src/benchmarks/admin_long_poll.py --idle 200 --requests 100
+"""
+import argparse
+import http.client
+import socket
+import time
+from statistics import quantiles
+from typing import Optional
+
+from admin_harness import (
+    free_port,
+    log_in,
+    prepare_database,
+    run_benchmark,
+    start_gunicorn,
+)
+from cli import benchmark_parser
+
+CRUD_PATH = '/admin/user/'
+FEED_PATH = '/api/applications/feed?after=0'
+
+
+def open_idle_connections(port: int, cookie: str,
+                          count: int) -> list[socket.socket]:
+    """Открывает ожидающие запросы к ленте, не читая ответы."""
+    request = (f'GET {FEED_PATH} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+               f'Cookie: {cookie}\r\n\r\n').encode()
+    connections = []
+    for _ in range(count):
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(request)
+        connections.append(sock)
+    return connections
+
+
+def measure_crud(port: int, cookie: str, requests: int,
+                 timeout: float) -> dict:
+    """Замеряет время ответа страницы списка клиентов."""
+    timings = []
+    errors = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        connection = http.client.HTTPConnection('127.0.0.1', port,
+                                                timeout=timeout)
+        try:
+            connection.request('GET', CRUD_PATH, headers={'Cookie': cookie})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+                continue
+        except OSError:
+            errors += 1
+            continue
+        finally:
+            connection.close()
+        timings.append(time.perf_counter() - started)
+    result = {'requests': requests, 'errors': errors}
+    if len(timings) >= 2:
+        cuts = quantiles(timings, n=100)
+        result.update(p50_ms=round(cuts[49] * 1000, 1),
+                      p95_ms=round(cuts[94] * 1000, 1),
+                      max_ms=round(max(timings) * 1000, 1))
+    return result
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Запускает сервер, открывает соединения и замеряет CRUD."""
+    prepare_database(args.users)
+    port = free_port()
+    options = ()
+    if args.worker_class:
+        options += ('--worker-class', args.worker_class)
+    if args.threads:
+        options += ('--threads', str(args.threads))
+    server = start_gunicorn(port, options)
+    connections = []
+    try:
+        cookie = log_in(port)
+        baseline = measure_crud(port, cookie, args.requests, args.timeout)
+        connections = open_idle_connections(port, cookie, args.idle)
+        time.sleep(1)
+        loaded = measure_crud(port, cookie, args.requests, args.timeout)
+    finally:
+        for sock in connections:
+            sock.close()
+        server.terminate()
+        server.wait()
+    return {
+        'worker_class': args.worker_class or 'gunicorn.conf.py',
+        'threads': args.threads or 'gunicorn.conf.py',
+        'idle_connections': args.idle,
+        'crud_without_idle': baseline,
+        'crud_with_idle': loaded,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Замеряет CRUD админки при открытых соединениях ленты."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--idle', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--timeout', type=float, default=10.0,
+                        help='Таймаут одного CRUD-запроса, секунды.')
+    parser.add_argument('--worker-class', default=None)
+    parser.add_argument('--threads', type=int, default=None)
+    run_benchmark(parser, run, argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Память и время запуска воркеров админки с preload_app и без него.
+
+Запускается с зависимостями админки на Linux: память читается из
+/proc/<pid>/smaps_rollup. Для каждого режима поднимает Gunicorn с
+настройками из gunicorn.conf.py, ждет готовности всех воркеров и
+выводит для каждого RSS, PSS и USS (собственные страницы процесса) сразу
+после запуска и после серии запросов к страницам админки. RSS включает
+страницы, общие с мастером, поэтому экономию от preload показывают PSS
+и USS.
+
+Пример запуска::
+
+    python src/benchmarks/admin_memory.py --workers 4 --requests 200
+"""
+import argparse
+import http.client
+import re
+import subprocess
+import threading
+import time
+from statistics import mean
+from typing import Optional
+
+from admin_harness import (
+    free_port,
+    log_in,
+    prepare_database,
+    run_benchmark,
+    start_gunicorn,
+)
+from cli import benchmark_parser
+
+READY_PATTERN = re.compile(r'Воркер (\d+) готов к запросам')
+PAGES = ('/admin/', '/admin/user/', '/admin/application/',
+         '/admin/adminuser/')
+MEMORY_FIELDS = {'Rss': 'rss', 'Pss': 'pss', 'Private_Clean': 'uss',
+                 'Private_Dirty': 'uss'}
+
+
+def read_memory(pid: int) -> dict[str, float]:
+    """Возвращает RSS, PSS и USS процесса в мегабайтах."""
+    memory = dict.fromkeys(('rss', 'pss', 'uss'), 0.0)
+    with open(f'/proc/{pid}/smaps_rollup') as smaps:
+        for line in smaps:
+            field, _, value = line.partition(':')
+            if field in MEMORY_FIELDS:
+                memory[MEMORY_FIELDS[field]] += int(value.split()[0]) / 1024
+    return {key: round(value, 1) for key, value in memory.items()}
+
+
+def summarize(pids: list[int]) -> dict:
+    """Собирает память воркеров и средние значения по ним."""
+    per_worker = {str(pid): read_memory(pid) for pid in pids}
+    return {
+        'mean': {
+            key: round(mean(row[key] for row in per_worker.values()), 1)
+            for key in ('rss', 'pss', 'uss')
+        },
+        'workers': per_worker,
+    }
+
+
+def start_workers(port: int, workers: int,
+                  preload: bool) -> tuple[subprocess.Popen, list[int],
+                                          float]:
+    """Запускает Gunicorn и ждет готовности всех воркеров.
+
+    Возвращает процесс мастера, идентификаторы воркеров и время от
+    запуска до готовности последнего воркера в секундах.
+    """
+    started = time.perf_counter()
+    server = start_gunicorn(
+        port, environment={'GUNICORN_WORKERS': str(workers),
+                           'GUNICORN_PRELOAD': str(preload).lower()},
+        log_level='info', capture_log=True,
+    )
+    pids: list[int] = []
+    ready = threading.Event()
+
+    def read_log() -> None:
+        for line in server.stderr:
+            match = READY_PATTERN.search(line)
+            if match:
+                pids.append(int(match.group(1)))
+                if len(pids) == workers:
+                    ready.set()
+
+    threading.Thread(target=read_log, daemon=True).start()
+    if not ready.wait(60):
+        server.terminate()
+        raise RuntimeError('Воркеры Gunicorn не запустились за 60 секунд')
+    return server, pids, time.perf_counter() - started
+
+
+def warm_up(port: int, requests: int) -> None:
+    """Открывает страницы админки, распределяя запросы по воркерам."""
+    cookie = log_in(port)
+    for index in range(requests):
+        connection = http.client.HTTPConnection('127.0.0.1', port,
+                                                timeout=30)
+        connection.request('GET', PAGES[index % len(PAGES)],
+                           headers={'Cookie': cookie})
+        connection.getresponse().read()
+        connection.close()
+
+
+def measure(workers: int, requests: int, preload: bool) -> dict:
+    """Замеряет запуск и память воркеров в одном режиме."""
+    port = free_port()
+    server, pids, ready_seconds = start_workers(port, workers, preload)
+    try:
+        after_start = summarize(pids)
+        warm_up(port, requests)
+        after_requests = summarize(pids)
+        master = read_memory(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        'ready_seconds': round(ready_seconds, 2),
+        'master': master,
+        'after_start': after_start,
+        'after_requests': after_requests,
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Замеряет оба режима на одной базе."""
+    prepare_database(args.users)
+    return {
+        'workers': args.workers,
+        'without_preload': measure(args.workers, args.requests,
+                                   preload=False),
+        'with_preload': measure(args.workers, args.requests, preload=True),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Сравнивает память воркеров админки с preload_app и без него."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--users', type=int, default=1000)
+    run_benchmark(parser, run, argv)
+
+
+if __name__ == '__main__':
+    main()
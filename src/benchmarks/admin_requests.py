@@ -0,0 +1,66 @@
+"""Проверка числа SQL-запросов на HTTP-запрос админ-панели.
+
+Запускается с зависимостями админки. Входит в админку через тестовый
+клиент Flask, затем повторяет опрос /api/new_applications и открытие
+главной страницы, как это делает открытая вкладка. Выводит среднее число
+SQL-запросов по endpoint из статистики ProfilingMiddleware и завершается
+с ошибкой, если оно превышает ожидаемое.
+
+Пример запуска::
+
+    python src/benchmarks/admin_requests.py --polls 100
+"""
+import sys
+from typing import Optional
+
+from admin_harness import LOGIN, PASSWORD, run_benchmark
+from cli import benchmark_parser
+
+EXPECTED_QUERIES = {
+    'admin.index': 4,
+    'admin.login_view': 1,
+    'new_applications': 1,
+}
+
+
+def run(polls: int) -> dict:
+    """Выполняет вход и опросы и сравнивает число запросов с ожидаемым."""
+    from admin import app, db, profiler
+
+    from models import AdminUser, Base
+
+    with app.app_context():
+        Base.metadata.create_all(db.engine)
+        db.session.add(AdminUser(login=LOGIN, password=PASSWORD,
+                                 email='admin@example.com', role='admin'))
+        db.session.commit()
+    client = app.test_client()
+    client.post('/admin/login/',
+                data={'login': LOGIN, 'password': PASSWORD})
+    for _ in range(polls):
+        client.get('/api/new_applications')
+    client.get('/admin/')
+    queries = {
+        endpoint: round(stats.queries / stats.requests, 2)
+        for endpoint, stats in sorted(profiler.endpoints.items())
+    }
+    exceeded = {
+        endpoint: queries[endpoint]
+        for endpoint, limit in EXPECTED_QUERIES.items()
+        if queries.get(endpoint, 0) > limit
+    }
+    return {'queries_per_request': queries, 'expected': EXPECTED_QUERIES,
+            'exceeded': exceeded}
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Выводит число запросов и завершается с ошибкой при превышении."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--polls', type=int, default=100)
+    result = run_benchmark(parser, lambda args: run(args.polls), argv)
+    if result['exceeded']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
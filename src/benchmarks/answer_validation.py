@@ -0,0 +1,121 @@
+"""Микробенчмарк проверки ответов пользователей.
+
+Сравнивает прежние проверки Validator (re.match со строковым шаблоном
+и подсчет слов через временные списки) с модулем validation бота на
+синтетическом корпусе ответов, email и телефонов в том виде, в каком их
+вводят пользователи.
+
+Пример запуска::
+
+    python src/benchmarks/answer_validation.py --size 100000
+"""
+import argparse
+import random
+import re
+import time
+from typing import Callable, Optional
+
+from cli import benchmark_parser
+from harness import run_benchmark
+
+WORDS = (
+    'продаю', 'авторские', 'украшения', 'онлайн', 'три', 'года', 'хочу',
+    'увеличить', 'выручку', 'и', 'нанять', 'помощника', 'в', 'магазин',
+    'клиенты', 'приходят', 'из', 'соцсетей', 'реклама', 'дорогая',
+)
+DOMAINS = ('mail.ru', 'yandex.ru', 'gmail.com', 'Example.COM', 'bk.ru')
+PHONE_FORMATS = (
+    '+7 ({a}) {b}-{c}-{d}', '8 {a} {b} {c} {d}', '8({a}){b}{c}{d}',
+    '+7{a}{b}{c}{d}', '{a}{b}{c}{d}', '+7 {a} {b}-{c}-{d}',
+)
+
+
+def legacy_email(email: str) -> bool:
+    """Прежняя проверка email."""
+    return re.match(r"[^@]+@[^@]+\.[^@]+", email) is not None
+
+
+def legacy_phone(phone: str) -> bool:
+    """Прежняя проверка телефона."""
+    return re.match(r"^\+?\d{10,15}$", phone) is not None
+
+
+def legacy_text(text: str) -> bool:
+    """Прежняя проверка текстового ответа."""
+    words = text.split()
+    non_numeric_words = [word for word in words if not word.isdigit()]
+    return len(words) >= 5 and len(non_numeric_words) >= 5
+
+
+def make_corpus(size: int) -> dict[str, list[str]]:
+    """Создает корпус ответов, email и телефонов."""
+    texts = []
+    for _ in range(size):
+        length = random.choice((1, 3, 4, 6, 12, 40, 120))
+        words = random.choices(WORDS, k=length)
+        if random.random() < 0.1:
+            words.append(str(random.randrange(2000, 2025)))
+        texts.append(' '.join(words))
+    emails = [
+        f' {random.choice(WORDS)}{index}@{random.choice(DOMAINS)} '
+        if random.random() < 0.9 else f'{random.choice(WORDS)} без почты'
+        for index in range(size)
+    ]
+    phones = [
+        random.choice(PHONE_FORMATS).format(
+            a=random.randrange(900, 1000), b=random.randrange(100, 1000),
+            c=f'{random.randrange(100):02}', d=f'{random.randrange(100):02}')
+        if random.random() < 0.9 else 'позвоните мне'
+        for _ in range(size)
+    ]
+    return {'text': texts, 'email': emails, 'phone': phones}
+
+
+def measure(check: Callable[[str], object], values: list[str],
+            repeat: int) -> dict:
+    """Замеряет лучшее время проверки всего списка значений."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for value in values:
+            check(value)
+        best = min(best, time.perf_counter() - started)
+    return {
+        'ns_per_value': round(best / len(values) * 1e9, 1),
+        'accepted_percent': round(
+            100 * sum(bool(check(value)) for value in values) / len(values),
+            1),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Сравнивает прежние проверки ответов с модулем validation."""
+    from validation import DEFAULT_RULE, normalize_email, normalize_phone
+
+    random.seed(args.seed)
+    corpus = make_corpus(args.size)
+    checks = {
+        'text': (legacy_text, lambda text: DEFAULT_RULE.check(text)[0]),
+        'email': (legacy_email, normalize_email),
+        'phone': (legacy_phone, normalize_phone),
+    }
+    result = {'size': args.size, 'checks': {}}
+    for name, (legacy, current) in checks.items():
+        result['checks'][name] = {
+            'legacy': measure(legacy, corpus[name], args.repeat),
+            'validation': measure(current, corpus[name], args.repeat),
+        }
+    return result
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Замеряет проверку ответов на сгенерированном корпусе."""
+    parser = benchmark_parser(__doc__, database=False)
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    run_benchmark(parser, run, argv)
+
+
+if __name__ == '__main__':
+    main()
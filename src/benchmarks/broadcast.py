@@ -0,0 +1,189 @@
+"""Скорость и надежность отправки рассылки ботом.
+
+Создает клиентов (часть из них заблокирована в админке, часть
+заблокировала бота, у каждого третьего есть открытая заявка) и рассылку,
+после чего вызывает отправку пачек раз в interval секунд, как это
+делает JobQueue бота. Подмена Bot API отвечает 429 при превышении
+ограничения Telegram на число сообщений в секунду и 403 для клиентов,
+заблокировавших бота.
+
+Посередине рассылки отправитель «падает»: текущая пачка прерывается, а
+отправка продолжается новым отправителем с сохраненного в БД курсора.
+Выводит число получателей, результаты доставки, повторные сообщения
+(могут получить только клиенты прерванной пачки), ответы 429 и
+наибольшее число сообщений за секунду.
+
+Пример запуска::
+
+    python src/benchmarks/broadcast.py --users 300 --rate 20
+"""
+import asyncio
+import json
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Optional
+
+from cli import benchmark_parser
+from harness import (
+    FAKE_TOKEN,
+    FakeTelegramRequest,
+    prepare_database,
+    run_benchmark,
+)
+from telegram import Bot
+from telegram.request import RequestData
+
+BLOCKED_BOT_EVERY = 10
+BLOCKED_IN_ADMIN_EVERY = 25
+WITH_APPLICATION_EVERY = 3
+
+
+class FloodLimitedRequest(FakeTelegramRequest):
+
+    """Подмена Bot API с ограничением числа сообщений в секунду."""
+
+    def __init__(self, limit: int, blocked: set[str]) -> None:
+        """Задает ограничение и клиентов, заблокировавших бота."""
+        super().__init__()
+        self.limit = limit
+        self.blocked = blocked
+        self.sent: deque[float] = deque()
+        self.deliveries: Counter[str] = Counter()
+        self.flood_errors = 0
+        self.peak = 0
+
+    async def do_request(
+            self, url: str, method: str,
+            request_data: Optional[RequestData] = None,
+            *args: Any, **kwargs: Any,
+    ) -> tuple[int, bytes]:
+        """Отвечает ошибкой, если клиент недоступен или лимит превышен."""
+        if not url.endswith('/sendMessage'):
+            return await super().do_request(url, method, request_data,
+                                            *args, **kwargs)
+        now = time.monotonic()
+        while self.sent and self.sent[0] <= now - 1:
+            self.sent.popleft()
+        if len(self.sent) >= self.limit:
+            self.flood_errors += 1
+            return 429, json.dumps({
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            }).encode()
+        self.sent.append(now)
+        self.peak = max(self.peak, len(self.sent))
+        chat_id = str(request_data.parameters['chat_id'])
+        if chat_id in self.blocked:
+            return 403, json.dumps({
+                'ok': False, 'error_code': 403,
+                'description': 'Forbidden: bot was blocked by the user',
+            }).encode()
+        self.deliveries[chat_id] += 1
+        return await super().do_request(url, method, request_data,
+                                        *args, **kwargs)
+
+
+async def create_broadcast(users: int, segment: Optional[str]) -> set[str]:
+    """Создает клиентов и рассылку, возвращает заблокировавших бота."""
+    from database import get_async_db_session
+
+    from models import Application, Broadcast, User
+
+    blocked = set()
+    async with get_async_db_session() as session:
+        for index in range(users):
+            user_id = str(1_000_000 + index)
+            session.add(User(
+                id=user_id, name=f'Клиент {index}',
+                is_blocked=index % BLOCKED_IN_ADMIN_EVERY == 0,
+            ))
+            if index % WITH_APPLICATION_EVERY == 0:
+                session.add(Application(user_id=user_id, status_id=1,
+                                        answers='Ответ'))
+            if index % BLOCKED_BOT_EVERY == 0:
+                blocked.add(user_id)
+        session.add(Broadcast(text='Новости компании', segment=segment))
+        await session.commit()
+    return blocked
+
+
+async def send_until(send_batch: Callable[[Bot], Awaitable[int]], bot: Bot,
+                     interval: float) -> None:
+    """Отправляет пачки раз в interval секунд до конца рассылки."""
+    from database import get_async_db_session
+
+    import repository
+
+    while True:
+        started = time.monotonic()
+        await send_batch(bot)
+        async with get_async_db_session() as session:
+            if await session.run_sync(repository.get_active_broadcast) is None:
+                return
+        await asyncio.sleep(max(0.0, interval - time.monotonic() + started))
+
+
+async def run(users: int, rate: int, limit: int, interval: float,
+              segment: Optional[str]) -> dict:
+    """Отправляет рассылку с прерыванием и возвращает результаты."""
+    from broadcasts import BroadcastSender
+    from database import engine, get_async_db_session
+
+    from models import Broadcast
+
+    await prepare_database()
+    blocked = await create_broadcast(users, segment)
+    request = FloodLimitedRequest(limit, blocked)
+    bot = Bot(FAKE_TOKEN, request=request)
+    started = time.perf_counter()
+    async with bot:
+        crash_at = time.monotonic() + users / rate / 2 * interval
+        sender = BroadcastSender(rate=rate, idle_interval=interval)
+        try:
+            await asyncio.wait_for(
+                send_until(sender.send_batch, bot, interval),
+                crash_at - time.monotonic())
+        except asyncio.TimeoutError:
+            await asyncio.sleep(interval)
+        sender = BroadcastSender(rate=rate, idle_interval=interval)
+        await send_until(sender.send_batch, bot, interval)
+    elapsed = time.perf_counter() - started
+    async with get_async_db_session() as session:
+        broadcast = await session.get(Broadcast, 1)
+    await engine.dispose()
+    return {
+        'users': users,
+        'recipients': broadcast.total,
+        'status': broadcast.status,
+        'sent': broadcast.sent,
+        'blocked': broadcast.blocked,
+        'failed': broadcast.failed,
+        'delivered_messages': sum(request.deliveries.values()),
+        'duplicate_messages': sum(
+            count - 1 for count in request.deliveries.values()),
+        'flood_errors': request.flood_errors,
+        'peak_messages_per_second': request.peak,
+        'seconds': round(elapsed, 2),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Замеряет отправку рассылки с падением отправителя."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--rate', type=int, default=20,
+                        help='Сообщений в пачке (BROADCAST_RATE).')
+    parser.add_argument('--limit', type=int, default=30,
+                        help='Ограничение подмены Bot API, сообщений/с.')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Период задачи отправки, секунды.')
+    parser.add_argument('--segment', default=None,
+                        help='Статус заявки получателей; по умолчанию все.')
+    run_benchmark(parser, lambda args: run(
+        args.users, args.rate, args.limit, args.interval, args.segment),
+        argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Общий запуск замеров из командной строки.
+
+Модуль не зависит ни от бота, ни от админки, поэтому его используют и
+harness.py, и admin_harness.py.
+"""
+import argparse
+import asyncio
+import json
+import shutil
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Union
+
+Setup = Callable[[Optional[str]], Optional[Path]]
+Measure = Callable[[argparse.Namespace], Union[dict, Awaitable[dict]]]
+
+
+def benchmark_parser(doc: str,
+                     database: bool = True) -> argparse.ArgumentParser:
+    """Создает разбор аргументов с описанием из первой строки doc.
+
+    При database добавляет --database-url; без него замер использует
+    временную базу SQLite.
+    """
+    parser = argparse.ArgumentParser(description=doc.splitlines()[0])
+    if database:
+        parser.add_argument('--database-url', default=None)
+    return parser
+
+
+def run_benchmark(parser: argparse.ArgumentParser,
+                  measure: Measure, setup: Setup,
+                  argv: Optional[list[str]] = None) -> dict:
+    """Разбирает аргументы, выполняет замер и выводит результат в JSON.
+
+    setup готовит окружение по адресу БД и возвращает путь к временной
+    базе SQLite, каталог которой удаляется после замера. Корутина,
+    возвращенная measure, выполняется в asyncio.run. Результат
+    возвращается для дополнительных проверок.
+    """
+    args = parser.parse_args(argv)
+    sqlite_path = setup(getattr(args, 'database_url', None))
+    try:
+        result = measure(args)
+        if asyncio.iscoroutine(result):
+            result = asyncio.run(result)
+    finally:
+        if sqlite_path is not None:
+            shutil.rmtree(sqlite_path.parent, ignore_errors=True)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return result
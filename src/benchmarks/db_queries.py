@@ -0,0 +1,266 @@
+"""Микробенчмарк SQL-запросов бота и админки.
+
+Заполняет users, applications, statuses и questions данными заданного
+объема и по отдельности замеряет каждую функцию модуля repository на
+асинхронном движке, как в боте, и на синхронном, как в админке. Для
+каждого запроса выводятся обращения к кэшу скомпилированных запросов
+SQLAlchemy. Результат выводится в JSON для сравнения между коммитами.
+
+Пример запуска::
+
+    python src/benchmarks/db_queries.py --users 100000 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from statistics import mean
+from typing import Awaitable, Callable, Optional
+
+import pytz
+from cli import benchmark_parser
+from harness import SRC_DIR, latency_summary, run_benchmark
+from sqlalchemy import Connection, Engine, create_engine, event
+from sqlalchemy.engine import URL, ExecutionContext
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.orm import Session
+
+SEED_CHUNK = 10_000
+ADMINS = 10
+STATUSES = ('открыта', 'в работе', 'закрыта')
+TIME_ZONE = 'Europe/Moscow'
+
+
+async def seed(users: int, applications: int) -> None:
+    """Заполняет таблицы синтетическими данными."""
+    from database import engine
+    from harness import prepare_database
+    from sqlalchemy import delete, insert, select
+
+    from models import AdminUser, Application, ApplicationStatus, User
+
+    await prepare_database()
+    async with engine.begin() as connection:
+        await connection.execute(delete(Application))
+        await connection.execute(delete(User))
+        await connection.execute(delete(AdminUser))
+        await connection.execute(insert(AdminUser), [
+            {'login': f'admin{index}', 'password': 'password',
+             'email': f'admin{index}@example.com', 'role': 'admin'}
+            for index in range(ADMINS)
+        ])
+        existing = (await connection.execute(
+            select(ApplicationStatus.status))).scalars().all()
+        for status in set(STATUSES) - set(existing):
+            await connection.execute(
+                insert(ApplicationStatus).values(status=status))
+        status_ids = (await connection.execute(
+            select(ApplicationStatus.id))).scalars().all()
+        for start in range(0, users, SEED_CHUNK):
+            await connection.execute(insert(User), [
+                {'id': str(user_id), 'name': f'user{user_id}',
+                 'email': None, 'phone': None, 'is_blocked': False}
+                for user_id in range(start, min(start + SEED_CHUNK, users))
+            ])
+        now = datetime.now(pytz.timezone(TIME_ZONE))
+        for start in range(0, applications, SEED_CHUNK):
+            await connection.execute(insert(Application), [
+                {'user_id': str(random.randrange(users)),
+                 'status_id': random.choice(status_ids),
+                 'answers': 'Ответ на вопрос анкеты',
+                 'timestamp': now - timedelta(minutes=index)}
+                for index in range(start,
+                                   min(start + SEED_CHUNK, applications))
+            ])
+
+
+def query_shapes(users: int) -> dict[str, Callable[[Session], object]]:
+    """Возвращает замеряемые функции общего модуля запросов."""
+    import repository
+
+    def user_id() -> str:
+        return str(random.randrange(users))
+
+    def get_user(session: Session) -> None:
+        repository.get_user(session, user_id())
+
+    def get_questions(session: Session) -> None:
+        repository.get_questions(session)
+
+    def get_user_applications(session: Session) -> None:
+        repository.get_user_applications(session, user_id())
+
+    def count_user_applications(session: Session) -> None:
+        repository.count_user_applications(session, user_id())
+
+    def get_or_create_status(session: Session) -> None:
+        repository.get_or_create_status(session, STATUSES[0])
+
+    def get_admin_by_login(session: Session) -> None:
+        repository.get_admin_by_login(
+            session, f'admin{random.randrange(ADMINS)}')
+
+    def count_applications_in_status(session: Session) -> None:
+        repository.count_applications_in_status(session, STATUSES[0])
+
+    def count_applications_since(session: Session) -> None:
+        repository.count_applications_since(
+            session,
+            datetime.now(pytz.timezone(TIME_ZONE)) - timedelta(seconds=10))
+
+    return {
+        'get_user': get_user,
+        'get_questions': get_questions,
+        'get_user_applications': get_user_applications,
+        'count_user_applications': count_user_applications,
+        'get_or_create_status': get_or_create_status,
+        'get_admin_by_login': get_admin_by_login,
+        'count_applications_in_status': count_applications_in_status,
+        'count_applications_since': count_applications_since,
+    }
+
+
+def async_runner(
+        query: Callable[[Session], object],
+) -> Callable[[], Awaitable]:
+    """Выполняет запрос так, как это делает бот: через run_sync."""
+    from database import get_async_db_session
+
+    async def run_query() -> None:
+        async with get_async_db_session() as session:
+            await session.run_sync(query)
+
+    return run_query
+
+
+def sync_runner(query: Callable[[Session], object],
+                engine: Engine) -> Callable[[], Awaitable]:
+    """Выполняет запрос так, как это делает админка: в обычной сессии."""
+    async def run_query() -> None:
+        with Session(engine) as session:
+            query(session)
+
+    return run_query
+
+
+def count_cache_usage(engine: Engine, stats: Counter) -> None:
+    """Подсчитывает обращения к кэшу скомпилированных запросов движка."""
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(
+            connection: Connection, cursor: object, statement: str,
+            parameters: object, context: ExecutionContext,
+            executemany: bool) -> None:
+        if context is not None and context.compiled is not None:
+            stats[CacheStats(context.cache_hit).name.lower()] += 1
+
+
+async def measure(query: Callable[[], Awaitable], repeat: int,
+                  warmup: int, stats: Counter) -> dict:
+    """Замеряет время выполнения запроса и обращения к кэшу запросов.
+
+    Кэш учитывается только после прогрева: в замеренных запросах
+    не должно быть ни промахов, ни запросов, не попадающих в кэш.
+    """
+    for _ in range(warmup):
+        await query()
+    stats.clear()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await query()
+        timings.append(time.perf_counter() - started)
+    return {'mean_ms': round(mean(timings) * 1000, 3),
+            **latency_summary(timings),
+            'compiled_cache': dict(stats)}
+
+
+def sync_engine_url(url: URL) -> URL:
+    """Возвращает адрес той же БД для синхронного драйвера по умолчанию."""
+    return url.set(drivername=url.get_backend_name())
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Заполняет БД и замеряет все запросы на обоих движках."""
+    from database import engine
+
+    random.seed(args.seed)
+    started = time.perf_counter()
+    if not args.skip_seed:
+        await seed(args.users, args.applications)
+    seeded = time.perf_counter() - started
+    sync_engine = create_engine(sync_engine_url(engine.url))
+    stats = {'async': Counter(), 'sync': Counter()}
+    count_cache_usage(engine.sync_engine, stats['async'])
+    count_cache_usage(sync_engine, stats['sync'])
+    results = {}
+    for name, query in query_shapes(args.users).items():
+        if args.only and name not in args.only:
+            continue
+        runners = {'async': async_runner(query),
+                   'sync': sync_runner(query, sync_engine)}
+        results[name] = {
+            kind: await measure(runner, args.repeat, args.warmup,
+                                stats[kind])
+            for kind, runner in runners.items()
+            if kind in args.engines
+        }
+    dialect = engine.dialect.name
+    sync_engine.dispose()
+    await engine.dispose()
+    return {
+        'commit': git_commit(),
+        'dialect': dialect,
+        'users': args.users,
+        'applications': args.applications,
+        'repeat': args.repeat,
+        'seed_seconds': round(seeded, 3),
+        'queries': results,
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Возвращает текущий коммит репозитория, если он доступен."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_and_save(args: argparse.Namespace) -> dict:
+    """Выполняет замер и при --output сохраняет результаты в файл."""
+    result = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            output.write(json.dumps(result, ensure_ascii=False, indent=2))
+    return result
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Замеряет запросы бота и админки к заполненной базе."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--applications', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', nargs='*', default=None,
+                        help='Замерить только перечисленные запросы.')
+    parser.add_argument('--engines', nargs='*', default=['async', 'sync'],
+                        choices=['async', 'sync'],
+                        help='Движки: async как у бота, sync как у админки.')
+    parser.add_argument('--skip-seed', action='store_true',
+                        help='Использовать уже заполненную базу.')
+    parser.add_argument('--output', default=None,
+                        help='Файл для сохранения результатов.')
+    run_benchmark(parser, run_and_save, argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Проверка ограничителя частоты на синтетическом флуде.
+
+Обычные пользователи проходят сценарий создания заявки, а флудеры
+одновременно отправляют пачки сообщений. Выводит, сколько обновлений
+каждой группы дошло до обработчиков, сколько SQL-запросов вызвал флуд
+и сколько временных блокировок записано в историю.
+
+Пример запуска::
+
+    python src/benchmarks/flood.py --users 100 --flooders 20 --messages 500
+"""
+import asyncio
+import os
+from typing import Optional
+
+from cli import benchmark_parser
+from harness import (
+    FakeTelegramRequest,
+    UpdateFactory,
+    prepare_database,
+    run_benchmark,
+    survey_flow,
+)
+
+FLOODER_ID_START = 900_000
+
+
+def query_count() -> int:
+    """Возвращает число выполненных SQL-запросов."""
+    from metrics import DB_QUERY_LATENCY
+
+    return sum(state[2] for state in DB_QUERY_LATENCY.values.values())
+
+
+async def run(users: int, flooders: int, messages: int) -> dict:
+    """Прогоняет обычных пользователей и флудеров одновременно."""
+    from database import engine, get_async_db_session
+    from main import build_application
+    from metrics import THROTTLED_UPDATES
+    from sqlalchemy import func, select
+
+    from models import CheckIsBlocked
+
+    await prepare_database()
+    request = FakeTelegramRequest()
+    application = build_application(request=request)
+    await application.initialize()
+    await application.start()
+    factory = UpdateFactory(application.bot)
+    flooder_ids = range(FLOODER_ID_START, FLOODER_ID_START + flooders)
+    for user_id in flooder_ids:
+        await application.process_update(factory.message(user_id, '/start'))
+
+    async def play(updates: list) -> None:
+        for update in updates:
+            await application.process_update(update)
+
+    dropped_before = sum(THROTTLED_UPDATES.values.values())
+    queries_before = query_count()
+    await asyncio.gather(*(
+        play([factory.message(user_id, 'спам') for _ in range(messages)])
+        for user_id in flooder_ids
+    ))
+    flood_queries = query_count() - queries_before
+    flood_dropped = sum(THROTTLED_UPDATES.values.values()) - dropped_before
+
+    dropped_before = sum(THROTTLED_UPDATES.values.values())
+    await asyncio.gather(*(
+        play(survey_flow(factory, 10_000 + index)) for index in range(users)
+    ))
+    users_dropped = sum(THROTTLED_UPDATES.values.values()) - dropped_before
+
+    await application.stop()
+    async with get_async_db_session() as session:
+        soft_blocks = (await session.execute(
+            select(func.count()).select_from(CheckIsBlocked)
+            .filter_by(reason='flood'))).scalar()
+    await application.shutdown()
+    await engine.dispose()
+    flood_updates = flooders * messages
+    return {
+        'flooders': flooders,
+        'flood_updates': flood_updates,
+        'flood_passed': flood_updates - flood_dropped,
+        'flood_db_queries': flood_queries,
+        'soft_blocks_recorded': soft_blocks,
+        'users': users,
+        'user_updates_dropped': users_dropped,
+        'throttled': {
+            '/'.join(labels): value
+            for labels, value in THROTTLED_UPDATES.values.items()
+        },
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Замеряет флуд без ожидания токенов ограничителем."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--flooders', type=int, default=20)
+    parser.add_argument('--messages', type=int, default=500)
+    os.environ.setdefault('THROTTLE_MAX_DELAY', '0')
+    run_benchmark(parser, lambda args: run(
+        args.users, args.flooders, args.messages), argv)
+
+
+if __name__ == '__main__':
+    main()
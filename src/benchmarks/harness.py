@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from itertools import count
+from pathlib import Path
+from statistics import quantiles
+from typing import Any, Optional
+
+import cli
+from telegram import Bot, Update
+from telegram.request import BaseRequest, RequestData
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+BOT_DIR = SRC_DIR / 'bot_app'
+FAKE_TOKEN = '123456:FAKE-TOKEN'
+QUESTIONS = {
+    1: 'Вид бизнеса: чем и как долго занимаешься?',
+    2: 'Какие ограничения испытываешь в настоящий момент?',
+    3: 'Как справляешься, какие методы и инструменты используешь?',
+    4: 'Какую цель преследуешь именно сейчас?',
+    5: 'Как именно поймешь, что цель достигнута?',
+}
+ANSWER = 'Развиваю небольшой бизнес по продаже авторских украшений онлайн'
+
+
+def setup_environment(database_url: Optional[str] = None) -> Optional[Path]:
+    """Готовит окружение для импорта модулей бота.
+
+    Если адрес БД не задан, создает временную базу SQLite и возвращает
+    путь к ее файлу.
+    """
+    sqlite_path = None
+    if database_url is None:
+        sqlite_path = Path(tempfile.mkdtemp()) / 'bench.sqlite3'
+        database_url = f'sqlite+aiosqlite:///{sqlite_path}?timeout=60'
+    os.environ['DATABASE_ASYNC_URL'] = database_url
+    os.environ.setdefault('BOT_TOKEN', FAKE_TOKEN)
+    os.environ.setdefault('METRICS_PORT', '0')
+    for path in (str(SRC_DIR), str(BOT_DIR)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return sqlite_path
+
+
+def run_benchmark(parser: argparse.ArgumentParser,
+                  measure: cli.Measure,
+                  argv: Optional[list[str]] = None) -> dict:
+    """Выполняет замер бота в окружении setup_environment.
+
+    Подробности в cli.run_benchmark.
+    """
+    return cli.run_benchmark(parser, measure, setup_environment, argv)
+
+
+async def prepare_database() -> None:
+    """Создает таблицы и заполняет вопросы и статусы."""
+    from database import engine, get_async_db_session
+    from sqlalchemy import func, select
+
+    from models import ApplicationStatus, Base, Question
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with get_async_db_session() as session:
+        if not (await session.execute(
+                select(func.count()).select_from(Question))).scalar():
+            session.add_all(Question(number=number, question=question)
+                            for number, question in QUESTIONS.items())
+            session.add(ApplicationStatus(status='открыта'))
+            await session.commit()
+
+
+class FakeTelegramRequest(BaseRequest):
+
+    """Локальная подмена Telegram Bot API, отвечающая без сети."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """Задает искусственную задержку ответа в секундах."""
+        self.latency = latency
+        self.calls: dict[str, int] = {}
+        self.message_ids = count(1)
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        """Возвращает таймаут чтения по умолчанию."""
+        return None
+
+    async def initialize(self) -> None:
+        """Ничего не делает: соединения не нужны."""
+
+    async def shutdown(self) -> None:
+        """Ничего не делает: соединения не нужны."""
+
+    async def do_request(
+            self, url: str, method: str,
+            request_data: Optional[RequestData] = None,
+            *args: Any, **kwargs: Any,
+    ) -> tuple[int, bytes]:
+        """Возвращает правдоподобный ответ для метода Bot API."""
+        api_method = url.rsplit('/', 1)[-1]
+        self.calls[api_method] = self.calls.get(api_method, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        parameters = request_data.parameters if request_data else {}
+        if api_method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Bench',
+                      'username': 'bench_bot', 'can_join_groups': False,
+                      'can_read_all_group_messages': False,
+                      'supports_inline_queries': False}
+        elif api_method in ('sendMessage', 'editMessageText'):
+            chat_id = int(parameters.get('chat_id', 1))
+            result = {'message_id': next(self.message_ids),
+                      'date': int(time.time()),
+                      'chat': {'id': chat_id, 'type': 'private'},
+                      'text': parameters.get('text', '')}
+        else:
+            result = True
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+
+class UpdateFactory:
+
+    """Создает синтетические обновления Telegram."""
+
+    def __init__(self, bot: Bot) -> None:
+        """Запоминает бота, к которому привязываются обновления."""
+        self.bot = bot
+        self.update_ids = count(1)
+
+    @staticmethod
+    def user(user_id: int) -> dict:
+        """Возвращает данные пользователя Telegram."""
+        return {'id': user_id, 'is_bot': False, 'first_name': 'Клиент',
+                'username': f'user{user_id}'}
+
+    def message(self, user_id: int, text: str) -> Update:
+        """Создает обновление с текстовым сообщением."""
+        update_id = next(self.update_ids)
+        message = {
+            'message_id': update_id, 'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': self.user(user_id), 'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0,
+                                    'length': len(text.split()[0])}]
+        return Update.de_json({'update_id': update_id, 'message': message},
+                              self.bot)
+
+    def callback(self, user_id: int, data: str) -> Update:
+        """Создает обновление с нажатием inline-кнопки."""
+        update_id = next(self.update_ids)
+        return Update.de_json({
+            'update_id': update_id,
+            'callback_query': {
+                'id': str(update_id), 'from': self.user(user_id),
+                'chat_instance': str(user_id), 'data': data,
+                'message': {
+                    'message_id': update_id, 'date': int(time.time()),
+                    'chat': {'id': user_id, 'type': 'private'},
+                    'text': '',
+                },
+            },
+        }, self.bot)
+
+
+def survey_flow(factory: UpdateFactory, user_id: int) -> list[Update]:
+    """Возвращает обновления полного сценария создания заявки."""
+    return [
+        factory.message(user_id, '/start'),
+        factory.message(user_id, 'Создать заявку'),
+        *(factory.message(user_id, ANSWER) for _ in QUESTIONS),
+        factory.callback(user_id, 'confirm_answers'),
+        factory.message(user_id, f'user{user_id}@example.com'),
+    ]
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+    """Возвращает перцентили задержки в миллисекундах."""
+    if len(latencies) < 2:
+        latencies = latencies * 2 or [0.0, 0.0]
+    cuts = quantiles(latencies, n=100)
+    return {
+        'p50_ms': round(cuts[49] * 1000, 3),
+        'p95_ms': round(cuts[94] * 1000, 3),
+        'p99_ms': round(cuts[98] * 1000, 3),
+    }
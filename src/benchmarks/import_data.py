@@ -0,0 +1,153 @@
+"""Скорость загрузки данных командой flask import_data.
+
+Запускается с зависимостями админки. Создает файлы со случайными
+клиентами, заявками и записями журнала статусов (по умолчанию всего
+1 млн строк) и загружает их командой import_data в порядке, нужном для
+внешних ключей. Выводит время и скорость загрузки каждой таблицы, а
+также время одной проверки строк без БД.
+
+Пример запуска::
+
+    python src/benchmarks/import_data.py --users 250000
+
+Для проверки COPY передайте адрес одноразовой базы PostgreSQL в
+--database-url: по умолчанию используется временная база SQLite, в
+которую строки загружаются обычным INSERT.
+"""
+import csv
+import json
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from admin_harness import run_benchmark
+from cli import benchmark_parser
+
+STATUSES = ['открыта', 'в работе', 'закрыта']
+CHANGES_PER_APPLICATION = 2
+ANSWERS = ('Занимаюсь розничной торговлей пять лет, хочу расширить сеть '
+           'магазинов и навести порядок в учете.')
+
+
+def write_files(directory: Path, users: int, seed: int) -> dict[str, Path]:
+    """Создает CSV с клиентами и журналом и JSONL с заявками."""
+    rnd = random.Random(seed)
+    paths = {
+        'users': directory / 'users.csv',
+        'applications': directory / 'applications.jsonl',
+        'check_status': directory / 'check_status.csv',
+    }
+    with open(paths['users'], 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'name', 'email', 'phone', 'is_blocked'])
+        for index in range(users):
+            writer.writerow([
+                100_000 + index, f'Клиент {index}',
+                f'Client{index}@Example.com' if index % 2 else '',
+                f'8 (9{rnd.randrange(10**8, 10**9)})' if index % 3 else '',
+                '1' if index % 50 == 0 else '0',
+            ])
+    with open(paths['applications'], 'w', encoding='utf-8') as file:
+        for index in range(users):
+            file.write(json.dumps({
+                'id': index + 1,
+                'user_id': str(100_000 + index),
+                'status': rnd.choice(STATUSES),
+                'answers': ANSWERS,
+                'timestamp': f'2023-{rnd.randrange(1, 13):02d}-'
+                             f'{rnd.randrange(1, 29):02d}T10:00:00+03:00',
+            }, ensure_ascii=False))
+            file.write('\n')
+    with open(paths['check_status'], 'w', newline='',
+              encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'application_id', 'old_status', 'new_status',
+                         'changed_by', 'timestamp'])
+        for index in range(users * CHANGES_PER_APPLICATION):
+            writer.writerow([
+                index + 1, index // CHANGES_PER_APPLICATION + 1,
+                STATUSES[index % 2], STATUSES[index % 2 + 1], 'operator',
+                '10:00 01.06.2023',
+            ])
+    return paths
+
+
+def measure_parsing(name: str, path: Path) -> float:
+    """Замеряет чтение и проверку файла без обращения к БД."""
+    from admin.importer import TABLE_IMPORTS, open_source, read_records
+
+    statuses = {status: index for index, status in enumerate(STATUSES, 1)}
+    started = time.perf_counter()
+    with open_source(str(path)) as stream:
+        batch = list(enumerate(read_records(stream, str(path)), 1))
+    TABLE_IMPORTS[name].parse_batch(batch, statuses)
+    return time.perf_counter() - started
+
+
+def run(users: int, batch_size: int, seed: int) -> dict:
+    """Создает файлы во временном каталоге и загружает их."""
+    directory = Path(tempfile.mkdtemp())
+    try:
+        return load(users, batch_size, seed, directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def load(users: int, batch_size: int, seed: int, directory: Path) -> dict:
+    """Загружает файлы и возвращает время по таблицам."""
+    from admin import app, db
+
+    from models import ApplicationStatus, Base
+
+    with app.app_context():
+        Base.metadata.create_all(db.engine)
+        db.session.add_all(
+            [ApplicationStatus(status=status) for status in STATUSES])
+        db.session.commit()
+    paths = write_files(directory, users, seed)
+    runner = app.test_cli_runner()
+    results = {}
+    for name, path in paths.items():
+        rows = sum(1 for _ in open(path, encoding='utf-8'))
+        rows -= path.suffix == '.csv'
+        with app.app_context():
+            parsing = measure_parsing(name, path)
+        started = time.perf_counter()
+        outcome = runner.invoke(args=[
+            'import_data', name, str(path), '--batch-size', str(batch_size),
+        ])
+        elapsed = time.perf_counter() - started
+        if outcome.exit_code:
+            raise RuntimeError(outcome.output) from outcome.exception
+        results[name] = {
+            'rows': rows,
+            'seconds': round(elapsed, 2),
+            'rows_per_second': round(rows / elapsed),
+            'parsing_seconds': round(parsing, 2),
+            'last_progress': outcome.output.splitlines()[-2],
+        }
+    results['total'] = {
+        'rows': sum(result['rows'] for result in results.values()),
+        'seconds': round(
+            sum(result['seconds'] for result in results.values()), 2),
+    }
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Замеряет загрузку сгенерированных файлов командой import_data."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--users', type=int, default=250_000,
+                        help='Клиентов и заявок; записей журнала вдвое '
+                             'больше.')
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    parser.add_argument('--seed', type=int, default=1)
+    run_benchmark(parser, lambda args: run(
+        args.users, args.batch_size, args.seed), argv)
+
+
+if __name__ == '__main__':
+    main()
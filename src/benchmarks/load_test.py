@@ -0,0 +1,105 @@
+"""Нагрузочный тест сценария создания заявки.
+
+Прогоняет обработчики BotHandler на синтетических обновлениях против
+локальной подмены Telegram Bot API и одноразовой БД:
+/start → «Создать заявку» → пять ответов → подтверждение → контакт.
+
+Пример запуска::
+
+    python src/benchmarks/load_test.py --users 2000 --concurrency 500
+
+Для PostgreSQL передайте адрес одноразовой базы в --database-url.
+"""
+import asyncio
+import gc
+import time
+import tracemalloc
+from typing import Optional
+
+from cli import benchmark_parser
+from harness import (
+    FakeTelegramRequest,
+    UpdateFactory,
+    latency_summary,
+    prepare_database,
+    run_benchmark,
+    survey_flow,
+)
+
+MEMORY_CHECKPOINT = 4
+
+
+async def run(users: int, concurrency: int, api_latency: float,
+              trace_memory: bool) -> dict:
+    """Прогоняет сценарий для заданного числа пользователей."""
+    from database import engine
+    from main import build_application
+    from metrics import DB_QUERY_LATENCY
+
+    await prepare_database()
+    request = FakeTelegramRequest(latency=api_latency)
+    application = build_application(request=request)
+    await application.initialize()
+    factory = UpdateFactory(application.bot)
+    flows = [survey_flow(factory, 10_000 + index) for index in range(users)]
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def play(updates: list) -> None:
+        async with semaphore:
+            for update in updates:
+                started = time.perf_counter()
+                await application.process_update(update)
+                latencies.append(time.perf_counter() - started)
+
+    queries_before = sum(
+        state[2] for state in DB_QUERY_LATENCY.values.values())
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(play(flow[:MEMORY_CHECKPOINT]) for flow in flows))
+    memory_per_user = None
+    if trace_memory:
+        gc.collect()
+        memory_per_user = tracemalloc.get_traced_memory()[0] / users
+        tracemalloc.stop()
+    await asyncio.gather(*(play(flow[MEMORY_CHECKPOINT:]) for flow in flows))
+    elapsed = time.perf_counter() - started
+    queries = sum(
+        state[2] for state in DB_QUERY_LATENCY.values.values()
+    ) - queries_before
+
+    await application.shutdown()
+    await engine.dispose()
+    return {
+        'users': users,
+        'concurrency': concurrency,
+        'updates': len(latencies),
+        'seconds': round(elapsed, 3),
+        'updates_per_second': round(len(latencies) / elapsed, 1),
+        'surveys_per_second': round(users / elapsed, 1),
+        'db_queries_per_survey': round(queries / users, 2),
+        'memory_per_active_user_bytes': (
+            round(memory_per_user) if memory_per_user is not None else None),
+        'telegram_calls': request.calls,
+        **latency_summary(latencies),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Замеряет прохождение анкет заданным числом пользователей."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--api-latency', type=float, default=0.0,
+                        help='Задержка ответа подмены Bot API, секунды.')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Не замерять память на активного пользователя.')
+    run_benchmark(parser, lambda args: run(
+        args.users, args.concurrency, args.api_latency, not args.no_memory),
+        argv)
+
+
+if __name__ == '__main__':
+    main()
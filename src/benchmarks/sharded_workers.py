@@ -0,0 +1,181 @@
+"""Масштабирование бота на несколько воркеров с консистентным хешированием.
+
+Для каждого числа воркеров запускает их в отдельных процессах так же,
+как main.py при BOT_WORKERS больше 1, и распределяет между ними
+синтетические обновления через UpdateRouter. Воркер обрабатывает
+обновления по очереди, поэтому его пропускная способность ограничена
+задержкой Bot API, которая задается --api-latency. Выводит время
+прохождения анкет всеми пользователями и ускорение относительно одного
+воркера.
+
+Пример запуска::
+
+    python src/benchmarks/sharded_workers.py --workers 1 2 4 --users 200
+
+Для PostgreSQL передайте адрес одноразовой базы в --database-url.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from itertools import zip_longest
+from typing import Optional
+
+from cli import benchmark_parser
+from harness import (
+    FAKE_TOKEN,
+    FakeTelegramRequest,
+    UpdateFactory,
+    prepare_database,
+    run_benchmark,
+    survey_flow,
+)
+from telegram import Bot
+
+BASE_PORT = 9350
+STARTUP_TIMEOUT = 60
+POLL_INTERVAL = 0.05
+
+
+def serve_worker(index: int, address: tuple[str, int],
+                 api_latency: float) -> None:
+    """Запускает воркер бота с подменой Bot API."""
+    from main import build_application
+    from sharding import run_worker_application
+
+    application = build_application(
+        request=FakeTelegramRequest(latency=api_latency))
+    asyncio.run(run_worker_application(application, address))
+
+
+async def wait_for_workers(addresses: list[tuple[str, int]]) -> None:
+    """Ждет, пока все воркеры начнут принимать соединения."""
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    for address in addresses:
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(*address)
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f'Воркер {address} не запустился')
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+            writer.close()
+            break
+
+
+async def count_applications() -> int:
+    """Считает заявки в БД."""
+    from database import get_async_db_session
+    from sqlalchemy import func, select
+
+    from models import Application
+
+    async with get_async_db_session() as session:
+        return (await session.execute(
+            select(func.count()).select_from(Application))).scalar()
+
+
+async def dispose_engine() -> None:
+    """Закрывает соединения бенчмарка перед выходом из цикла событий."""
+    from database import engine
+
+    await engine.dispose()
+
+
+async def prepare() -> None:
+    """Готовит БД для всех запусков."""
+    await prepare_database()
+    await dispose_engine()
+
+
+async def play(workers: int, users: int, first_user: int,
+               addresses: list[tuple[str, int]]) -> dict:
+    """Распределяет анкеты пользователей и ждет создания всех заявок."""
+    from sharding import UpdateRouter
+
+    router = UpdateRouter(addresses)
+    await router.start()
+    await wait_for_workers(addresses)
+    factory = UpdateFactory(Bot(FAKE_TOKEN))
+    flows = [survey_flow(factory, first_user + index)
+             for index in range(users)]
+    shares = [0] * workers
+    for index in range(users):
+        shares[router.ring.node(first_user + index)] += 1
+    expected = await count_applications() + users
+    started = time.perf_counter()
+    updates = 0
+    for step in zip_longest(*flows):
+        for update in filter(None, step):
+            await router.route(update)
+            updates += 1
+    while True:
+        if await count_applications() >= expected:
+            break
+        await asyncio.sleep(POLL_INTERVAL)
+    elapsed = time.perf_counter() - started
+    await router.stop()
+    await dispose_engine()
+    return {
+        'workers': workers,
+        'users_per_worker': shares,
+        'updates': updates,
+        'seconds': round(elapsed, 3),
+        'updates_per_second': round(updates / elapsed, 1),
+        'surveys_per_second': round(users / elapsed, 1),
+    }
+
+
+def run(workers: int, users: int, first_user: int,
+        api_latency: float) -> dict:
+    """Запускает воркеры в отдельных процессах и замеряет пропускную."""
+    context = multiprocessing.get_context('spawn')
+    addresses = [('127.0.0.1', BASE_PORT + index) for index in range(workers)]
+    processes = [
+        context.Process(target=serve_worker,
+                        args=(index, address, api_latency))
+        for index, address in enumerate(addresses)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        return asyncio.run(play(workers, users, first_user, addresses))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+def run_all(args: argparse.Namespace) -> dict:
+    """Замеряет все числа воркеров и считает ускорение."""
+    asyncio.run(prepare())
+    results = [
+        run(workers, args.users, 10_000 + attempt * args.users,
+            args.api_latency)
+        for attempt, workers in enumerate(args.workers)
+    ]
+    baseline = results[0]['updates_per_second']
+    for result in results:
+        result['speedup'] = round(
+            result['updates_per_second'] / baseline, 2)
+    return {'cpu_count': os.cpu_count(), 'api_latency': args.api_latency,
+            'runs': results}
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Сравнивает пропускную способность разного числа воркеров."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--api-latency', type=float, default=0.05,
+                        help='Задержка ответа подмены Bot API, секунды.')
+    os.environ.setdefault('THROTTLE_USER_RATE', '1000000')
+    os.environ.setdefault('THROTTLE_USER_BURST', '1000000')
+    run_benchmark(parser, run_all, argv)
+
+
+if __name__ == '__main__':
+    main()
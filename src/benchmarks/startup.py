@@ -0,0 +1,122 @@
+"""Время импорта и холодного старта бота.
+
+Запускает отдельные процессы Python так же, как контейнер бота:
+``python -X importtime -c "import main"`` для разбора времени импорта
+по пакетам и полный запуск до ``Application.initialize()`` с локальной
+заглушкой Bot API. Заодно проверяет, что бот не импортирует зависимости
+админки (Flask, Flask-Login, Werkzeug).
+
+Пример запуска::
+
+    python src/benchmarks/startup.py --runs 10
+"""
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from statistics import median
+from typing import Optional
+
+from cli import benchmark_parser
+from harness import BOT_DIR, SRC_DIR, run_benchmark
+
+BENCH_DIR = Path(__file__).resolve().parent
+ADMIN_PACKAGES = ('flask', 'flask_login', 'flask_admin', 'werkzeug')
+COLD_START = (
+    'import asyncio, sys\n'
+    f'sys.path.insert(0, {str(BENCH_DIR)!r})\n'
+    'from harness import FakeTelegramRequest\n'
+    'from main import build_application\n'
+    'async def start():\n'
+    '    application = build_application(request=FakeTelegramRequest())\n'
+    '    await application.initialize()\n'
+    '    await application.shutdown()\n'
+    'asyncio.run(start())\n'
+)
+
+
+def bot_environment() -> dict[str, str]:
+    """Возвращает окружение процесса бота."""
+    return {
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join((str(SRC_DIR), str(BOT_DIR))),
+    }
+
+
+def parse_importtime(output: str) -> tuple[float, Counter, list[str]]:
+    """Разбирает вывод -X importtime.
+
+    Возвращает общее время импорта main в миллисекундах, собственное
+    время импорта по пакетам верхнего уровня и список модулей.
+    """
+    total = 0.0
+    packages: Counter = Counter()
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        modules.append(name)
+        packages[name.split('.')[0]] += int(own) / 1000
+        if name == 'main':
+            total = int(cumulative) / 1000
+    return total, packages, modules
+
+
+def measure_imports(runs: int) -> dict:
+    """Замеряет время импорта main в отдельных процессах."""
+    totals = []
+    packages: Counter = Counter()
+    modules: list[str] = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import main'],
+            cwd=BOT_DIR, env=bot_environment(), capture_output=True,
+            text=True, check=True,
+        )
+        total, run_packages, modules = parse_importtime(result.stderr)
+        totals.append(total)
+        packages.update(run_packages)
+    return {
+        'import_main_ms': round(median(totals), 1),
+        'top_packages_ms': {
+            name: round(value / runs, 1)
+            for name, value in packages.most_common(10)
+        },
+        'admin_modules': sorted({
+            name for name in modules
+            if name.split('.')[0] in ADMIN_PACKAGES
+        }),
+    }
+
+
+def measure_process(code: str, runs: int) -> float:
+    """Возвращает медианное время выполнения процесса в миллисекундах."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=BOT_DIR,
+                       env=bot_environment(), check=True)
+        timings.append(time.perf_counter() - started)
+    return round(median(timings) * 1000, 1)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Замеряет запуск и завершается с ошибкой, если бот грузит админку."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    result = run_benchmark(parser, lambda args: {
+        'runs': args.runs,
+        'interpreter_ms': measure_process('pass', args.runs),
+        'cold_start_ms': measure_process(COLD_START, args.runs),
+        **measure_imports(args.runs),
+    }, argv)
+    if result['admin_modules']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
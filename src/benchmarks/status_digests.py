@@ -0,0 +1,101 @@
+"""Число сообщений клиентам при массовой смене статусов заявок.
+
+Имитирует разбор заявок операторами: у каждого клиента несколько
+заявок, каждая за минуту проходит путь «открыта» → «в работе» →
+«закрыта». Изменения записываются в очередь уведомлений так же, как
+это делает админка, после чего бот рассылает сводки через подмену Bot
+API. Выводит число изменений, число вызовов sendMessage (раньше - по
+одному на изменение) и время рассылки.
+
+Пример запуска::
+
+    python src/benchmarks/status_digests.py --users 1000 --applications 2
+"""
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from cli import benchmark_parser
+from harness import (
+    FAKE_TOKEN,
+    FakeTelegramRequest,
+    prepare_database,
+    run_benchmark,
+)
+from telegram import Bot
+
+TRANSITIONS = [('открыта', 'в работе'), ('в работе', 'закрыта')]
+
+
+async def enqueue_changes(users: int, applications: int,
+                          window: float) -> int:
+    """Создает клиентов и изменения статусов их заявок старше window."""
+    from database import get_async_db_session
+
+    from models import StatusNotification, User
+
+    created_at = datetime.now(timezone.utc) - timedelta(seconds=window + 1)
+    changes = 0
+    async with get_async_db_session() as session:
+        for index in range(users):
+            user_id = str(1_000_000 + index)
+            session.add(User(id=user_id, name=f'Клиент {index}'))
+            for number in range(applications):
+                for offset, (old, new) in enumerate(TRANSITIONS):
+                    session.add(StatusNotification(
+                        user_id=user_id,
+                        application_id=index * applications + number + 1,
+                        old_status=old, new_status=new,
+                        created_at=created_at + timedelta(seconds=offset),
+                    ))
+                    changes += 1
+        await session.commit()
+    return changes
+
+
+async def run(users: int, applications: int, latency: float,
+              window: float) -> dict:
+    """Рассылает сводки и возвращает число вызовов Bot API."""
+    from database import engine
+    from notifications import send_digests
+
+    await prepare_database()
+    changes = await enqueue_changes(users, applications, window)
+    request = FakeTelegramRequest(latency=latency)
+    bot = Bot(FAKE_TOKEN, request=request)
+    started = time.perf_counter()
+    async with bot:
+        processed = 0
+        while True:
+            batch = await send_digests(bot, window=window)
+            if not batch:
+                break
+            processed += batch
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    messages = request.calls.get('sendMessage', 0)
+    return {
+        'users': users,
+        'status_changes': changes,
+        'processed_changes': processed,
+        'send_message_calls_before': changes,
+        'send_message_calls': messages,
+        'calls_saved_percent': round(100 * (1 - messages / changes), 1),
+        'seconds': round(elapsed, 2),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Замеряет отправку сводок по накопленным изменениям статусов."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--applications', type=int, default=2)
+    parser.add_argument('--api-latency', type=float, default=0.0,
+                        help='Задержка ответа подмены Bot API, секунды.')
+    parser.add_argument('--window', type=float, default=60)
+    run_benchmark(parser, lambda args: run(
+        args.users, args.applications, args.api_latency, args.window), argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Бенчмарк памяти на незавершенные анкеты.
+
+Создает заданное число анкет, находящихся на середине опроса, в прежнем
+представлении (отдельные ключи context.user_data с копией списка
+вопросов) и в виде SurveyState, и сравнивает занятую ими память.
+Дополнительно выводится размер компактного представления для сохранения.
+
+Пример запуска::
+
+    python src/benchmarks/survey_memory.py --surveys 100000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Callable, Optional
+
+from cli import benchmark_parser
+from harness import ANSWER, QUESTIONS, run_benchmark
+
+
+def legacy_survey(answered: int) -> dict:
+    """Возвращает анкету в прежнем представлении user_data."""
+    return {
+        'answers': [ANSWER] * answered,
+        'current_question': answered,
+        'questions': [{'number': number, 'question': question}
+                      for number, question in QUESTIONS.items()],
+        'started': True,
+    }
+
+
+def slotted_survey(answered: int) -> dict:
+    """Возвращает анкету в виде SurveyState."""
+    from survey import SURVEY_KEY, SurveyState, intern_questions
+
+    survey = SurveyState(intern_questions(QUESTIONS.items()))
+    for _ in range(answered):
+        survey.answer(ANSWER)
+    return {SURVEY_KEY: survey}
+
+
+def measure(factory: Callable[[int], dict], surveys: int,
+            answered: int) -> dict:
+    """Замеряет память, занятую анкетами одного вида."""
+    gc.collect()
+    tracemalloc.start()
+    user_data = {user_id: factory(answered) for user_id in range(surveys)}
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del user_data
+    return {
+        'total_mb': round(used / 2 ** 20, 2),
+        'bytes_per_survey': round(used / surveys),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Сравнивает память анкет в словаре и в SurveyState."""
+    from survey import SurveyState, intern_questions
+
+    survey = SurveyState(intern_questions(QUESTIONS.items()))
+    for _ in range(args.answered):
+        survey.answer(ANSWER)
+    legacy = measure(legacy_survey, args.surveys, args.answered)
+    slotted = measure(slotted_survey, args.surveys, args.answered)
+    return {
+        'surveys': args.surveys,
+        'answered': args.answered,
+        'legacy': legacy,
+        'survey_state': slotted,
+        'saving_percent': round(
+            100 * (1 - slotted['total_mb'] / legacy['total_mb']), 1),
+        'serialized_bytes': len(json.dumps(
+            survey.to_dict(), ensure_ascii=False).encode()),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Замеряет память заданного числа анкет."""
+    parser = benchmark_parser(__doc__, database=False)
+    parser.add_argument('--surveys', type=int, default=100_000)
+    parser.add_argument('--answered', type=int, default=len(QUESTIONS) // 2,
+                        help='Сколько вопросов уже отвечено в анкете.')
+    run_benchmark(parser, run, argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Разбор заявок операторами через очередь и без нее.
+
+Запускается с зависимостями админки. Создает открытые заявки и
+запускает операторов в отдельных потоках: каждый берет заявку, «работает»
+с ней think секунд и переводит ее в статус «в работе». В режиме queue
+заявка берется кнопкой «Взять следующую заявку», в режиме list - как
+раньше: оператор открывает самую старую открытую заявку из общего
+списка. Выводит число заявок, обработанных несколькими операторами,
+скорость и задержку получения заявки и число ошибок блокировки БД.
+
+Пример запуска::
+
+    python src/benchmarks/work_queue.py --operators 50 --applications 2000
+
+По умолчанию используется временная база SQLite, где запись
+выполняется по очереди; для проверки FOR UPDATE SKIP LOCKED передайте
+адрес одноразовой базы PostgreSQL в --database-url.
+"""
+import threading
+import time
+from collections import Counter
+from statistics import quantiles
+from typing import Callable, Optional
+
+from admin_harness import run_benchmark
+from cli import benchmark_parser
+
+STATUSES = ['открыта', 'в работе', 'закрыта']
+MODES = ('queue', 'list')
+
+
+def prepare(applications: int) -> None:
+    """Создает таблицы, клиента и открытые заявки."""
+    from admin import app, db
+
+    from models import Application, ApplicationStatus, Base, User
+
+    with app.app_context():
+        Base.metadata.drop_all(db.engine)
+        Base.metadata.create_all(db.engine)
+        db.session.add_all(
+            [ApplicationStatus(status=status) for status in STATUSES])
+        db.session.add(User(id='1', name='Клиент'))
+        db.session.flush()
+        db.session.bulk_insert_mappings(Application, [
+            {'user_id': '1', 'status_id': 1, 'answers': 'Ответ'}
+            for _ in range(applications)
+        ])
+        db.session.commit()
+
+
+def take_from_list(operator: str) -> Optional[int]:
+    """Открывает самую старую открытую заявку, как в общем списке."""
+    from admin import db
+    from sqlalchemy import select
+
+    from models import Application
+
+    application_id = db.session.execute(
+        select(Application.id)
+        .where(Application.status_id == 1)
+        .order_by(Application.id)
+        .limit(1),
+    ).scalar()
+    db.session.commit()
+    return application_id
+
+
+def operate(name: str, take: Callable[[str], Optional[int]], think: float,
+            stats: dict) -> None:
+    """Берет и обрабатывает заявки, пока открытые не закончатся."""
+    from admin import app, db
+    from sqlalchemy import update
+    from sqlalchemy.exc import OperationalError
+
+    from models import Application
+
+    with app.app_context():
+        while True:
+            started = time.perf_counter()
+            try:
+                application_id = take(name)
+            except OperationalError:
+                db.session.rollback()
+                stats['lock_errors'] += 1
+                continue
+            stats['latencies'].append(time.perf_counter() - started)
+            if application_id is None:
+                return
+            time.sleep(think)
+            try:
+                db.session.execute(
+                    update(Application)
+                    .where(Application.id == application_id)
+                    .values(status_id=2),
+                )
+                db.session.commit()
+            except OperationalError:
+                db.session.rollback()
+                stats['lock_errors'] += 1
+                continue
+            stats['handled'][application_id] += 1
+
+
+def run(mode: str, operators: int, applications: int, think: float) -> dict:
+    """Запускает операторов в одном режиме и возвращает результаты."""
+    from admin.utils import take_next_application
+
+    prepare(applications)
+    take = take_next_application if mode == 'queue' else take_from_list
+    stats = {'latencies': [], 'handled': Counter(), 'lock_errors': 0}
+    threads = [
+        threading.Thread(target=operate,
+                         args=(f'operator{index}', take, think, stats))
+        for index in range(operators)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies = stats['latencies']
+    percentiles = quantiles(latencies, n=100)
+    return {
+        'applications': applications,
+        'handled': len(stats['handled']),
+        'handled_by_several_operators': sum(
+            1 for count in stats['handled'].values() if count > 1),
+        'wasted_handlings': sum(stats['handled'].values())
+        - len(stats['handled']),
+        'takes_per_second': round(len(latencies) / elapsed, 1),
+        'take_p50_ms': round(percentiles[49] * 1000, 2),
+        'take_p95_ms': round(percentiles[94] * 1000, 2),
+        'take_max_ms': round(max(latencies) * 1000, 2),
+        'lock_errors': stats['lock_errors'],
+        'seconds': round(elapsed, 2),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Сравнивает разбор заявок через очередь и из общего списка."""
+    parser = benchmark_parser(__doc__)
+    parser.add_argument('--operators', type=int, default=50)
+    parser.add_argument('--applications', type=int, default=2000)
+    parser.add_argument('--think', type=float, default=0.01,
+                        help='Время работы с заявкой, секунды.')
+    parser.add_argument('--mode', choices=MODES, action='append',
+                        help='Режим; по умолчанию оба.')
+    run_benchmark(parser, lambda args: {
+        mode: run(mode, args.operators, args.applications, args.think)
+        for mode in args.mode or MODES
+    }, argv)
+
+
+if __name__ == '__main__':
+    main()
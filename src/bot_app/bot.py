@@ -1,13 +1,25 @@
 import asyncio
-import re
+from typing import Awaitable, Callable
 
 from buttons import start_keyboard
+from cache import admin_contacts, blocked_users
+from config import SURVEY_SAVE_DRAFTS
 from constants import bot_flow
-from database import get_async_db_session
+from database import get_async_db_session, get_async_read_session
+from drafts import draft_writer, load_draft
 from logger import bot_logger
+from metrics import BLOCK_NOTICES, UPDATE_ERRORS, track_handler
+from sqlalchemy import delete
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from survey import (
+    SURVEY_KEY,
+    QuestionSet,
+    SurveyState,
+    SurveyStep,
+    expire_surveys,
+    get_survey,
+    intern_questions,
+)
 from telegram import (
     CallbackQuery,
     InlineKeyboardButton,
@@ -15,8 +27,16 @@ from telegram import (
     Update,
 )
 from telegram.ext import CallbackContext, ContextTypes
+from validation import (
+    DEFAULT_MIN_WORDS,
+    AnswerRule,
+    count_words,
+    normalize_email,
+    normalize_phone,
+)
 
-from models import AdminUser, Application, ApplicationStatus, Question, User
+import repository
+from models import Application, ApplicationDraft, User
 
 logger = bot_logger()
 
@@ -32,9 +52,7 @@ class UserManager:
         """Сохраняет пользователя в базу данных."""
         try:
             async with get_async_db_session() as session:
-                result = await session.execute(select(User).filter_by(
-                    id=user_id))
-                user = result.scalars().first()
+                user = await session.run_sync(repository.get_user, user_id)
 
                 if not user:
                     new_user = User(id=user_id, name=first_name, email=None,
@@ -53,13 +71,17 @@ class UserManager:
     async def check_user_blocked(
             user_id: str, context: CallbackContext) -> bool:
         """Проверяет, заблокирован ли пользователь."""
+        if blocked_users.is_blocked(user_id):
+            context.user_data['is_blocked'] = True
+            return True
         async with get_async_db_session() as session:
-            result = await session.execute(select(User).filter_by(id=user_id))
-            user = result.scalars().first()
+            user = await session.run_sync(repository.get_user, user_id)
             context.user_data['is_blocked'] = user.is_blocked
+        blocked_users.remember(user_id, user.is_blocked)
         return context.user_data['is_blocked']
 
     @staticmethod
+    @track_handler
     async def handle_profile_update(
             update: Update, context: CallbackContext) -> None:
         """Обрабатывает обновление контактной информации пользователя."""
@@ -71,8 +93,7 @@ class UserManager:
         edit_choice = context.user_data.get('edit_choice')
 
         async with get_async_db_session() as session:
-            result = await session.execute(select(User).filter_by(id=user_id))
-            user = result.scalars().first()
+            user = await session.run_sync(repository.get_user, user_id)
 
             if not user:
                 await update.message.reply_text(
@@ -83,17 +104,19 @@ class UserManager:
                 case 'name':
                     user.name = new_value
                 case 'email':
-                    if not Validator.is_valid_email(new_value):
+                    email = Validator.normalize_email(new_value)
+                    if email is None:
                         await update.message.reply_text(
                             bot_flow.INVALID_EMAIL_FORMAT)
                         return
-                    user.email = new_value
+                    user.email = email
                 case 'phone':
-                    if not Validator.is_valid_phone(new_value):
+                    phone = Validator.normalize_phone(new_value)
+                    if phone is None:
                         await update.message.reply_text(
                             bot_flow.INVALID_PHONE_FORMAT)
                         return
-                    user.phone = new_value
+                    user.phone = phone
                 case _:
                     await update.message.reply_text(
                         bot_flow.UNKNOWN_FIELD_FOR_EDIT)
@@ -110,25 +133,37 @@ class ApplicationManager:
     """Класс для управления заявками."""
 
     @staticmethod
-    async def get_questions() -> list[dict]:
-        """Получает список вопросов из базы данных."""
-        async with get_async_db_session() as session:
-            result = await session.execute(select(Question).order_by(
-                Question.number))
-            questions = result.scalars().all()
-            return [{'number': q.number, 'question': q.question} for q
-                    in questions]
+    async def get_questions() -> QuestionSet:
+        """Получает общий набор вопросов из базы данных."""
+        async with get_async_read_session() as session:
+            rows = await session.run_sync(repository.get_questions)
+        return intern_questions(
+            ((number, question) for number, question, *_ in rows),
+            (AnswerRule(*rule) for _, _, *rule in rows),
+        )
 
     @staticmethod
     def reset_application_data(context: CallbackContext) -> None:
         """Сбрасывает данные заявки в контексте пользователя."""
-        keys_to_delete = [
-            'answers', 'current_question', 'questions', 'started',
-            'awaiting_contact', 'awaiting_confirmation',
-            'editing_question', 'answers_str', 'survey_completed',
-        ]
-        for key in keys_to_delete:
-            context.user_data.pop(key, None)
+        context.user_data.pop(SURVEY_KEY, None)
+
+    @staticmethod
+    async def sweep_idle_surveys(context: CallbackContext) -> None:
+        """Сбрасывает просроченные анкеты и освобождает данные в памяти.
+
+        Перед сбросом незавершенные анкеты сохраняются как черновики,
+        если это разрешено настройкой SURVEY_SAVE_DRAFTS.
+        """
+        application = context.application
+        expired = expire_surveys(application.user_data)
+        for user_id, survey in expired.items():
+            if not application.user_data.get(user_id):
+                application.drop_user_data(user_id)
+            if SURVEY_SAVE_DRAFTS:
+                draft_writer.mark(user_id, survey)
+            else:
+                draft_writer.cancel(user_id)
+        await draft_writer.flush()
 
     @staticmethod
     async def save_application_to_db(
@@ -138,15 +173,8 @@ class ApplicationManager:
         user_id = str(query.from_user.id)
         try:
             async with get_async_db_session() as session:
-                result = await session.execute(select(
-                    ApplicationStatus).filter_by(
-                    status=bot_flow.DEFAULT_STATUS))
-                status = result.scalars().first() or ApplicationStatus(
-                    status=bot_flow.DEFAULT_STATUS)
-                if not status.id:
-                    session.add(status)
-                    await session.commit()
-
+                status = await session.run_sync(
+                    repository.get_or_create_status, bot_flow.DEFAULT_STATUS)
                 application = Application(user_id=user_id,
                                           status_id=status.id, answers=answers)
                 session.add(application)
@@ -160,29 +188,33 @@ class ApplicationManager:
             raise
 
     @staticmethod
+    @track_handler
     async def handle_contact_info(
             update: Update, context: CallbackContext) -> None:
         """Обрабатывает контактную информацию пользователя."""
         user_id = str(update.message.from_user.id)
         if await UserManager.check_user_blocked(user_id, context):
-            message = await BotHandler.generate_message_for_blocked_user()
-            await update.message.reply_text(message)
+            await BotHandler.send_block_notice(update, user_id)
             return
 
-        if not context.user_data.get('awaiting_contact'):
+        survey = get_survey(context)
+        if survey is None or survey.step is not SurveyStep.CONTACT:
             return
 
         contact_info = update.message.text
 
         async with get_async_db_session() as session:
-            result = await session.execute(select(User).filter_by(id=user_id))
-            user_record = result.scalars().first()
+            user_record = await session.run_sync(repository.get_user,
+                                                 user_id)
 
             if user_record:
-                match contact_info:
-                    case email if Validator.is_valid_email(email):
+                email = Validator.normalize_email(contact_info)
+                phone = (Validator.normalize_phone(contact_info)
+                         if email is None else None)
+                match email, phone:
+                    case str(), _:
                         user_record.email = email
-                    case phone if Validator.is_valid_phone(phone):
+                    case _, str():
                         user_record.phone = phone
                     case _:
                         await update.message.reply_text(
@@ -191,43 +223,42 @@ class ApplicationManager:
 
                 await session.commit()
 
-        context.user_data['awaiting_contact'] = False
         await ApplicationManager.finalize_application(update, context)
 
     @staticmethod
+    @track_handler
     async def finalize_application(
             update: Update, context: CallbackContext) -> None:
         """Завершает заявку и сохраняет её в базу данных."""
         user_id = str(update.effective_user.id)
-        answers_str = context.user_data.get('answers_str', '')
+        survey = get_survey(context)
+        if survey is None:
+            await update.effective_chat.send_message(bot_flow.HAVENT_ANSWERS)
+            return
+        answers_str = survey.answers_text(bot_flow.ANSWER_LABEL)
+        await draft_writer.settle(update.effective_user.id)
         try:
             async with get_async_db_session() as session:
-                result = await session.execute(select(
-                    ApplicationStatus).filter_by(
-                    status=bot_flow.DEFAULT_STATUS))
-                status = result.scalars().first() or ApplicationStatus(
-                    status=bot_flow.DEFAULT_STATUS)
-                if not status.id:
-                    session.add(status)
-                    await session.commit()
-
-                result = await session.execute(select(Application).filter_by(
-                    user_id=user_id))
-                total_applications = result.scalars().all()
-                application_number = len(
-                    total_applications) + bot_flow.NEXT_QUESTION
+                status = await session.run_sync(
+                    repository.get_or_create_status, bot_flow.DEFAULT_STATUS)
+                total_applications = await session.run_sync(
+                    repository.count_user_applications, user_id)
+                application_number = (
+                    total_applications + bot_flow.NEXT_QUESTION)
 
                 application = Application(user_id=user_id, status_id=status.id,
                                           answers=answers_str)
                 session.add(application)
+                await session.execute(delete(ApplicationDraft).filter_by(
+                    user_id=user_id))
                 await session.commit()
+            draft_writer.cancel(update.effective_user.id)
 
             await update.effective_chat.send_message(
                 f"{bot_flow.SUCCESSFUL_SAVE} "
                 f"{bot_flow.APPLICATION_NUMBER_TEXT} {application_number}",
             )
-            context.user_data['survey_completed'] = True
-            context.user_data['awaiting_contact'] = False
+            survey.move(SurveyStep.COMPLETED)
 
         except (SQLAlchemyError, ValueError, asyncio.TimeoutError,
                 AttributeError) as e:
@@ -238,19 +269,17 @@ class ApplicationManager:
     async def summarize_answers(
             update: Update, context: CallbackContext) -> None:
         """Суммирует ответы пользователя и отображает их для подтверждения."""
-        questions = context.user_data.get('questions', [])
-        answers = context.user_data.get('answers', [])
-
-        if not questions or not answers:
-            await update.message.reply_text(bot_flow.HAVENT_ANSWERS)
+        survey = get_survey(context)
+        if survey is None or not survey.has_answers:
+            await update.effective_message.reply_text(bot_flow.HAVENT_ANSWERS)
             return
 
         summary_text = f"{bot_flow.CHECK_ANSWERS_HEADER}\n\n"
-        for idx, question in enumerate(questions):
-            answer = answers[idx] if idx < len(answers) else bot_flow.EMPTY
-            summary_text += (f"{question['number']}. "
-                             f"{question['question']}\n"
-                             f"{bot_flow.ANSWER_LABEL}: {answer}\n\n")
+        for (number, question), answer in zip(survey.questions,
+                                              survey.answers):
+            summary_text += (f"{number}. {question}\n"
+                             f"{bot_flow.ANSWER_LABEL}: "
+                             f"{answer or bot_flow.EMPTY}\n\n")
 
         reply_markup = InlineKeyboardMarkup([
             [InlineKeyboardButton(bot_flow.CONFIRM_BUTTON_TEXT,
@@ -259,20 +288,17 @@ class ApplicationManager:
                                   callback_data="edit_answers")],
         ])
 
-        await update.message.reply_text(summary_text,
-                                        reply_markup=reply_markup)
-        context.user_data['awaiting_confirmation'] = True
+        await update.effective_message.reply_text(summary_text,
+                                                  reply_markup=reply_markup)
+        survey.move(SurveyStep.CONFIRMING)
 
     @staticmethod
     async def ask_next_question(
             update: Update, context: CallbackContext) -> None:
         """Задает следующий вопрос пользователю."""
-        current_question_index = context.user_data.get('current_question',
-                                                       bot_flow.FIRST_QUESTION)
-        questions = context.user_data.get('questions', [])
+        question_text = get_survey(context).current_question()
 
-        if current_question_index < len(questions):
-            question_text = questions[current_question_index]['question']
+        if question_text is not None:
             chat_id = update.effective_chat.id
             await context.bot.send_message(chat_id=chat_id, text=question_text)
         else:
@@ -284,6 +310,7 @@ class BotHandler:
     """Класс для обработки взаимодействий с ботом."""
 
     @staticmethod
+    @track_handler
     async def start(update: Update, context: CallbackContext) -> None:
         """Обрабатывает команду /start."""
         user_id = str(update.message.from_user.id)
@@ -301,31 +328,84 @@ class BotHandler:
         context.user_data.pop('edit_choice', None)
 
     @staticmethod
+    @track_handler
     async def handle_start_button(
             update: Update, context: CallbackContext) -> None:
         """Обрабатывает нажатие кнопки "Начать"."""
         BotHandler.reset_profile_editing(context)
         context.user_data["is_editing_profile"] = False
-        ApplicationManager.reset_application_data(context)
         user_id = str(update.message.from_user.id)
 
         if await UserManager.check_user_blocked(user_id, context):
-            message = await BotHandler.generate_message_for_blocked_user()
-            await update.message.reply_text(message)
+            ApplicationManager.reset_application_data(context)
+            await BotHandler.send_block_notice(update, user_id)
             return
 
         questions = await ApplicationManager.get_questions()
-        if questions:
-            context.user_data['answers'] = []
-            context.user_data['current_question'] = bot_flow.FIRST_QUESTION
-            context.user_data['questions'] = questions
-            context.user_data['started'] = True
-            await update.message.reply_text(
-                questions[bot_flow.FIRST_QUESTION]['question'])
-        else:
+        if not questions:
+            ApplicationManager.reset_application_data(context)
             await update.message.reply_text(bot_flow.HAVENT_QUESTIONS)
+            return
+
+        survey = get_survey(context)
+        if (survey is None or survey.completed or not survey.has_answers
+                or survey.questions is not questions):
+            survey = await load_draft(user_id, questions)
+
+        if survey is None:
+            survey = SurveyState(questions)
+            context.user_data[SURVEY_KEY] = survey
+            await update.message.reply_text(survey.current_question())
+            return
+
+        survey.editing_question = None
+        survey.move(SurveyStep.RESUMING)
+        context.user_data[SURVEY_KEY] = survey
+        reply_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton(bot_flow.RESUME_BUTTON_TEXT,
+                                  callback_data="resume_draft")],
+            [InlineKeyboardButton(bot_flow.RESTART_BUTTON_TEXT,
+                                  callback_data="restart_survey")],
+        ])
+        await update.message.reply_text(
+            bot_flow.DRAFT_FOUND.format(answered=survey.current,
+                                        total=len(questions)),
+            reply_markup=reply_markup)
+
+    @staticmethod
+    @track_handler
+    async def resume_draft(update: Update, context: CallbackContext) -> None:
+        """Продолжает заполнение сохраненной анкеты."""
+        query = update.callback_query
+        await query.answer()
+        survey = get_survey(context)
+        if survey is None or survey.step is not SurveyStep.RESUMING:
+            await query.edit_message_text(bot_flow.TAP_TO_CONTINIUE)
+            return
+
+        survey.move(SurveyStep.ANSWERING)
+        await query.edit_message_text(bot_flow.DRAFT_RESTORED)
+        await ApplicationManager.ask_next_question(update, context)
+
+    @staticmethod
+    @track_handler
+    async def restart_survey(
+            update: Update, context: CallbackContext) -> None:
+        """Удаляет черновик и начинает анкету заново."""
+        query = update.callback_query
+        await query.answer()
+        survey = get_survey(context)
+        if survey is None or survey.step is not SurveyStep.RESUMING:
+            await query.edit_message_text(bot_flow.TAP_TO_CONTINIUE)
+            return
+
+        await draft_writer.discard(query.from_user.id)
+        survey = SurveyState(survey.questions)
+        context.user_data[SURVEY_KEY] = survey
+        await query.edit_message_text(survey.current_question())
 
     @staticmethod
+    @track_handler
     async def handle_my_applications(
             update: Update, context: CallbackContext) -> None:
         """Обрабатывает запрос на просмотр заявок пользователя."""
@@ -333,44 +413,38 @@ class BotHandler:
         user_id = str(update.message.from_user.id)
 
         if await UserManager.check_user_blocked(user_id, context):
-            message = await BotHandler.generate_message_for_blocked_user()
-            await update.message.reply_text(message)
+            await BotHandler.send_block_notice(update, user_id)
             return
 
-        async with get_async_db_session() as session:
-            result = await session.execute(
-                select(Application)
-                .filter_by(user_id=user_id)
-                .options(selectinload(Application.status)),
-            )
-            applications = result.scalars().all()
+        async with get_async_read_session(user_id) as session:
+            applications = await session.run_sync(
+                repository.get_user_applications, user_id)
 
         match applications:
             case []:
                 await update.message.reply_text(bot_flow.HAVENT_APPLICATION)
             case _:
                 applications_text = bot_flow.APPLICATIONS_HEADER
-                for index, app in enumerate(applications,
-                                            start=bot_flow.NEXT_QUESTION):
+                for index, (_, status) in enumerate(
+                        applications, start=bot_flow.NEXT_QUESTION):
                     applications_text += (f"{bot_flow.APPLICATION_NUMBER}: "
                                           f"{index}\n"
                                           f"{bot_flow.APPLICATION_STATUS}: "
-                                          f"{app.status.status}\n\n")
+                                          f"{status}\n\n")
                 await update.message.reply_text(applications_text)
 
     @staticmethod
+    @track_handler
     async def handle_my_profile(
             update: Update, context: CallbackContext) -> None:
         """Отображает профиль пользователя с кнопкой для редактирования."""
         BotHandler.reset_profile_editing(context)
         user_id = str(update.message.from_user.id)
         if await UserManager.check_user_blocked(user_id, context):
-            message = await BotHandler.generate_message_for_blocked_user()
-            await update.message.reply_text(message)
+            await BotHandler.send_block_notice(update, user_id)
             return
-        async with get_async_db_session() as session:
-            result = await session.execute(select(User).filter_by(id=user_id))
-            user = result.scalars().first()
+        async with get_async_read_session(user_id) as session:
+            user = await session.run_sync(repository.get_user, user_id)
 
             if not user:
                 await update.message.reply_text(bot_flow.USER_NOT_FOUND)
@@ -392,14 +466,15 @@ class BotHandler:
                                             reply_markup=reply_markup)
 
     @staticmethod
+    @track_handler
     async def ask_for_contact_info(
             update: Update, context: CallbackContext) -> None:
         """Запрашивает номер телефона или email после подтверждения."""
         user_id = str(update.effective_user.id)
 
         async with get_async_db_session() as session:
-            result = await session.execute(select(User).filter_by(id=user_id))
-            user_record = result.scalars().first()
+            user_record = await session.run_sync(repository.get_user,
+                                                 user_id)
 
             match user_record:
                 case None:
@@ -412,46 +487,41 @@ class BotHandler:
                 case _:
                     await update.effective_chat.send_message(
                         bot_flow.ASK_FOR_CONTACTS)
-                    context.user_data['awaiting_contact'] = True
+                    get_survey(context).move(SurveyStep.CONTACT)
 
     @staticmethod
+    @track_handler
     async def confirm_answers(
             update: Update, context: CallbackContext) -> None:
         """Подтверждает ответы, запрашивает контактные данные."""
         query = update.callback_query
         await query.answer()
+        survey = get_survey(context)
+        if survey is None or survey.step is not SurveyStep.CONFIRMING:
+            await query.edit_message_text(bot_flow.HAVENT_ANSWERS)
+            return
         await query.edit_message_text(bot_flow.SUCCESSFUL_EDIT)
 
-        questions = context.user_data.get('questions', [])
-        answers = context.user_data.get('answers', [])
-        answers_str = "\n".join(
-            f"{q['number']}. {q['question']}\n{bot_flow.ANSWER_LABEL}: {a}\n"
-            for q, a in zip(questions, answers)
-        )
-
-        context.user_data['awaiting_confirmation'] = False
-        context.user_data['awaiting_contact'] = True
-        context.user_data['answers_str'] = answers_str
+        survey.move(SurveyStep.CONTACT)
         await BotHandler.ask_for_contact_info(update, context)
 
     @staticmethod
+    @track_handler
     async def edit_answers(update: Update, context: CallbackContext) -> None:
         """Отображает список вопросов для редактирования."""
         query = update.callback_query
         await query.answer()
 
-        context.user_data['awaiting_edit_selection'] = True
-        context.user_data['awaiting_confirmation'] = False
-
-        questions = context.user_data.get('questions', [])
-        if not questions:
+        survey = get_survey(context)
+        if survey is None or survey.step is not SurveyStep.CONFIRMING:
             await query.edit_message_text(bot_flow.NOTHING_TO_EDIT)
             return
+        survey.move(SurveyStep.SELECTING_EDIT)
 
         buttons = [
-            [InlineKeyboardButton(f"{q['number']}. {q['question']}",
-                                  callback_data=f"edit_{q['number']}")]
-            for q in questions
+            [InlineKeyboardButton(f"{number}. {question}",
+                                  callback_data=f"edit_{number}")]
+            for number, question in survey.questions
         ]
         reply_markup = InlineKeyboardMarkup(buttons)
 
@@ -459,6 +529,7 @@ class BotHandler:
             bot_flow.CHOOSE_EDIT_QUESTION, reply_markup=reply_markup)
 
     @staticmethod
+    @track_handler
     async def handle_edit_choice(
             update: Update, context: CallbackContext) -> None:
         """Управляет выбором пользователем того, какой вопрос редактировать."""
@@ -466,19 +537,21 @@ class BotHandler:
         await query.answer()
 
         question_number = int(query.data.split('_')[bot_flow.SELECTED_FIELD])
-        questions = context.user_data.get('questions', [])
-        question = next((q for q in questions
-                         if q['number'] == question_number), None)
-
-        if question:
-            context.user_data['awaiting_edit_selection'] = False
-            context.user_data['editing_question'] = question_number
+        survey = get_survey(context)
+        index = (survey.questions.index_of(question_number)
+                 if survey is not None
+                 and survey.step is SurveyStep.SELECTING_EDIT else None)
+
+        if index is not None:
+            survey.editing_question = question_number
+            survey.move(SurveyStep.EDITING)
             await query.edit_message_text(
-                f"{bot_flow.EDIT_RESPONSE}{question['question']}")
+                f"{bot_flow.EDIT_RESPONSE}{survey.questions.texts[index]}")
         else:
             await query.edit_message_text(bot_flow.QUESTION_NOT_FOUND)
 
     @staticmethod
+    @track_handler
     async def handle_profile_edit_choice(
             update: Update, context: CallbackContext) -> None:
         """Обрабатывает выбор редактирования профиля."""
@@ -496,6 +569,7 @@ class BotHandler:
                 await query.edit_message_text(bot_flow.INPUT_PHONE)
 
     @staticmethod
+    @track_handler
     async def handle_edit_profile(
             update: Update, context: CallbackContext) -> None:
         """Отображает кнопки для выбора поля редактирования профиля."""
@@ -513,76 +587,119 @@ class BotHandler:
 
     @staticmethod
     async def error_handler(update: Update, context: CallbackContext) -> None:
-        """Обрабатывает ошибки, возникающие при обработке обновлений."""
-        logger.error(bot_flow.ERROR_HANDLER_MESSAGE.format(
-            update=update, error=context.error))
+        """Обрабатывает ошибки, возникающие при обработке обновлений.
+
+        Обработчик вызывается после выхода из track_handler, поэтому поля
+        обновления передаются в запись лога явно.
+        """
+        UPDATE_ERRORS.inc(type(context.error).__name__)
+        is_update = isinstance(update, Update)
+        logger.error(
+            bot_flow.ERROR_HANDLER_MESSAGE.format(error=context.error),
+            exc_info=context.error,
+            extra={
+                'update_id': update.update_id if is_update else None,
+                'user_id': (update.effective_user.id
+                            if is_update and update.effective_user
+                            else None),
+            },
+        )
 
     @staticmethod
+    @track_handler
     async def process_application(
             update: Update, context: CallbackContext) -> None:
         """Обрабатывает ответы пользователя на вопросы анкеты."""
-        if 'answers' not in context.user_data:
-            context.user_data['answers'] = []
+        survey = get_survey(context)
+        if survey is None:
+            return
 
-        context.user_data['answers'].append(update.message.text)
-        context.user_data['current_question'] += bot_flow.NEXT_QUESTION
+        survey.answer(update.message.text)
+        draft_writer.mark(update.effective_user.id, survey)
         await ApplicationManager.ask_next_question(update, context)
 
     @staticmethod
+    @track_handler
     async def handle_question_response(
             update: Update, context: CallbackContext) -> None:
         """Обрабатывает ответ пользователя на вопрос."""
         user_id = str(update.message.from_user.id)
+        survey = get_survey(context)
 
-        if context.user_data.get('survey_completed', False):
+        if survey is not None and survey.completed:
             return
 
         if await UserManager.check_user_blocked(user_id, context):
-            message = await BotHandler.generate_message_for_blocked_user()
-            await update.message.reply_text(message)
+            await BotHandler.send_block_notice(update, user_id)
             return
 
-        text = update.message.text
+        if survey is None:
+            await update.message.reply_text(bot_flow.TAP_TO_CONTINIUE)
+            return
 
-        match context.user_data:
-            case data if data.get('awaiting_edit_selection', False):
-                await update.message.reply_text(bot_flow.CHOOSE_EDIT_QUESTION)
-                return
+        await SURVEY_STEP_HANDLERS[survey.step](update, context, survey)
 
-            case data if data.get('awaiting_confirmation', False):
-                await update.message.reply_text(bot_flow.CHOOSE_EDIT_OR_OK)
-                return
+    @staticmethod
+    async def answer_question(update: Update, context: CallbackContext,
+                              survey: SurveyState) -> None:
+        """Принимает ответ на текущий вопрос анкеты."""
+        if survey.current_question() is None:
+            await BotHandler.ask_for_contact_info(update, context)
+            return
 
-            case data if 'editing_question' in data:
-                question_number = context.user_data.pop('editing_question')
-                answers = context.user_data.get('answers', [])
-                answers[question_number - bot_flow.NEXT_NUMBER] = text
-                context.user_data['answers'] = answers
-                await ApplicationManager.summarize_answers(update, context)
-                return
+        answer, error = survey.current_rule().check(update.message.text)
+        if error is not None:
+            await update.message.reply_text(error)
+            return
 
-            case data if data.get('awaiting_contact', False):
-                await ApplicationManager.handle_contact_info(update, context)
-                return
+        survey.answer(answer)
+        draft_writer.mark(update.effective_user.id, survey)
+        await ApplicationManager.ask_next_question(update, context)
 
-            case data if 'current_question' in data:
-                if not Validator.is_valid_text(text):
-                    await update.message.reply_text(
-                        bot_flow.INVALID_RESPONSE_MESSAGE)
-                    return
+    @staticmethod
+    async def remind_confirmation(update: Update, context: CallbackContext,
+                                  survey: SurveyState) -> None:
+        """Напоминает подтвердить или отредактировать ответы."""
+        await update.message.reply_text(bot_flow.CHOOSE_EDIT_OR_OK)
 
-                question_index = data['current_question']
-                questions = data['questions']
-                if question_index < len(questions):
-                    await BotHandler.process_application(update, context)
-                else:
-                    await BotHandler.ask_for_contact_info(update, context)
-                return
+    @staticmethod
+    async def remind_edit_selection(update: Update, context: CallbackContext,
+                                    survey: SurveyState) -> None:
+        """Напоминает выбрать вопрос для редактирования."""
+        await update.message.reply_text(bot_flow.CHOOSE_EDIT_QUESTION)
 
-            case _:
-                await update.message.reply_text(bot_flow.TAP_TO_CONTINIUE)
+    @staticmethod
+    async def save_edited_answer(update: Update, context: CallbackContext,
+                                 survey: SurveyState) -> None:
+        """Сохраняет новый ответ на редактируемый вопрос."""
+        answer, error = survey.current_rule().check(update.message.text)
+        if error is not None:
+            await update.message.reply_text(error)
+            return
+
+        survey.edit_answer(answer)
+        draft_writer.mark(update.effective_user.id, survey)
+        await ApplicationManager.summarize_answers(update, context)
+
+    @staticmethod
+    async def remind_resume(update: Update, context: CallbackContext,
+                            survey: SurveyState) -> None:
+        """Напоминает выбрать, продолжить ли сохраненную анкету."""
+        await update.message.reply_text(bot_flow.CHOOSE_RESUME_OR_RESTART)
 
     @staticmethod
+    async def receive_contact(update: Update, context: CallbackContext,
+                              survey: SurveyState) -> None:
+        """Передает контактные данные на сохранение."""
+        await ApplicationManager.handle_contact_info(update, context)
+
+    @staticmethod
+    async def ignore_message(update: Update, context: CallbackContext,
+                             survey: SurveyState) -> None:
+        """Игнорирует сообщения после сохранения заявки."""
+
+    @staticmethod
+    @track_handler
     async def route_message_based_on_state(
             update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Маршрутизирует сообщение на основе состояния пользователя."""
@@ -596,38 +713,54 @@ class BotHandler:
     @staticmethod
     async def generate_message_for_blocked_user() -> str:
         """Генерирует сообщение для заблокированного пользователя."""
-        admin_email = None
-        try:
-            async with get_async_db_session() as session:
-                result = await session.execute(select(AdminUser.email).where(
-                    AdminUser.role == 'admin'))
-                admin_email = result.scalars().first()
-            if admin_email:
-                return f'{bot_flow.BLOCK_MESSAGE} {admin_email}'
-            return bot_flow.BLOCK_MESSAGE
+        admin_email = await admin_contacts.get()
+        if admin_email:
+            return f'{bot_flow.BLOCK_MESSAGE} {admin_email}'
+        return bot_flow.BLOCK_MESSAGE
 
-        except SQLAlchemyError as e:
-            logger.error(f"{bot_flow.DB_QUERY_ERROR_MESSAGE}: {e}")
-            return bot_flow.BLOCK_MESSAGE
+    @staticmethod
+    async def send_block_notice(update: Update, user_id: str) -> None:
+        """Сообщает о блокировке не чаще BLOCK_NOTICE_INTERVAL."""
+        if not blocked_users.should_notify(user_id):
+            BLOCK_NOTICES.inc('suppressed')
+            return
+        BLOCK_NOTICES.inc('sent')
+        message = await BotHandler.generate_message_for_blocked_user()
+        await update.effective_message.reply_text(message)
 
 
 class Validator:
 
     """Класс для проверки валидности данных."""
 
+    normalize_email = staticmethod(normalize_email)
+    normalize_phone = staticmethod(normalize_phone)
+
     @staticmethod
     def is_valid_email(email: str) -> bool:
         """Проверяет, является ли строка допустимым email."""
-        return re.match(r"[^@]+@[^@]+\.[^@]+", email) is not None
+        return normalize_email(email) is not None
 
     @staticmethod
     def is_valid_phone(phone: str) -> bool:
         """Проверяет, является ли строка допустимым номером телефона."""
-        return re.match(r"^\+?\d{10,15}$", phone) is not None
+        return normalize_phone(phone) is not None
 
     @staticmethod
     def is_valid_text(text: str) -> bool:
         """Проверяет, что текст содержит хотя бы 5 слов и не только цифры."""
-        words = text.split()
-        non_numeric_words = [word for word in words if not word.isdigit()]
-        return len(words) >= 5 and len(non_numeric_words) >= 5
+        return count_words(text, DEFAULT_MIN_WORDS) >= DEFAULT_MIN_WORDS
+
+
+SURVEY_STEP_HANDLERS: dict[
+    SurveyStep,
+    Callable[[Update, CallbackContext, SurveyState], Awaitable[None]],
+] = {
+    SurveyStep.ANSWERING: BotHandler.answer_question,
+    SurveyStep.CONFIRMING: BotHandler.remind_confirmation,
+    SurveyStep.SELECTING_EDIT: BotHandler.remind_edit_selection,
+    SurveyStep.EDITING: BotHandler.save_edited_answer,
+    SurveyStep.CONTACT: BotHandler.receive_contact,
+    SurveyStep.COMPLETED: BotHandler.ignore_message,
+    SurveyStep.RESUMING: BotHandler.remind_resume,
+}
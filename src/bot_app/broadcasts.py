@@ -0,0 +1,136 @@
+import asyncio
+import time
+from itertools import takewhile
+from typing import Optional
+
+from config import BROADCAST_IDLE_INTERVAL, BROADCAST_RATE
+from constants import bot_flow
+from database import get_async_db_session
+from logger import bot_logger
+from metrics import BROADCAST_MESSAGES
+from sqlalchemy.exc import SQLAlchemyError
+from telegram import Bot
+from telegram.error import (
+    BadRequest,
+    Forbidden,
+    NetworkError,
+    RetryAfter,
+    TelegramError,
+)
+from telegram.ext import CallbackContext
+
+import repository
+from models import (
+    BROADCAST_PENDING,
+    DELIVERY_BLOCKED,
+    DELIVERY_FAILED,
+    DELIVERY_SENT,
+)
+
+logger = bot_logger()
+
+
+class BroadcastSender:
+
+    """Отправка рассылок пачками с ограничением частоты.
+
+    Задача JobQueue раз в секунду отправляет не больше rate сообщений
+    очередной рассылки (пачки отделены хотя бы секундой, даже если чтение
+    из БД задержало предыдущую) и в одной транзакции записывает
+    результаты доставки и курсор. После перезапуска отправка
+    продолжается с курсора, а клиенты с записанным результатом
+    пропускаются: повторно сообщение может получить только пачка,
+    результат которой не успели записать.
+    """
+
+    def __init__(self, rate: int = BROADCAST_RATE,
+                 idle_interval: float = BROADCAST_IDLE_INTERVAL) -> None:
+        """Задает число сообщений в секунду и паузу без рассылок."""
+        self.rate = rate
+        self.idle_interval = idle_interval
+        self.resume_at = 0.0
+        self.sent_at = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Откладывает отправку следующей пачки."""
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    async def deliver(self, bot: Bot, user_id: str,
+                      text: str) -> Optional[str]:
+        """Отправляет сообщение клиенту и возвращает результат доставки.
+
+        None означает временную ошибку: клиент получит сообщение в одной
+        из следующих пачек.
+        """
+        try:
+            await bot.send_message(chat_id=user_id, text=text)
+        except Forbidden:
+            return DELIVERY_BLOCKED
+        except RetryAfter as error:
+            self.pause(error.retry_after)
+            return None
+        except BadRequest as error:
+            logger.info(bot_flow.SEND_BROADCAST_ERROR.format(
+                user_id=user_id, error=error))
+            return DELIVERY_FAILED
+        except NetworkError:
+            return None
+        except TelegramError as error:
+            logger.error(bot_flow.SEND_BROADCAST_ERROR.format(
+                user_id=user_id, error=error))
+            return DELIVERY_FAILED
+        return DELIVERY_SENT
+
+    async def send_batch(self, bot: Bot) -> int:
+        """Отправляет очередную пачку активной рассылки.
+
+        Возвращает число клиентов, для которых записан результат доставки.
+        """
+        if time.monotonic() < self.resume_at:
+            return 0
+        async with get_async_db_session() as session:
+            broadcast = await session.run_sync(repository.get_active_broadcast)
+            if broadcast is None:
+                self.pause(self.idle_interval)
+                return 0
+            if broadcast.status == BROADCAST_PENDING:
+                await session.run_sync(repository.start_broadcast, broadcast)
+            recipients = await session.run_sync(
+                repository.get_broadcast_recipients, broadcast, self.rate)
+            if not recipients:
+                await session.run_sync(repository.finish_broadcast,
+                                       broadcast.id)
+            await session.commit()
+        if not recipients:
+            return 0
+        delay = self.sent_at + 1 - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.sent_at = time.monotonic()
+        results = await asyncio.gather(*(
+            self.deliver(bot, user_id, broadcast.text)
+            for user_id in recipients
+        ))
+        deliveries = {user_id: result
+                      for user_id, result in zip(recipients, results)
+                      if result is not None}
+        resolved = [user_id for user_id, _ in takewhile(
+            lambda pair: pair[1] is not None, zip(recipients, results))]
+        async with get_async_db_session() as session:
+            await session.run_sync(
+                repository.record_broadcast_batch, broadcast.id, deliveries,
+                resolved[-1] if resolved else None)
+            await session.commit()
+        for result in results:
+            BROADCAST_MESSAGES.inc(result or 'retry')
+        return len(deliveries)
+
+    async def send_job(self, context: CallbackContext) -> None:
+        """Задача JobQueue для отправки рассылок."""
+        try:
+            await self.send_batch(context.bot)
+        except SQLAlchemyError as e:
+            logger.error(f'{bot_flow.DB_QUERY_ERROR_MESSAGE}: {e}')
+
+
+broadcast_sender = BroadcastSender()
@@ -0,0 +1,217 @@
+import asyncio
+import time
+from typing import Optional
+
+from config import ADMIN_CONTACT_TTL, BLOCKED_CACHE_TTL, BLOCK_NOTICE_INTERVAL
+from constants import bot_flow
+from database import engine, get_async_db_session
+from logger import bot_logger
+from metrics import CACHE_REQUESTS
+from sqlalchemy.exc import SQLAlchemyError
+from telegram.ext import CallbackContext
+
+import repository
+from models import (
+    ADMIN_CONTACTS_PAYLOAD,
+    CACHE_INVALIDATION_CHANNEL,
+    USER_PAYLOAD_PREFIX,
+)
+
+ERROR_RETRY_SECONDS = 30
+LISTEN_CHECK_INTERVAL = 30
+LISTEN_RETRY_MIN_SECONDS = 1
+LISTEN_RETRY_MAX_SECONDS = 60
+
+logger = bot_logger()
+
+
+class AdminContactResolver:
+
+    """Кэш email администратора для сообщений заблокированным клиентам."""
+
+    def __init__(self, ttl: float) -> None:
+        """Задает время жизни значения в секундах."""
+        self.ttl = ttl
+        self.email: Optional[str] = None
+        self.expires = 0.0
+        self.lock = asyncio.Lock()
+
+    async def get(self) -> Optional[str]:
+        """Возвращает email администратора, обновляя его по истечении TTL.
+
+        При ошибке БД возвращается прежнее значение, а повторный запрос
+        выполняется не раньше чем через ERROR_RETRY_SECONDS.
+        """
+        if time.monotonic() < self.expires:
+            CACHE_REQUESTS.inc('admin_contact', 'hit')
+            return self.email
+        async with self.lock:
+            if time.monotonic() >= self.expires:
+                CACHE_REQUESTS.inc('admin_contact', 'miss')
+                await self.refresh()
+        return self.email
+
+    async def refresh(self) -> None:
+        """Загружает email администратора из БД."""
+        try:
+            async with get_async_db_session() as session:
+                self.email = await session.run_sync(
+                    repository.get_admin_email)
+            self.expires = time.monotonic() + self.ttl
+        except SQLAlchemyError as e:
+            logger.error(f'{bot_flow.DB_QUERY_ERROR_MESSAGE}: {e}')
+            self.expires = time.monotonic() + ERROR_RETRY_SECONDS
+
+    def invalidate(self) -> None:
+        """Сбрасывает значение, чтобы следующий запрос обратился к БД."""
+        self.expires = 0.0
+
+
+class BlockedUserCache:
+
+    """Кэш заблокированных клиентов и времени последнего уведомления.
+
+    Пока запись действует, сообщения заблокированного клиента
+    обрабатываются без обращений к БД, а уведомление о блокировке
+    отправляется не чаще одного раза за BLOCK_NOTICE_INTERVAL.
+    """
+
+    def __init__(self, ttl: float, notice_interval: float) -> None:
+        """Задает время жизни записей и интервал между уведомлениями."""
+        self.ttl = ttl
+        self.notice_interval = notice_interval
+        self.blocked_until: dict[str, float] = {}
+        self.notified_at: dict[str, float] = {}
+
+    def is_blocked(self, user_id: str) -> bool:
+        """Проверяет, отмечен ли клиент в кэше как заблокированный."""
+        until = self.blocked_until.get(user_id)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self.blocked_until[user_id]
+            return False
+        CACHE_REQUESTS.inc('blocked_user', 'hit')
+        return True
+
+    def remember(self, user_id: str, blocked: bool) -> None:
+        """Запоминает результат проверки блокировки из БД."""
+        if blocked:
+            self.blocked_until[user_id] = time.monotonic() + self.ttl
+        else:
+            self.invalidate(user_id)
+
+    def should_notify(self, user_id: str) -> bool:
+        """Проверяет, пора ли снова отправить клиенту уведомление."""
+        now = time.monotonic()
+        notified = self.notified_at.get(user_id)
+        if notified is not None and now - notified < self.notice_interval:
+            return False
+        self.notified_at[user_id] = now
+        return True
+
+    def invalidate(self, user_id: str) -> None:
+        """Забывает клиента, например после разблокировки в админке."""
+        self.blocked_until.pop(user_id, None)
+        self.notified_at.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Забывает всех клиентов."""
+        self.blocked_until.clear()
+        self.notified_at.clear()
+
+    def prune(self) -> None:
+        """Удаляет истекшие записи."""
+        now = time.monotonic()
+        for user_id in [user_id for user_id, until
+                        in self.blocked_until.items() if until <= now]:
+            del self.blocked_until[user_id]
+        for user_id in [user_id for user_id, notified
+                        in self.notified_at.items()
+                        if now - notified >= self.notice_interval]:
+            del self.notified_at[user_id]
+
+    async def prune_job(self, context: CallbackContext) -> None:
+        """Периодическая задача JobQueue для очистки кэша."""
+        self.prune()
+
+
+admin_contacts = AdminContactResolver(ADMIN_CONTACT_TTL)
+blocked_users = BlockedUserCache(BLOCKED_CACHE_TTL, BLOCK_NOTICE_INTERVAL)
+
+
+def handle_invalidation(connection: object, pid: int, channel: str,
+                        payload: str) -> None:
+    """Сбрасывает кэш по уведомлению админ-панели."""
+    if payload == ADMIN_CONTACTS_PAYLOAD:
+        admin_contacts.invalidate()
+    elif payload.startswith(USER_PAYLOAD_PREFIX):
+        blocked_users.invalidate(payload.removeprefix(USER_PAYLOAD_PREFIX))
+
+
+def clear_caches() -> None:
+    """Сбрасывает кэши, уведомления для которых могли быть пропущены."""
+    admin_contacts.invalidate()
+    blocked_users.clear()
+
+
+class InvalidationListener:
+
+    """Подписка на уведомления админ-панели со сбросом кэшей.
+
+    Пока соединения нет, уведомления теряются, поэтому после каждой
+    подписки кэши сбрасываются. После обрыва подписка восстанавливается
+    с паузой, которая удваивается до LISTEN_RETRY_MAX_SECONDS и
+    сбрасывается после успешной подписки.
+    """
+
+    def __init__(self) -> None:
+        """Задает начальную паузу между попытками."""
+        self.delay = LISTEN_RETRY_MIN_SECONDS
+
+    async def listen_until_lost(self) -> None:
+        """Подписывается на уведомления и ждет обрыва соединения.
+
+        Соединение проверяется запросом раз в LISTEN_CHECK_INTERVAL
+        секунд, чтобы заметить и обрыв, о котором драйвер не сообщил.
+        """
+        async with engine.connect() as connection:
+            raw_connection = await connection.get_raw_connection()
+            driver_connection = raw_connection.driver_connection
+            lost = asyncio.Event()
+            driver_connection.add_termination_listener(lambda _: lost.set())
+            await driver_connection.add_listener(
+                CACHE_INVALIDATION_CHANNEL, handle_invalidation)
+            clear_caches()
+            self.delay = LISTEN_RETRY_MIN_SECONDS
+            logger.info(bot_flow.CACHE_LISTENER_STARTED)
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), LISTEN_CHECK_INTERVAL)
+                except asyncio.TimeoutError:
+                    await connection.exec_driver_sql('SELECT 1')
+
+    async def run(self) -> None:
+        """Держит подписку, пока задачу не отменят."""
+        while True:
+            try:
+                await self.listen_until_lost()
+                error = bot_flow.CONNECTION_CLOSED
+            except Exception as e:
+                error = e
+            logger.error(bot_flow.CACHE_LISTENER_LOST.format(
+                error=error, delay=self.delay))
+            await asyncio.sleep(self.delay)
+            self.delay = min(self.delay * 2, LISTEN_RETRY_MAX_SECONDS)
+
+
+def listen_for_invalidation() -> Optional[asyncio.Task]:
+    """Запускает подписку на уведомления PostgreSQL о смене данных.
+
+    Возвращает задачу, которую нужно отменить при остановке бота, или
+    None, если БД не поддерживает LISTEN/NOTIFY. В этом случае кэш
+    обновляется только по истечении TTL.
+    """
+    if engine.dialect.name != 'postgresql':
+        return None
+    return asyncio.create_task(InvalidationListener().run())
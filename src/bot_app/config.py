@@ -5,3 +5,57 @@ from dotenv import load_dotenv
 load_dotenv()
 
 BOT_TOKEN = os.getenv('BOT_TOKEN')
+
+DATABASE_ASYNC_URL = os.getenv('DATABASE_ASYNC_URL')
+DATABASE_REPLICA_ASYNC_URLS = [
+    url.strip()
+    for url in (os.getenv('DATABASE_REPLICA_ASYNC_URLS') or '').split(',')
+    if url.strip()
+]
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG') or 5)
+REPLICA_CHECK_INTERVAL = float(os.getenv('REPLICA_CHECK_INTERVAL') or 1)
+
+METRICS_HOST = os.getenv('METRICS_HOST') or '127.0.0.1'
+METRICS_PORT = int(os.getenv('METRICS_PORT') or 9100)
+
+BOT_WORKERS = int(os.getenv('BOT_WORKERS') or 1)
+BOT_WORKER_HOST = os.getenv('BOT_WORKER_HOST') or '127.0.0.1'
+BOT_WORKER_PORT = int(os.getenv('BOT_WORKER_PORT') or 9300)
+
+LOG_FILE = os.getenv('LOG_FILE') or 'logging_exception.log'
+LOG_LEVEL = os.getenv('LOG_LEVEL') or 'ERROR'
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES') or 10 * 1024 * 1024)
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT') or 5)
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE') or 0.01)
+SQL_LOG_LEVEL = os.getenv('SQL_LOG_LEVEL') or 'WARNING'
+
+SURVEY_ANSWER_TIMEOUT = int(os.getenv('SURVEY_ANSWER_TIMEOUT') or 24 * 60 * 60)
+SURVEY_CONFIRM_TIMEOUT = int(os.getenv('SURVEY_CONFIRM_TIMEOUT') or 60 * 60)
+SURVEY_CONTACT_TIMEOUT = int(os.getenv('SURVEY_CONTACT_TIMEOUT') or 60 * 60)
+SURVEY_SWEEP_INTERVAL = int(os.getenv('SURVEY_SWEEP_INTERVAL') or 60)
+SURVEY_SAVE_DRAFTS = (
+    (os.getenv('SURVEY_SAVE_DRAFTS') or 'true').lower() == 'true'
+)
+DRAFT_SAVE_INTERVAL = int(os.getenv('DRAFT_SAVE_INTERVAL') or 10)
+
+THROTTLE_USER_RATE = float(os.getenv('THROTTLE_USER_RATE') or 1)
+THROTTLE_USER_BURST = float(os.getenv('THROTTLE_USER_BURST') or 10)
+THROTTLE_GLOBAL_RATE = float(os.getenv('THROTTLE_GLOBAL_RATE') or 0)
+THROTTLE_GLOBAL_BURST = float(os.getenv('THROTTLE_GLOBAL_BURST') or 100)
+THROTTLE_GLOBAL_MAX_DELAY = float(os.getenv('THROTTLE_GLOBAL_MAX_DELAY') or 5)
+THROTTLE_MAX_DELAY = float(os.getenv('THROTTLE_MAX_DELAY') or 0)
+THROTTLE_BLOCK_VIOLATIONS = int(os.getenv('THROTTLE_BLOCK_VIOLATIONS') or 20)
+THROTTLE_BLOCK_DURATION = int(os.getenv('THROTTLE_BLOCK_DURATION') or 600)
+THROTTLE_PRUNE_INTERVAL = int(os.getenv('THROTTLE_PRUNE_INTERVAL') or 300)
+
+ADMIN_CONTACT_TTL = int(os.getenv('ADMIN_CONTACT_TTL') or 300)
+BLOCKED_CACHE_TTL = int(os.getenv('BLOCKED_CACHE_TTL') or 60 * 60)
+BLOCK_NOTICE_INTERVAL = int(os.getenv('BLOCK_NOTICE_INTERVAL') or 60 * 60)
+
+NOTIFY_WINDOW = int(os.getenv('NOTIFY_WINDOW') or 60)
+NOTIFY_INTERVAL = int(os.getenv('NOTIFY_INTERVAL') or 10)
+NOTIFY_BATCH_USERS = int(os.getenv('NOTIFY_BATCH_USERS') or 100)
+NOTIFY_MAX_AGE = int(os.getenv('NOTIFY_MAX_AGE') or 24 * 60 * 60)
+
+BROADCAST_RATE = int(os.getenv('BROADCAST_RATE') or 20)
+BROADCAST_IDLE_INTERVAL = float(os.getenv('BROADCAST_IDLE_INTERVAL') or 10)
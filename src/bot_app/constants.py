@@ -10,6 +10,8 @@ class BotFlow:
 
     # Информационные сообщения
     ANSWER_LABEL: str = "Ответ"
+    ANSWER_TOO_LONG: str = "Ответ не должен быть длиннее {max_length} символов."# noqa
+    ANSWER_TOO_SHORT: str = "Ответ должен содержать хотя бы {min_words} слов!"# noqa
     APPLICATION_NUMBER: str = "Номер"
     APPLICATION_NUMBER_TEXT: str = "Номер вашей заявки:"
     APPLICATION_STATUS: str = "Статус"
@@ -19,8 +21,11 @@ class BotFlow:
     CHECK_ANSWERS_HEADER: str = "Проверьте свои ответы:"
     CHOOSE_EDIT_OR_OK: str = 'Пожалуйста, нажмите «Подтвердить» или «Редактировать» для продолжения.'# noqa
     CHOOSE_EDIT_QUESTION: str = 'Пожалуйста, выберите вопрос для редактирования:' # noqa
+    CHOOSE_RESUME_OR_RESTART: str = 'Пожалуйста, выберите: продолжить анкету или начать заново.'# noqa
     CHOOSE_TO_EDIT: str = 'Выберите, что вы хотите редактировать: '
     CONFIRM_BUTTON_TEXT: str = "✅ Подтвердить"
+    DRAFT_FOUND: str = 'У вас есть незавершенная анкета: отвечено {answered} из {total} вопросов.'# noqa
+    DRAFT_RESTORED: str = 'Продолжим заполнение сохраненной анкеты.'
     DEFAULT_STATUS: str = 'открыта'
     EDIT_BUTTON_TEXT: str = "✏️ Редактировать"
     EDIT_RESPONSE: str = "Редактируйте ответ на вопрос: "
@@ -35,7 +40,6 @@ class BotFlow:
     INVALID_CONTACT_FORMAT_MSG: str = "Неверный формат контактной информации. Попробуйте снова."# noqa
     INVALID_EMAIL_FORMAT: str = "Неправильный формат email. Попробуйте снова."
     INVALID_PHONE_FORMAT: str = "Неправильный формат номера телефона. Попробуйте снова."# noqa
-    INVALID_RESPONSE_MESSAGE: str = "Ответ должен содержать хотя бы 5 слов!"# noqa
     NAME: str = "Имя"
     NOTHING_TO_EDIT: str = 'Нет вопросов для редактирования.'
     NOT_SPECIFIED: str = 'Не задано'
@@ -43,19 +47,32 @@ class BotFlow:
     PROFILE_HEADER: str = "Ваш профиль"
     PROFILE_UPDATED: str = 'Ваш профиль успешно обновлен.'
     QUESTION_NOT_FOUND: str = 'Вопрос не найден.'
+    RESTART_BUTTON_TEXT: str = "🔄 Начать заново"
+    RESUME_BUTTON_TEXT: str = "▶️ Продолжить"
+    STATUS_CHANGED: str = 'Статус вашей заявки № {application_id} - {status}.'
+    STATUSES_CHANGED_HEADER: str = 'Изменились статусы ваших заявок:'
+    STATUS_LINE: str = '№ {application_id} - {status}'
     SUCCESSFUL_EDIT: str = 'Ваши ответы подтверждены.'
     SUCCESSFUL_SAVE: str = 'Заявка успешно сохранена!'
     TAP_TO_CONTINIUE: str = 'Нажмите "Создать заявку", чтобы начать опрос.'
+    THROTTLED_ANSWER: str = 'Слишком много запросов, повторите чуть позже.'
     UNKNOWN_FIELD_FOR_EDIT: str = "Неизвестное поле для редактирования."
     USER_NOT_FOUND: str = 'Пользователь не найден.'
     WELCOME: str = 'Добро пожаловать! Выберите нужное действие:'
 
     # Ошибки
+    CACHE_LISTENER_LOST: str = "Подписка на сброс кэшей потеряна ({error}), повтор через {delay} с"# noqa
+    CACHE_LISTENER_STARTED: str = "Подписка на сброс кэшей установлена, кэши сброшены"# noqa
+    CONNECTION_CLOSED: str = "соединение закрыто"
     DB_QUERY_ERROR_MESSAGE: str = "Ошибка при выполнении запроса к БД"
-    ERROR_HANDLER_MESSAGE: str = "Обновление {update} вызвало исключение {error}"# noqa
+    ERROR_HANDLER_MESSAGE: str = "Ошибка при обработке обновления: {error}"
     SAVE_APPLICATION_ERROR: str = "Ошибка при сохранении заявки в базу данных"
+    SAVE_DRAFT_ERROR: str = "Ошибка при сохранении черновиков анкет"
     SAVE_APPLICATION_ERROR_MESSAGE: str = "Ошибка при сохранении заявки в базу данных"# noqa
     SAVE_USER_ERROR: str = "Ошибка при сохранении пользователя в базу данных"
+    SEND_BROADCAST_ERROR: str = "Не удалось отправить рассылку клиенту {user_id}: {error}"# noqa
+    SEND_DIGEST_ERROR: str = "Не удалось отправить сводку клиенту {user_id}: {error}"# noqa
+    SOFT_BLOCK_ERROR: str = "Ошибка при записи временной блокировки"
 
 
 bot_flow = BotFlow()
@@ -1,17 +1,75 @@
-import os
+import time
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
-from dotenv import load_dotenv
+from config import (
+    DATABASE_ASYNC_URL,
+    DATABASE_REPLICA_ASYNC_URLS,
+    REPLICA_MAX_LAG,
+)
+from logger import bot_logger
+from metrics import DB_READS, REPLICA_LAG, instrument_engine
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from telegram.ext import CallbackContext
 
-load_dotenv()
+import repository
+from models import User
+from replicas import ReplicaSet
 
-DATABASE_URL = os.getenv('DATABASE_ASYNC_URL')
-engine = create_async_engine(DATABASE_URL, echo=True)
-async_session_factory = (
-    sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False))
+WRITTEN_USERS_KEY = 'written_users'
+REPLICA_CHECK_ERROR = 'Не удалось проверить реплику {index}: {error}'
+PRIMARY_CHECK_ERROR = 'Не удалось получить позицию WAL основной БД: {error}'
+
+logger = bot_logger()
+
+
+class PrimarySession(Session):
+
+    """Сессия, запоминающая клиентов, чьи данные она изменила."""
+
+
+engine = create_async_engine(DATABASE_ASYNC_URL)
+instrument_engine(engine)
+replica_engines = [
+    create_async_engine(url) for url in DATABASE_REPLICA_ASYNC_URLS]
+for replica_engine in replica_engines:
+    instrument_engine(replica_engine)
+async_session_factory = sessionmaker(
+    bind=engine, class_=AsyncSession, sync_session_class=PrimarySession,
+    expire_on_commit=False,
+)
+replicas = ReplicaSet(len(replica_engines), REPLICA_MAX_LAG)
+user_writes: dict[str, float] = {}
+
+
+@event.listens_for(PrimarySession, 'after_flush')
+def collect_written_users(session: Session, flush_context: object) -> None:
+    """Собирает клиентов, чьи записи изменены при сохранении."""
+    users = session.info.setdefault(WRITTEN_USERS_KEY, set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        user_id = (instance.id if isinstance(instance, User)
+                   else getattr(instance, 'user_id', None))
+        if user_id is not None:
+            users.add(str(user_id))
+
+
+@event.listens_for(PrimarySession, 'after_commit')
+def remember_written_users(session: Session) -> None:
+    """Запоминает момент подтверждения записи для каждого клиента."""
+    users = session.info.pop(WRITTEN_USERS_KEY, None)
+    if users and replica_engines:
+        committed_at = time.monotonic()
+        for user_id in users:
+            user_writes[user_id] = committed_at
+
+
+@event.listens_for(PrimarySession, 'after_rollback')
+def forget_written_users(session: Session) -> None:
+    """Сбрасывает клиентов из отмененной транзакции."""
+    session.info.pop(WRITTEN_USERS_KEY, None)
 
 
 @asynccontextmanager
@@ -19,3 +77,53 @@ async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
     """Создает асинхронный контекстный менеджер для работы с сессией бд."""
     async with async_session_factory() as session:
         yield session
+
+
+@asynccontextmanager
+async def get_async_read_session(
+        user_id: Optional[str] = None,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Создает сессию только для чтения.
+
+    Сессия подключается к реплике, если ее отставание не больше
+    REPLICA_MAX_LAG и она уже получила последнюю запись клиента user_id,
+    иначе к основной БД.
+    """
+    index = replicas.choose(user_writes.get(user_id))
+    DB_READS.inc('primary' if index is None else 'replica')
+    bind = engine if index is None else replica_engines[index]
+    async with async_session_factory(bind=bind) as session:
+        yield session
+
+
+async def check_replicas() -> None:
+    """Обновляет отставание реплик по позициям WAL."""
+    checked_at = time.monotonic()
+    try:
+        async with get_async_db_session() as session:
+            position = await session.run_sync(repository.get_wal_position)
+    except (SQLAlchemyError, OSError) as error:
+        logger.error(PRIMARY_CHECK_ERROR.format(error=error))
+        return
+    replicas.add_primary_position(checked_at, position)
+    for index, replica_engine in enumerate(replica_engines):
+        try:
+            async with async_session_factory(bind=replica_engine) as session:
+                replay_position = await session.run_sync(
+                    repository.get_replay_position)
+        except (SQLAlchemyError, OSError) as error:
+            logger.error(REPLICA_CHECK_ERROR.format(index=index, error=error))
+            replay_position = None
+        replicas.update_replica(index, replay_position)
+        lag = replicas.lag(index)
+        REPLICA_LAG.set(round(lag, 3) if lag != float('inf') else -1,
+                        str(index))
+    expired = checked_at - REPLICA_MAX_LAG
+    for user_id in [user_id for user_id, written_at in user_writes.items()
+                    if written_at < expired]:
+        del user_writes[user_id]
+
+
+async def check_replicas_job(context: CallbackContext) -> None:
+    """Задача JobQueue для проверки отставания реплик."""
+    await check_replicas()
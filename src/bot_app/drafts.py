@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from constants import bot_flow
+from database import get_async_db_session
+from logger import bot_logger
+from metrics import SURVEY_DRAFTS_SAVED
+from sqlalchemy import delete
+from sqlalchemy.exc import SQLAlchemyError
+from survey import QuestionSet, SurveyState
+from telegram.ext import CallbackContext
+
+from models import ApplicationDraft
+
+logger = bot_logger()
+
+
+async def save_drafts(surveys: dict[int, SurveyState]) -> None:
+    """Сохраняет черновики анкет одним запросом INSERT ... ON CONFLICT."""
+    from sqlalchemy.dialects import postgresql, sqlite
+
+    updated_at = datetime.now(timezone.utc)
+    rows = [
+        {'user_id': str(user_id), 'data': survey.to_dict(),
+         'updated_at': updated_at}
+        for user_id, survey in surveys.items()
+        if survey.has_answers and not survey.completed
+    ]
+    if not rows:
+        return
+    async with get_async_db_session() as session:
+        dialect = session.bind.dialect.name
+        insert = (postgresql if dialect == 'postgresql' else sqlite).insert
+        statement = insert(ApplicationDraft)
+        await session.execute(statement.on_conflict_do_update(
+            index_elements=[ApplicationDraft.user_id],
+            set_={'data': statement.excluded.data,
+                  'updated_at': statement.excluded.updated_at},
+        ), rows)
+        await session.commit()
+    SURVEY_DRAFTS_SAVED.inc(amount=len(rows))
+
+
+async def load_draft(user_id: str,
+                     questions: QuestionSet) -> Optional[SurveyState]:
+    """Загружает черновик анкеты, если набор вопросов не изменился."""
+    async with get_async_db_session() as session:
+        draft = await session.get(ApplicationDraft, user_id)
+        if draft is None:
+            return None
+        return SurveyState.from_dict(draft.data, questions)
+
+
+class DraftWriter:
+
+    """Отложенная запись черновиков анкет.
+
+    Обработчики только отмечают измененную анкету в памяти, а запись в БД
+    выполняется периодической задачей: за один проход каждая анкета
+    сохраняется не более одного раза, сколько бы ответов ни было дано.
+
+    Перед удалением черновика нужно вызвать settle: запись, которая уже
+    выполняется, иначе может завершиться после удаления и вернуть
+    черновик клиенту, уже отправившему заявку.
+    """
+
+    def __init__(self) -> None:
+        """Создает пустую очередь изменений."""
+        self.pending: dict[int, SurveyState] = {}
+        self.in_flight: list[tuple[set[int], asyncio.Event]] = []
+
+    def mark(self, user_id: int, survey: SurveyState) -> None:
+        """Отмечает анкету для сохранения при следующей записи."""
+        self.pending[user_id] = survey
+
+    def cancel(self, user_id: int) -> None:
+        """Отменяет запись черновика, еще не сохраненного в БД."""
+        self.pending.pop(user_id, None)
+
+    async def settle(self, user_id: int) -> None:
+        """Отменяет запись черновика и дожидается уже начатой записи."""
+        self.cancel(user_id)
+        for users, saved in list(self.in_flight):
+            if user_id in users:
+                await saved.wait()
+        self.cancel(user_id)
+
+    async def discard(self, user_id: int) -> None:
+        """Отменяет запись черновика и удаляет сохраненный."""
+        await self.settle(user_id)
+        async with get_async_db_session() as session:
+            await session.execute(delete(ApplicationDraft).filter_by(
+                user_id=str(user_id)))
+            await session.commit()
+
+    async def flush(self) -> None:
+        """Сохраняет все отмеченные анкеты.
+
+        Если записать не удалось, анкеты возвращаются в очередь: при
+        недоступной БД драйвер бросает OSError или TimeoutError без
+        обертки SQLAlchemy. Прочие исключения, включая отмену задачи,
+        тоже возвращают анкеты и пробрасываются дальше.
+        """
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        flight = (set(pending), asyncio.Event())
+        self.in_flight.append(flight)
+        try:
+            await save_drafts(pending)
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+            logger.error(f'{bot_flow.SAVE_DRAFT_ERROR}: {e}')
+            self.restore(pending)
+        except BaseException:
+            self.restore(pending)
+            raise
+        finally:
+            self.in_flight.remove(flight)
+            flight[1].set()
+
+    def restore(self, pending: dict[int, SurveyState]) -> None:
+        """Возвращает несохраненные анкеты в очередь на запись.
+
+        Анкеты, отмеченные заново во время записи, новее и не заменяются.
+        """
+        for user_id, survey in pending.items():
+            self.pending.setdefault(user_id, survey)
+
+    async def flush_job(self, context: CallbackContext) -> None:
+        """Периодическая задача JobQueue для записи черновиков."""
+        await self.flush()
+
+
+draft_writer = DraftWriter()
@@ -1,17 +1,135 @@
+import copy
+import json
 import logging
+import queue
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 
-LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from config import (
+    LOG_BACKUP_COUNT,
+    LOG_DEBUG_SAMPLE_RATE,
+    LOG_FILE,
+    LOG_LEVEL,
+    LOG_MAX_BYTES,
+    SQL_LOG_LEVEL,
+)
 
+BOT_LOGGER_NAME = 'bot'
+CONTEXT_FIELDS = ('update_id', 'user_id', 'handler', 'duration')
 
-def bot_logger() -> logging.Logger:
-    """Функция с настройками логгера."""
-    log_file_path = 'logging_exception.log'
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.ERROR)
+log_context: ContextVar[Optional[dict]] = ContextVar(
+    'log_context', default=None,
+)
+
+
+class ContextFilter(logging.Filter):
+
+    """Добавляет к записи поля контекста текущего обновления."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Копирует поля контекста в запись, не перезаписывая явные."""
+        context = log_context.get()
+        if context:
+            for field, value in context.items():
+                if not hasattr(record, field):
+                    setattr(record, field, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+
+    """Пропускает только долю записей уровня DEBUG."""
+
+    def __init__(self, rate: float) -> None:
+        """Задает долю пропускаемых отладочных записей."""
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Отбрасывает часть отладочных записей."""
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+
+    """Форматирует запись в одну строку JSON."""
 
-    file_handler = logging.FileHandler(log_file_path)
-    formatter = logging.Formatter(LOG_FORMAT)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    def format(self, record: logging.LogRecord) -> str:
+        """Возвращает запись в формате JSON."""
+        data = {
+            'time': datetime.fromtimestamp(
+                record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = record.stack_info
+        return json.dumps(data, ensure_ascii=False, default=str)
 
-    return logger
+
+class StructuredQueueHandler(QueueHandler):
+
+    """Кладет записи в очередь, сохраняя трассировку отдельным полем.
+
+    QueueHandler.prepare дописывает трассировку исключения в текст
+    сообщения, из-за чего JsonFormatter не может вынести ее в поле
+    'exception'. Здесь сообщение форматируется без трассировки, а она
+    сохраняется в exc_text.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Готовит запись к передаче в поток записи логов."""
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def setup_logging(log_file: str = LOG_FILE) -> QueueListener:
+    """Настраивает неблокирующее логирование в файл log_file.
+
+    Обработчики логгеров только кладут записи в очередь, запись в файл
+    выполняет отдельный поток QueueListener. Возвращает запущенный
+    QueueListener, который нужно остановить при завершении работы.
+    """
+    log_queue = queue.SimpleQueue()
+    file_handler = RotatingFileHandler(
+        log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+        encoding='utf-8', delay=True,
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(LOG_DEBUG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    logging.getLogger('sqlalchemy.engine').setLevel(SQL_LOG_LEVEL)
+
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+    return listener
+
+
+def bot_logger() -> logging.Logger:
+    """Возвращает логгер бота."""
+    return logging.getLogger(BOT_LOGGER_NAME)
@@ -1,5 +1,41 @@
-from bot import BotHandler
-from config import BOT_TOKEN
+import asyncio
+import os
+from typing import Optional
+
+from bot import ApplicationManager, BotHandler
+from broadcasts import broadcast_sender
+from cache import blocked_users, listen_for_invalidation
+from config import (
+    BOT_TOKEN,
+    BOT_WORKERS,
+    BOT_WORKER_HOST,
+    BOT_WORKER_PORT,
+    DRAFT_SAVE_INTERVAL,
+    LOG_FILE,
+    METRICS_HOST,
+    METRICS_PORT,
+    NOTIFY_INTERVAL,
+    REPLICA_CHECK_INTERVAL,
+    SURVEY_SWEEP_INTERVAL,
+    THROTTLE_PRUNE_INTERVAL,
+)
+from database import check_replicas_job, replica_engines
+from drafts import draft_writer
+from logger import setup_logging
+from metrics import (
+    ACTIVE_SURVEYS,
+    USER_SESSIONS,
+    InstrumentedRequest,
+    start_metrics_server,
+)
+from notifications import send_digests_job
+from sharding import (
+    ROUTER_QUEUE_SIZE,
+    UpdateRouter,
+    run_sharded,
+    run_worker_application,
+)
+from survey import SURVEY_KEY
 from telegram import Update
 from telegram.ext import (
     Application as TelegramApplication,
@@ -8,13 +44,80 @@ from telegram.ext import (
     CallbackQueryHandler,
     CommandHandler,
     MessageHandler,
+    TypeHandler,
     filters,
 )
+from telegram.request import BaseRequest
+from throttling import throttler
+
+METRICS_PORT_KEY = 'metrics_port'
+
+
+async def post_init(application: TelegramApplication) -> None:
+    """Запускает сервер метрик и подписку на сброс кэшей."""
+    ACTIVE_SURVEYS.set_function(lambda: sum(
+        1 for data in application.user_data.values()
+        if (survey := data.get(SURVEY_KEY)) and not survey.completed
+    ))
+    USER_SESSIONS.set_function(lambda: len(application.user_data))
+    metrics_port = application.bot_data.get(METRICS_PORT_KEY, METRICS_PORT)
+    if metrics_port:
+        application.bot_data['metrics_server'] = await start_metrics_server(
+            METRICS_HOST, metrics_port)
+    application.bot_data['cache_listener'] = listen_for_invalidation()
+
 
+async def post_shutdown(application: TelegramApplication) -> None:
+    """Сохраняет отложенные черновики и останавливает фоновые службы."""
+    await draft_writer.flush()
+    listener = application.bot_data.pop('cache_listener', None)
+    if listener is not None:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+    server = application.bot_data.pop('metrics_server', None)
+    if server is not None:
+        server.close()
+        await server.wait_closed()
 
-def init_bot() -> TelegramApplication:
-    """Инициализирует и настраивает Telegram-бота."""
-    application = TelegramApplication.builder().token(BOT_TOKEN).build()
+
+def build_application(
+        request: Optional[BaseRequest] = None,
+) -> TelegramApplication:
+    """Создает Telegram-приложение и регистрирует обработчики.
+
+    Параметр request позволяет подменить HTTP-клиент Bot API,
+    например, для нагрузочного тестирования.
+    """
+    application = (
+        TelegramApplication.builder()
+        .token(BOT_TOKEN)
+        .request(request or InstrumentedRequest(connection_pool_size=256))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
+    application.job_queue.run_repeating(
+        ApplicationManager.sweep_idle_surveys,
+        interval=SURVEY_SWEEP_INTERVAL, first=SURVEY_SWEEP_INTERVAL,
+    )
+    application.job_queue.run_repeating(
+        draft_writer.flush_job,
+        interval=DRAFT_SAVE_INTERVAL, first=DRAFT_SAVE_INTERVAL,
+    )
+    application.job_queue.run_repeating(
+        throttler.prune_job,
+        interval=THROTTLE_PRUNE_INTERVAL, first=THROTTLE_PRUNE_INTERVAL,
+    )
+    application.job_queue.run_repeating(
+        blocked_users.prune_job,
+        interval=THROTTLE_PRUNE_INTERVAL, first=THROTTLE_PRUNE_INTERVAL,
+    )
+    if replica_engines:
+        application.job_queue.run_repeating(
+            check_replicas_job, interval=REPLICA_CHECK_INTERVAL, first=0,
+        )
+    application.add_handler(
+        TypeHandler(Update, throttler.handle_update), group=-1)
     application.add_handler(CommandHandler(
         "start", BotHandler.start))
     application.add_handler(
@@ -40,6 +143,11 @@ def init_bot() -> TelegramApplication:
                              pattern="confirm_answers"))
     application.add_handler(
         CallbackQueryHandler(BotHandler.edit_answers, pattern="edit_answers"))
+    application.add_handler(
+        CallbackQueryHandler(BotHandler.resume_draft, pattern="resume_draft"))
+    application.add_handler(
+        CallbackQueryHandler(BotHandler.restart_survey,
+                             pattern="restart_survey"))
     application.add_handler(
         CallbackQueryHandler(BotHandler.handle_edit_choice,
                              pattern=r"edit_\d+"))
@@ -51,8 +159,109 @@ def init_bot() -> TelegramApplication:
                              pattern="edit_profile"))
 
     application.add_error_handler(BotHandler.error_handler)
+    return application
+
+
+def schedule_notifications(application: TelegramApplication) -> None:
+    """Планирует отправку сводок об изменении статусов заявок и рассылок.
+
+    Задачи работают только в одном процессе: в основном приложении или,
+    при нескольких воркерах, в маршрутизаторе.
+    """
+    application.job_queue.run_repeating(
+        send_digests_job, interval=NOTIFY_INTERVAL, first=NOTIFY_INTERVAL,
+    )
+    application.job_queue.run_repeating(
+        broadcast_sender.send_job, interval=1, first=1,
+    )
+
+
+def worker_address(index: int) -> tuple[str, int]:
+    """Возвращает адрес, на котором воркер принимает обновления."""
+    return BOT_WORKER_HOST, BOT_WORKER_PORT + index
+
+
+def build_router_application(router: UpdateRouter) -> TelegramApplication:
+    """Создает приложение, получающее обновления из Telegram для воркеров.
+
+    Очередь обновлений ограничена, поэтому, пока воркеры заняты,
+    обновления остаются в Telegram, а не в памяти маршрутизатора.
+    Метрики маршрутизатора, в том числе сводок и рассылок, которые
+    отправляются из него, отдаются на порту METRICS_PORT.
+    """
+    async def start_router(application: TelegramApplication) -> None:
+        await router.start()
+        if METRICS_PORT:
+            application.bot_data['metrics_server'] = (
+                await start_metrics_server(METRICS_HOST, METRICS_PORT))
+
+    async def stop_router(application: TelegramApplication) -> None:
+        await router.stop()
+        server = application.bot_data.pop('metrics_server', None)
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    application = (
+        TelegramApplication.builder()
+        .token(BOT_TOKEN)
+        .request(InstrumentedRequest(connection_pool_size=256))
+        .update_queue(asyncio.Queue(maxsize=ROUTER_QUEUE_SIZE))
+        .post_init(start_router)
+        .post_shutdown(stop_router)
+        .build()
+    )
+    application.add_handler(TypeHandler(Update, router.forward))
+    return application
+
+
+def worker_log_file(index: int) -> str:
+    """Возвращает файл лога воркера, например app.worker1.log."""
+    root, extension = os.path.splitext(LOG_FILE)
+    return f'{root}.worker{index}{extension}'
+
+
+def run_worker(index: int) -> None:
+    """Запускает воркер, обрабатывающий обновления своей доли клиентов.
+
+    Воркер пишет лог в свой файл, чтобы процессы не ротировали один
+    файл одновременно. Сервер метрик воркера слушает порт
+    METRICS_PORT + 1 + index (METRICS_PORT занят маршрутизатором), а
+    общий лимит частоты делится между воркерами поровну.
+    """
+    listener = setup_logging(worker_log_file(index))
+    try:
+        application = build_application()
+        if METRICS_PORT:
+            application.bot_data[METRICS_PORT_KEY] = METRICS_PORT + 1 + index
+        throttler.share_global_limit(BOT_WORKERS)
+        asyncio.run(run_worker_application(application,
+                                           worker_address(index)))
+    finally:
+        listener.stop()
+
+
+def init_bot() -> None:
+    """Инициализирует и запускает Telegram-бота.
+
+    При BOT_WORKERS больше 1 обработчики работают в отдельных процессах,
+    а текущий процесс только получает обновления и распределяет их.
+    """
+    if BOT_WORKERS > 1:
+        router = UpdateRouter(
+            [worker_address(index) for index in range(BOT_WORKERS)])
+        router_application = build_router_application(router)
+        schedule_notifications(router_application)
+        run_sharded(router_application, BOT_WORKERS, run_worker)
+        return
+    application = build_application()
+    schedule_notifications(application)
     application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 if __name__ == '__main__':
-    init_bot()
+    listener = setup_logging()
+    try:
+        init_bot()
+    finally:
+        listener.stop()
@@ -0,0 +1,406 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Awaitable, Callable, Optional
+
+from logger import bot_logger, log_context
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.engine.interfaces import DBAPICursor
+from sqlalchemy.ext.asyncio import AsyncEngine
+from telegram import Update
+from telegram.request import HTTPXRequest
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+HANDLER_FINISHED = 'Обработка обновления завершена'
+
+logger = bot_logger()
+
+
+class Metric(ABC):
+
+    """Базовый класс метрики в формате Prometheus."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: tuple[str, ...] = ()) -> None:
+        """Задает имя, описание и названия меток метрики."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def format_labels(self, labels: tuple[str, ...],
+                      extra: str = '') -> str:
+        """Формирует строку меток для вывода."""
+        pairs = [f'{name}="{value}"'
+                 for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        """Возвращает строки значений метрики."""
+
+    def render(self) -> str:
+        """Возвращает метрику в текстовом формате Prometheus."""
+        header = (f'# HELP {self.name} {self.documentation}\n'
+                  f'# TYPE {self.name} {self.kind}\n')
+        return header + ''.join(line + '\n' for line in self.samples())
+
+
+class Counter(Metric):
+
+    """Монотонно растущий счетчик."""
+
+    kind = 'counter'
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Создает пустой счетчик."""
+        super().__init__(*args, **kwargs)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Увеличивает значение счетчика."""
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> list[str]:
+        """Возвращает строки значений счетчика."""
+        return [f'{self.name}{self.format_labels(labels)} {value}'
+                for labels, value in self.values.items()]
+
+
+class Gauge(Metric):
+
+    """Метрика с произвольным текущим значением."""
+
+    kind = 'gauge'
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Создает метрику без значения."""
+        super().__init__(*args, **kwargs)
+        self.values: dict[tuple[str, ...], float] = {}
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, *labels: str) -> None:
+        """Устанавливает значение метрики."""
+        self.values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Увеличивает значение метрики."""
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Задает функцию, вычисляющую значение в момент сбора метрик."""
+        self.function = function
+
+    def samples(self) -> list[str]:
+        """Возвращает строки значений метрики."""
+        if self.function is not None:
+            return [f'{self.name} {self.function()}']
+        return [f'{self.name}{self.format_labels(labels)} {value}'
+                for labels, value in self.values.items()]
+
+
+class Histogram(Metric):
+
+    """Гистограмма распределения значений по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, *args: Any,
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS,
+                 **kwargs: Any) -> None:
+        """Создает пустую гистограмму с заданными границами корзин."""
+        super().__init__(*args, **kwargs)
+        self.buckets = buckets
+        self.values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Добавляет наблюдение в гистограмму."""
+        state = self.values.get(labels)
+        if state is None:
+            state = self.values[labels] = [
+                [0] * (len(self.buckets) + 1), 0.0, 0,
+            ]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def samples(self) -> list[str]:
+        """Возвращает строки корзин, суммы и количества наблюдений."""
+        lines = []
+        for labels, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(
+                    (*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                bucket_labels = self.format_labels(labels, f'le="{bound}"')
+                lines.append(
+                    f'{self.name}_bucket{bucket_labels} {cumulative}')
+            lines.append(f'{self.name}_sum{self.format_labels(labels)} '
+                         f'{total}')
+            lines.append(f'{self.name}_count{self.format_labels(labels)} '
+                         f'{count}')
+        return lines
+
+
+class Registry:
+
+    """Набор метрик приложения."""
+
+    def __init__(self) -> None:
+        """Создает пустой набор метрик."""
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Добавляет метрику в набор."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        return ''.join(metric.render() for metric in self.metrics)
+
+
+registry = Registry()
+
+HANDLER_LATENCY = registry.register(Histogram(
+    'bot_handler_duration_seconds',
+    'Время выполнения обработчиков бота.', ('handler',),
+))
+HANDLER_ERRORS = registry.register(Counter(
+    'bot_handler_errors_total',
+    'Количество исключений в обработчиках бота.', ('handler',),
+))
+UPDATE_ERRORS = registry.register(Counter(
+    'bot_update_errors_total',
+    'Количество обновлений, завершившихся ошибкой.', ('error',),
+))
+DB_QUERY_LATENCY = registry.register(Histogram(
+    'bot_db_query_duration_seconds', 'Время выполнения SQL-запросов.',
+))
+DB_QUERIES_PER_UPDATE = registry.register(Histogram(
+    'bot_db_queries_per_update',
+    'Количество SQL-запросов на одно обновление.', ('handler',),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+DB_TIME_PER_UPDATE = registry.register(Histogram(
+    'bot_db_time_per_update_seconds',
+    'Суммарное время SQL-запросов на одно обновление.', ('handler',),
+))
+TELEGRAM_LATENCY = registry.register(Histogram(
+    'bot_telegram_request_duration_seconds',
+    'Время выполнения запросов к Telegram Bot API.', ('method',),
+))
+TELEGRAM_ERRORS = registry.register(Counter(
+    'bot_telegram_request_errors_total',
+    'Количество неудачных запросов к Telegram Bot API.', ('method',),
+))
+ACTIVE_SURVEYS = registry.register(Gauge(
+    'bot_active_surveys', 'Количество незавершенных опросов.',
+))
+SURVEY_TRANSITIONS = registry.register(Counter(
+    'bot_survey_transitions_total',
+    'Количество переходов анкеты между шагами.', ('from', 'to'),
+))
+SURVEY_EXPIRED = registry.register(Counter(
+    'bot_survey_expired_total',
+    'Количество анкет, сброшенных по таймауту шага.', ('step',),
+))
+SURVEY_RECLAIMED_BYTES = registry.register(Counter(
+    'bot_survey_reclaimed_bytes_total',
+    'Оценка памяти, освобожденной при сбросе просроченных анкет.',
+))
+SURVEY_DRAFTS_SAVED = registry.register(Counter(
+    'bot_survey_drafts_saved_total',
+    'Количество черновиков, сохраненных перед сбросом анкет.',
+))
+THROTTLED_UPDATES = registry.register(Counter(
+    'bot_throttled_updates_total',
+    'Количество обновлений, отложенных или отброшенных ограничителем.',
+    ('scope', 'action'),
+))
+SOFT_BLOCKS = registry.register(Counter(
+    'bot_soft_blocks_total',
+    'Количество временных блокировок за превышение лимита сообщений.',
+))
+CACHE_REQUESTS = registry.register(Counter(
+    'bot_cache_requests_total',
+    'Количество обращений к кэшам бота.', ('cache', 'result'),
+))
+BLOCK_NOTICES = registry.register(Counter(
+    'bot_block_notices_total',
+    'Количество сообщений заблокированных клиентов.', ('action',),
+))
+USER_SESSIONS = registry.register(Gauge(
+    'bot_user_sessions',
+    'Количество пользователей с данными в памяти бота.',
+))
+DB_READS = registry.register(Counter(
+    'bot_db_reads_total',
+    'Количество сессий чтения по серверу БД.', ('target',),
+))
+REPLICA_LAG = registry.register(Gauge(
+    'bot_db_replica_lag_seconds',
+    'Отставание реплики БД; -1, если реплика недоступна.', ('replica',),
+))
+STATUS_CHANGES = registry.register(Counter(
+    'bot_status_changes_total',
+    'Количество изменений статусов заявок, обработанных для уведомлений.',
+))
+STATUS_DIGESTS = registry.register(Counter(
+    'bot_status_digests_total',
+    'Количество сводок об изменении статусов по результату.', ('result',),
+))
+BROADCAST_MESSAGES = registry.register(Counter(
+    'bot_broadcast_messages_total',
+    'Количество сообщений рассылок по результату доставки.', ('result',),
+))
+
+
+class UpdateStats:
+
+    """Статистика SQL-запросов в рамках одного обновления."""
+
+    __slots__ = ('queries', 'seconds')
+
+    def __init__(self) -> None:
+        """Создает пустую статистику."""
+        self.queries = 0
+        self.seconds = 0.0
+
+
+current_update_stats: ContextVar[Optional[UpdateStats]] = ContextVar(
+    'current_update_stats', default=None,
+)
+
+
+def track_handler(
+        handler: Callable[..., Awaitable[Any]],
+) -> Callable[..., Awaitable[Any]]:
+    """Декоратор, измеряющий время выполнения обработчика.
+
+    Для внешнего обработчика обновления дополнительно учитывает количество
+    и суммарное время SQL-запросов и задает контекст для записей лога.
+    """
+    name = handler.__name__
+
+    @wraps(handler)
+    async def wrapper(*args: Any, **kwargs: Any) -> object:
+        stats = None
+        token = context_token = None
+        if current_update_stats.get() is None:
+            stats = UpdateStats()
+            token = current_update_stats.set(stats)
+            update = args[0] if args else None
+            context_token = log_context.set({
+                'handler': name,
+                'update_id': getattr(update, 'update_id', None),
+                'user_id': (update.effective_user.id
+                            if isinstance(update, Update)
+                            and update.effective_user else None),
+            })
+        started = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            HANDLER_LATENCY.observe(duration, name)
+            if token is not None:
+                current_update_stats.reset(token)
+                DB_QUERIES_PER_UPDATE.observe(stats.queries, name)
+                DB_TIME_PER_UPDATE.observe(stats.seconds, name)
+                logger.debug(HANDLER_FINISHED,
+                             extra={'duration': round(duration, 6)})
+                log_context.reset(context_token)
+
+    return wrapper
+
+
+def before_cursor_execute(
+        conn: Connection, cursor: DBAPICursor, statement: str,
+        parameters: object,
+        context: ExecutionContext, executemany: bool,
+) -> None:
+    """Запоминает время начала SQL-запроса."""
+    context._query_started = time.perf_counter()
+
+
+def after_cursor_execute(
+        conn: Connection, cursor: DBAPICursor, statement: str,
+        parameters: object,
+        context: ExecutionContext, executemany: bool,
+) -> None:
+    """Учитывает время выполнения SQL-запроса."""
+    duration = time.perf_counter() - context._query_started
+    DB_QUERY_LATENCY.observe(duration)
+    stats = current_update_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += duration
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подключает сбор метрик SQL-запросов к движку."""
+    event.listen(engine.sync_engine, 'before_cursor_execute',
+                 before_cursor_execute)
+    event.listen(engine.sync_engine, 'after_cursor_execute',
+                 after_cursor_execute)
+
+
+class InstrumentedRequest(HTTPXRequest):
+
+    """HTTP-клиент Telegram Bot API с замером времени запросов."""
+
+    async def do_request(self, url: str, *args: Any,
+                         **kwargs: Any) -> tuple[int, bytes]:
+        """Выполняет запрос и учитывает его время по методу API."""
+        method = url.rsplit('/', 1)[-1]
+        started = time.perf_counter()
+        try:
+            return await super().do_request(url, *args, **kwargs)
+        except Exception:
+            TELEGRAM_ERRORS.inc(method)
+            raise
+        finally:
+            TELEGRAM_LATENCY.observe(time.perf_counter() - started, method)
+
+
+async def handle_metrics_request(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+) -> None:
+    """Отдает метрики по HTTP-запросу GET /metrics."""
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        parts = request_line.split()
+        if len(parts) > 1 and parts[1] == b'/metrics':
+            status, body = '200 OK', registry.render().encode()
+        else:
+            status, body = '404 Not Found', b''
+        writer.write(
+            f'HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n'
+            f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'
+            .encode() + body,
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: int) -> asyncio.Server:
+    """Запускает HTTP-сервер метрик в текущем цикле событий."""
+    return await asyncio.start_server(handle_metrics_request, host, port)
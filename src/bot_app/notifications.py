@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta, timezone
+
+from config import NOTIFY_BATCH_USERS, NOTIFY_MAX_AGE, NOTIFY_WINDOW
+from constants import bot_flow
+from database import get_async_db_session
+from logger import bot_logger
+from metrics import STATUS_CHANGES, STATUS_DIGESTS
+from sqlalchemy.exc import SQLAlchemyError
+from telegram import Bot
+from telegram.error import (
+    BadRequest,
+    Forbidden,
+    RetryAfter,
+    TelegramError,
+)
+from telegram.ext import CallbackContext
+
+import repository
+from models import StatusNotification
+
+logger = bot_logger()
+
+
+def collapse(changes: list[StatusNotification]) -> list[tuple[int, str]]:
+    """Сворачивает изменения статусов заявок клиента.
+
+    Для каждой заявки остается итоговый статус, промежуточные
+    пропускаются. Заявки, вернувшиеся в исходный статус, не попадают в
+    результат.
+    """
+    first: dict[int, str] = {}
+    last: dict[int, str] = {}
+    for change in changes:
+        first.setdefault(change.application_id, change.old_status)
+        last[change.application_id] = change.new_status
+    return [(application_id, status)
+            for application_id, status in last.items()
+            if status != first[application_id]]
+
+
+def waiting_since(changes: list[StatusNotification]) -> datetime:
+    """Возвращает время самого раннего изменения в UTC.
+
+    SQLite возвращает время без часового пояса, оно записано в UTC.
+    """
+    created_at = min(change.created_at for change in changes)
+    if created_at.tzinfo is None:
+        return created_at.replace(tzinfo=timezone.utc)
+    return created_at
+
+
+def build_digest(statuses: list[tuple[int, str]]) -> str:
+    """Формирует текст сводки по итоговым статусам заявок."""
+    if len(statuses) == 1:
+        application_id, status = statuses[0]
+        return bot_flow.STATUS_CHANGED.format(
+            application_id=application_id, status=status)
+    return '\n'.join([bot_flow.STATUSES_CHANGED_HEADER, *(
+        bot_flow.STATUS_LINE.format(application_id=application_id,
+                                    status=status)
+        for application_id, status in statuses
+    )])
+
+
+async def send_digest(bot: Bot, user_id: str,
+                      changes: list[StatusNotification]) -> bool:
+    """Отправляет клиенту сводку и сообщает, обработаны ли изменения.
+
+    Клиент, заблокировавший бота или удаленный чат (Forbidden или
+    BadRequest), считается недоступным. Изменения остаются в очереди,
+    только если Telegram временно не принял сообщение и самое раннее из
+    них ждет не дольше NOTIFY_MAX_AGE секунд, чтобы такие клиенты не
+    занимали начало очереди бесконечно.
+    """
+    statuses = collapse(changes)
+    if not statuses:
+        STATUS_DIGESTS.inc('collapsed')
+        return True
+    try:
+        await bot.send_message(chat_id=user_id, text=build_digest(statuses))
+    except (Forbidden, BadRequest) as error:
+        logger.info(bot_flow.SEND_DIGEST_ERROR.format(user_id=user_id,
+                                                      error=error))
+        STATUS_DIGESTS.inc('undeliverable')
+        return True
+    except TelegramError as error:
+        logger.error(bot_flow.SEND_DIGEST_ERROR.format(user_id=user_id,
+                                                       error=error))
+        if isinstance(error, RetryAfter):
+            STATUS_DIGESTS.inc('failed')
+            raise
+        expires = datetime.now(timezone.utc) - timedelta(
+            seconds=NOTIFY_MAX_AGE)
+        if waiting_since(changes) < expires:
+            STATUS_DIGESTS.inc('expired')
+            return True
+        STATUS_DIGESTS.inc('failed')
+        return False
+    STATUS_DIGESTS.inc('sent')
+    return True
+
+
+async def send_digests(bot: Bot, window: float = NOTIFY_WINDOW,
+                       users: int = NOTIFY_BATCH_USERS) -> int:
+    """Отправляет сводки клиентам, чьи изменения ждут дольше window секунд.
+
+    Все изменения статусов заявок клиента, накопленные к этому моменту,
+    уходят одним сообщением. Возвращает число обработанных изменений.
+    """
+    created_before = datetime.now(timezone.utc) - timedelta(seconds=window)
+    async with get_async_db_session() as session:
+        changes = await session.run_sync(
+            repository.get_due_notifications, created_before, users)
+    by_user: dict[str, list[StatusNotification]] = {}
+    for change in changes:
+        by_user.setdefault(change.user_id, []).append(change)
+    done: list[int] = []
+    try:
+        for user_id, user_changes in by_user.items():
+            try:
+                if not await send_digest(bot, user_id, user_changes):
+                    continue
+            except RetryAfter:
+                break
+            done.extend(change.id for change in user_changes)
+    finally:
+        if done:
+            async with get_async_db_session() as session:
+                await session.run_sync(repository.delete_notifications, done)
+                await session.commit()
+            STATUS_CHANGES.inc(amount=len(done))
+    return len(done)
+
+
+async def send_digests_job(context: CallbackContext) -> None:
+    """Задача JobQueue для отправки сводок об изменении статусов."""
+    try:
+        await send_digests(context.bot)
+    except SQLAlchemyError as e:
+        logger.error(f'{bot_flow.DB_QUERY_ERROR_MESSAGE}: {e}')
@@ -0,0 +1,265 @@
+import asyncio
+import bisect
+import hashlib
+import json
+import multiprocessing
+import signal
+from typing import Callable, Optional
+
+from logger import bot_logger
+from telegram import Update
+from telegram.ext import Application as TelegramApplication
+from telegram.ext import CallbackContext
+
+RING_REPLICAS = 128
+RECONNECT_DELAY = 1.0
+STOP_TIMEOUT = 10.0
+MAX_UPDATE_SIZE = 1024 * 1024
+ROUTER_QUEUE_SIZE = 1000
+WORKER_CHECK_INTERVAL = 5.0
+SEND_ERROR_MESSAGE = 'Не удалось передать обновления воркеру {index}: {error}'
+WORKER_RESTART_MESSAGE = 'Воркер {index} завершился с кодом {code}, перезапуск'
+
+logger = bot_logger()
+
+Address = tuple[str, int]
+
+
+def ring_hash(key: str) -> int:
+    """Возвращает позицию ключа на кольце хеширования."""
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+
+    """Кольцо консистентного хеширования пользователей по воркерам.
+
+    Каждый воркер занимает на кольце RING_REPLICAS точек, поэтому
+    пользователи распределяются почти поровну, а при изменении числа
+    воркеров к другому воркеру переходит лишь доля пользователей.
+    """
+
+    def __init__(self, nodes: int, replicas: int = RING_REPLICAS) -> None:
+        """Размещает на кольце точки всех воркеров."""
+        points = sorted(
+            (ring_hash(f'{node}:{replica}'), node)
+            for node in range(nodes) for replica in range(replicas)
+        )
+        self.hashes = [point for point, _ in points]
+        self.nodes = [node for _, node in points]
+
+    def node(self, key: int) -> int:
+        """Возвращает номер воркера, за которым закреплен ключ."""
+        index = bisect.bisect(self.hashes, ring_hash(str(key)))
+        return self.nodes[index % len(self.nodes)]
+
+
+def routing_key(update: Update) -> int:
+    """Возвращает ключ маршрутизации обновления.
+
+    Обновления без пользователя и чата распределяются по update_id.
+    """
+    if update.effective_user is not None:
+        return update.effective_user.id
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    return update.update_id
+
+
+class UpdateRouter:
+
+    """Пересылает обновления воркерам по консистентному хешу.
+
+    Все обновления пользователя попадают к одному воркеру и передаются
+    ему по одному соединению в порядке получения, поэтому состояние
+    анкеты в context.user_data остается в памяти этого воркера.
+
+    Очередь каждого воркера ограничена ROUTER_QUEUE_SIZE обновлениями.
+    Если воркер не успевает их принимать, маршрутизатор ждет места в
+    очереди и перестает забирать обновления из Telegram, а не копит их
+    в памяти.
+    """
+
+    def __init__(self, addresses: list[Address]) -> None:
+        """Задает адреса воркеров в порядке их номеров."""
+        self.addresses = addresses
+        self.ring = HashRing(len(addresses))
+        self.queues: list[asyncio.Queue] = []
+        self.tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Запускает отправку обновлений воркерам."""
+        self.queues = [asyncio.Queue(maxsize=ROUTER_QUEUE_SIZE)
+                       for _ in self.addresses]
+        self.tasks = [asyncio.create_task(self.send(index))
+                      for index in range(len(self.addresses))]
+
+    async def stop(self) -> None:
+        """Дожидается отправки накопленных обновлений и останавливается.
+
+        Если воркер недоступен, ожидание ограничено STOP_TIMEOUT секунд.
+        """
+        if self.queues:
+            await asyncio.wait(
+                [asyncio.create_task(queue.join()) for queue in self.queues],
+                timeout=STOP_TIMEOUT,
+            )
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def route(self, update: Update) -> None:
+        """Ставит обновление в очередь воркера пользователя.
+
+        Ждет, если очередь воркера заполнена.
+        """
+        index = self.ring.node(routing_key(update))
+        await self.queues[index].put(update.to_json().encode() + b'\n')
+
+    async def forward(self, update: Update,
+                      context: CallbackContext) -> None:
+        """Обработчик приложения-маршрутизатора."""
+        await self.route(update)
+
+    async def send(self, index: int) -> None:
+        """Отправляет обновления из очереди воркеру.
+
+        Накопившиеся обновления отправляются пачкой. При ошибке
+        соединение открывается заново, а пачка отправляется повторно.
+        """
+        queue = self.queues[index]
+        writer: Optional[asyncio.StreamWriter] = None
+        try:
+            while True:
+                batch = [await queue.get()]
+                while not queue.empty():
+                    batch.append(queue.get_nowait())
+                while True:
+                    try:
+                        if writer is None:
+                            _, writer = await asyncio.open_connection(
+                                *self.addresses[index])
+                        writer.writelines(batch)
+                        await writer.drain()
+                        break
+                    except OSError as error:
+                        logger.error(SEND_ERROR_MESSAGE.format(
+                            index=index, error=error))
+                        writer = None
+                        await asyncio.sleep(RECONNECT_DELAY)
+                for _ in batch:
+                    queue.task_done()
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+async def serve_updates(application: TelegramApplication,
+                        address: Address) -> asyncio.Server:
+    """Принимает обновления от маршрутизатора в очередь приложения."""
+    async def receive(reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        try:
+            async for line in reader:
+                await application.update_queue.put(
+                    Update.de_json(json.loads(line), application.bot))
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(receive, *address,
+                                      limit=MAX_UPDATE_SIZE)
+
+
+async def run_worker_application(application: TelegramApplication,
+                                 address: Address) -> None:
+    """Обрабатывает обновления от маршрутизатора до SIGINT или SIGTERM.
+
+    Повторяет жизненный цикл run_polling, но вместо получения
+    обновлений из Telegram принимает их по адресу address.
+    """
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopped.set)
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    server = await serve_updates(application, address)
+    try:
+        await stopped.wait()
+    finally:
+        server.close()
+        await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+
+class WorkerSupervisor:
+
+    """Процессы воркеров с перезапуском завершившихся.
+
+    Процессы создаются методом spawn и не наследуют цикл событий и
+    соединения с БД. Раз в WORKER_CHECK_INTERVAL секунд завершившиеся
+    воркеры запускаются заново с тем же номером, а обновления для них
+    ждут в очереди маршрутизатора.
+    """
+
+    def __init__(self, workers: int,
+                 run_worker: Callable[[int], None]) -> None:
+        """Задает число воркеров и функцию запуска воркера по номеру."""
+        self.context = multiprocessing.get_context('spawn')
+        self.run_worker = run_worker
+        self.processes = [self.spawn(index) for index in range(workers)]
+
+    def spawn(self, index: int) -> multiprocessing.Process:
+        """Запускает процесс воркера."""
+        process = self.context.Process(target=self.run_worker,
+                                       args=(index,),
+                                       name=f'bot-worker-{index}')
+        process.start()
+        return process
+
+    def check(self) -> None:
+        """Перезапускает завершившиеся воркеры."""
+        for index, process in enumerate(self.processes):
+            if process.is_alive():
+                continue
+            logger.error(WORKER_RESTART_MESSAGE.format(
+                index=index, code=process.exitcode))
+            process.close()
+            self.processes[index] = self.spawn(index)
+
+    async def check_job(self, context: CallbackContext) -> None:
+        """Задача JobQueue для проверки воркеров."""
+        self.check()
+
+    def stop(self) -> None:
+        """Отправляет воркерам SIGTERM и ждет их завершения."""
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+
+
+def run_sharded(router_application: TelegramApplication, workers: int,
+                run_worker: Callable[[int], None]) -> None:
+    """Запускает воркеры в отдельных процессах и маршрутизатор в текущем.
+
+    Воркеры проверяются задачей JobQueue маршрутизатора и
+    перезапускаются после падения. При остановке маршрутизатора воркеры
+    получают SIGTERM и обрабатывают уже принятые обновления.
+    """
+    supervisor = WorkerSupervisor(workers, run_worker)
+    router_application.job_queue.run_repeating(
+        supervisor.check_job,
+        interval=WORKER_CHECK_INTERVAL, first=WORKER_CHECK_INTERVAL,
+    )
+    try:
+        router_application.run_polling(allowed_updates=Update.ALL_TYPES)
+    finally:
+        supervisor.stop()
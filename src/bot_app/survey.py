@@ -0,0 +1,221 @@
+import sys
+import time
+import zlib
+from enum import IntEnum
+from typing import Iterable, Iterator, MutableMapping, Optional
+
+from config import (
+    SURVEY_ANSWER_TIMEOUT,
+    SURVEY_CONFIRM_TIMEOUT,
+    SURVEY_CONTACT_TIMEOUT,
+)
+from metrics import SURVEY_EXPIRED, SURVEY_RECLAIMED_BYTES, SURVEY_TRANSITIONS
+from telegram.ext import CallbackContext
+from validation import DEFAULT_RULE, AnswerRule
+
+SURVEY_KEY = 'survey'
+
+
+class SurveyStep(IntEnum):
+
+    """Шаг анкеты, определяющий обработчик следующего сообщения."""
+
+    ANSWERING = 0
+    CONFIRMING = 1
+    SELECTING_EDIT = 2
+    EDITING = 3
+    CONTACT = 4
+    COMPLETED = 5
+    RESUMING = 6
+
+
+STEP_TIMEOUTS: dict[SurveyStep, Optional[int]] = {
+    SurveyStep.ANSWERING: SURVEY_ANSWER_TIMEOUT,
+    SurveyStep.CONFIRMING: SURVEY_CONFIRM_TIMEOUT,
+    SurveyStep.SELECTING_EDIT: SURVEY_CONFIRM_TIMEOUT,
+    SurveyStep.EDITING: SURVEY_CONFIRM_TIMEOUT,
+    SurveyStep.CONTACT: SURVEY_CONTACT_TIMEOUT,
+    SurveyStep.COMPLETED: SURVEY_CONFIRM_TIMEOUT,
+    SurveyStep.RESUMING: SURVEY_CONFIRM_TIMEOUT,
+}
+
+
+class QuestionSet:
+
+    """Неизменяемый набор вопросов анкеты, общий для всех пользователей.
+
+    Версия вычисляется по номерам и текстам вопросов, поэтому одинаковые
+    наборы, полученные из БД в разное время, имеют одну версию. Изменение
+    правил проверки ответов версию не меняет.
+    """
+
+    __slots__ = ('version', 'numbers', 'texts', 'rules')
+
+    def __init__(self, questions: Iterable[tuple[int, str]],
+                 rules: Optional[Iterable[AnswerRule]] = None) -> None:
+        """Создает набор из пар (номер вопроса, текст вопроса)."""
+        items = tuple(questions)
+        self.numbers = tuple(number for number, _ in items)
+        self.texts = tuple(text for _, text in items)
+        self.rules = (tuple(rules) if rules is not None
+                      else (DEFAULT_RULE,) * len(items))
+        self.version = zlib.crc32(repr(items).encode())
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __iter__(self) -> Iterator[tuple[int, str]]:
+        return zip(self.numbers, self.texts)
+
+    def index_of(self, number: int) -> Optional[int]:
+        """Возвращает позицию вопроса по его номеру."""
+        try:
+            return self.numbers.index(number)
+        except ValueError:
+            return None
+
+
+_question_sets: dict[tuple, QuestionSet] = {}
+
+
+def intern_questions(
+        questions: Iterable[tuple[int, str]],
+        rules: Optional[Iterable[AnswerRule]] = None,
+) -> QuestionSet:
+    """Возвращает общий экземпляр набора вопросов с таким содержимым."""
+    question_set = QuestionSet(questions, rules)
+    return _question_sets.setdefault(
+        (question_set.version, question_set.rules), question_set)
+
+
+class SurveyState:
+
+    """Состояние незавершенной анкеты пользователя."""
+
+    __slots__ = (
+        'questions', 'answers', 'current', 'step', 'editing_question',
+        'updated_at',
+    )
+
+    def __init__(self, questions: QuestionSet) -> None:
+        """Создает пустую анкету по набору вопросов."""
+        self.questions = questions
+        self.answers: list[Optional[str]] = [None] * len(questions)
+        self.current = 0
+        self.step = SurveyStep.ANSWERING
+        self.editing_question: Optional[int] = None
+        self.updated_at = time.time()
+
+    @property
+    def completed(self) -> bool:
+        """Проверяет, сохранена ли заявка по анкете."""
+        return self.step is SurveyStep.COMPLETED
+
+    def move(self, step: SurveyStep) -> None:
+        """Переводит анкету на другой шаг."""
+        if step is not self.step:
+            SURVEY_TRANSITIONS.inc(self.step.name.lower(), step.name.lower())
+            self.step = step
+        self.updated_at = time.time()
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """Проверяет, истек ли таймаут текущего шага."""
+        timeout = STEP_TIMEOUTS[self.step]
+        if timeout is None:
+            return False
+        return (now or time.time()) - self.updated_at > timeout
+
+    def memory_size(self) -> int:
+        """Оценивает память, занятую анкетой, без общего набора вопросов."""
+        return (sys.getsizeof(self) + sys.getsizeof(self.answers)
+                + sum(sys.getsizeof(answer) for answer in self.answers
+                      if answer is not None))
+
+    @property
+    def has_answers(self) -> bool:
+        """Проверяет, дан ли хотя бы один ответ."""
+        return self.current > 0
+
+    def current_question(self) -> Optional[str]:
+        """Возвращает текст текущего вопроса или None после последнего."""
+        if self.current < len(self.questions):
+            return self.questions.texts[self.current]
+        return None
+
+    def current_rule(self) -> AnswerRule:
+        """Возвращает правило проверки для текущего вопроса."""
+        index = self.current
+        if self.editing_question is not None:
+            index = self.questions.index_of(self.editing_question)
+        if index is None or index >= len(self.questions):
+            return DEFAULT_RULE
+        return self.questions.rules[index]
+
+    def answer(self, text: str) -> None:
+        """Записывает ответ на текущий вопрос и переходит к следующему."""
+        self.answers[self.current] = text
+        self.current += 1
+        self.updated_at = time.time()
+
+    def edit_answer(self, text: str) -> None:
+        """Заменяет ответ на редактируемый вопрос."""
+        index = self.questions.index_of(self.editing_question)
+        self.editing_question = None
+        if index is not None:
+            self.answers[index] = text
+
+    def answers_text(self, answer_label: str) -> str:
+        """Формирует текст заявки из вопросов и ответов."""
+        return '\n'.join(
+            f'{number}. {question}\n{answer_label}: {answer}\n'
+            for (number, question), answer
+            in zip(self.questions, self.answers[:self.current])
+        )
+
+    def to_dict(self) -> dict:
+        """Возвращает компактное представление для сохранения."""
+        return {
+            'v': self.questions.version,
+            'a': self.answers[:self.current],
+            's': int(self.step),
+            'e': self.editing_question,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict,
+                  questions: QuestionSet) -> Optional['SurveyState']:
+        """Восстанавливает анкету, если набор вопросов не изменился."""
+        if data.get('v') != questions.version:
+            return None
+        state = cls(questions)
+        answers = data.get('a', [])[:len(questions)]
+        state.answers[:len(answers)] = answers
+        state.current = len(answers)
+        state.step = SurveyStep(data.get('s', SurveyStep.ANSWERING))
+        state.editing_question = data.get('e')
+        return state
+
+
+def get_survey(context: CallbackContext) -> Optional[SurveyState]:
+    """Возвращает анкету пользователя, если она начата."""
+    return context.user_data.get(SURVEY_KEY)
+
+
+def expire_surveys(
+        user_data: MutableMapping[int, dict],
+        now: Optional[float] = None,
+) -> dict[int, SurveyState]:
+    """Удаляет из данных пользователей анкеты с истекшим таймаутом шага.
+
+    Возвращает удаленные анкеты по идентификаторам пользователей.
+    """
+    now = now or time.time()
+    expired = {
+        user_id: data[SURVEY_KEY] for user_id, data in user_data.items()
+        if SURVEY_KEY in data and data[SURVEY_KEY].is_expired(now)
+    }
+    for user_id, survey in expired.items():
+        del user_data[user_id][SURVEY_KEY]
+        SURVEY_EXPIRED.inc(survey.step.name.lower())
+        SURVEY_RECLAIMED_BYTES.inc(amount=survey.memory_size())
+    return expired
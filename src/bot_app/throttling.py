@@ -0,0 +1,204 @@
+import asyncio
+import time
+from typing import Optional
+
+from config import (
+    THROTTLE_BLOCK_DURATION,
+    THROTTLE_BLOCK_VIOLATIONS,
+    THROTTLE_GLOBAL_BURST,
+    THROTTLE_GLOBAL_MAX_DELAY,
+    THROTTLE_GLOBAL_RATE,
+    THROTTLE_MAX_DELAY,
+    THROTTLE_USER_BURST,
+    THROTTLE_USER_RATE,
+)
+from constants import bot_flow
+from database import get_async_db_session
+from logger import bot_logger
+from metrics import SOFT_BLOCKS, THROTTLED_UPDATES
+from sqlalchemy.exc import SQLAlchemyError
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, CallbackContext
+
+import repository
+from models import CheckIsBlocked
+
+FLOOD_REASON = 'flood'
+
+logger = bot_logger()
+
+
+class TokenBucket:
+
+    """Корзина токенов с постоянной скоростью пополнения."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'violations')
+
+    def __init__(self, rate: float, capacity: float,
+                 now: Optional[float] = None) -> None:
+        """Создает полную корзину."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+        self.violations = 0
+
+    def refill(self, now: float) -> None:
+        """Добавляет токены, накопившиеся с прошлого обращения."""
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float, max_delay: float = 0.0) -> Optional[float]:
+        """Забирает токен.
+
+        Возвращает время в секундах, которое нужно подождать перед
+        обработкой, или None, если ждать пришлось бы дольше max_delay.
+        """
+        self.refill(now)
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        if wait > max_delay:
+            self.violations += 1
+            return None
+        self.tokens -= 1
+        self.violations = 0
+        return wait
+
+    def is_idle(self, now: float) -> bool:
+        """Проверяет, пополнилась ли корзина до конца."""
+        self.refill(now)
+        return self.tokens >= self.capacity and not self.violations
+
+
+class Throttler:
+
+    """Ограничение частоты обновлений от пользователей и в целом по боту.
+
+    Проверка выполняется до любых обращений к БД: обновления пользователя
+    сверх его лимита откладываются на время до THROTTLE_MAX_DELAY или
+    отбрасываются. Общий лимит по умолчанию выключен; если он задан,
+    обновления сверх него ждут до THROTTLE_GLOBAL_MAX_DELAY и
+    отбрасываются, только если ждать пришлось бы дольше. Пользователь,
+    превысивший лимит THROTTLE_BLOCK_VIOLATIONS раз подряд, временно
+    блокируется, а блокировка записывается в историю.
+    """
+
+    def __init__(self) -> None:
+        """Создает пустые корзины пользователей и общую корзину."""
+        self.global_bucket = self.make_global_bucket(1)
+        self.buckets: dict[int, TokenBucket] = {}
+        self.blocked_until: dict[int, float] = {}
+
+    @staticmethod
+    def make_global_bucket(workers: int) -> Optional[TokenBucket]:
+        """Создает общую корзину воркера или None, если лимит выключен."""
+        if THROTTLE_GLOBAL_RATE <= 0:
+            return None
+        return TokenBucket(THROTTLE_GLOBAL_RATE / workers,
+                           THROTTLE_GLOBAL_BURST / workers)
+
+    def share_global_limit(self, workers: int) -> None:
+        """Делит общий лимит бота поровну между воркерами."""
+        self.global_bucket = self.make_global_bucket(workers)
+
+    def check(self, user_id: Optional[int],
+              now: Optional[float] = None) -> Optional[float]:
+        """Проверяет обновление и возвращает задержку или None для отказа."""
+        now = time.monotonic() if now is None else now
+        if user_id is not None:
+            until = self.blocked_until.get(user_id)
+            if until is not None:
+                if until > now:
+                    THROTTLED_UPDATES.inc('user', 'blocked')
+                    return None
+                del self.blocked_until[user_id]
+            bucket = self.buckets.get(user_id)
+            if bucket is None:
+                bucket = self.buckets[user_id] = TokenBucket(
+                    THROTTLE_USER_RATE, THROTTLE_USER_BURST, now)
+            user_wait = bucket.take(now, THROTTLE_MAX_DELAY)
+            if user_wait is None:
+                THROTTLED_UPDATES.inc('user', 'dropped')
+                return None
+        else:
+            user_wait = 0.0
+        if self.global_bucket is None:
+            global_wait = 0.0
+        else:
+            global_wait = self.global_bucket.take(
+                now, max(THROTTLE_MAX_DELAY, THROTTLE_GLOBAL_MAX_DELAY))
+        if global_wait is None:
+            THROTTLED_UPDATES.inc('global', 'dropped')
+            return None
+        wait = max(user_wait, global_wait)
+        if wait:
+            THROTTLED_UPDATES.inc(
+                'user' if user_wait >= global_wait else 'global', 'delayed')
+        return wait
+
+    def should_block(self, user_id: int, now: float) -> bool:
+        """Блокирует пользователя, если он слишком долго превышает лимит."""
+        bucket = self.buckets.get(user_id)
+        if bucket is None or bucket.violations < THROTTLE_BLOCK_VIOLATIONS:
+            return False
+        bucket.violations = 0
+        self.blocked_until[user_id] = now + THROTTLE_BLOCK_DURATION
+        SOFT_BLOCKS.inc()
+        return True
+
+    async def handle_update(self, update: Update,
+                            context: CallbackContext) -> None:
+        """Обработчик группы -1, пропускающий только обновления в лимите.
+
+        На отброшенное нажатие кнопки все равно дается ответ, иначе кнопка
+        у клиента остается в состоянии загрузки.
+        """
+        user = update.effective_user
+        user_id = user.id if user is not None else None
+        wait = self.check(user_id)
+        if wait is None:
+            if update.callback_query is not None:
+                context.application.create_task(
+                    update.callback_query.answer(bot_flow.THROTTLED_ANSWER),
+                    update=update)
+            now = time.monotonic()
+            if user_id is not None and self.should_block(user_id, now):
+                context.application.create_task(
+                    record_soft_block(str(user_id)), update=update)
+            raise ApplicationHandlerStop
+        if wait:
+            await asyncio.sleep(wait)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Удаляет корзины простаивающих пользователей и истекшие блокировки.
+
+        Возвращает количество удаленных корзин.
+        """
+        now = time.monotonic() if now is None else now
+        idle = [user_id for user_id, bucket in self.buckets.items()
+                if bucket.is_idle(now)]
+        for user_id in idle:
+            del self.buckets[user_id]
+        for user_id in [user_id for user_id, until
+                        in self.blocked_until.items() if until <= now]:
+            del self.blocked_until[user_id]
+        return len(idle)
+
+    async def prune_job(self, context: CallbackContext) -> None:
+        """Периодическая задача JobQueue для очистки корзин."""
+        self.prune()
+
+
+async def record_soft_block(user_id: str) -> None:
+    """Записывает временную блокировку в историю блокировок."""
+    try:
+        async with get_async_db_session() as session:
+            if await session.run_sync(repository.get_user, user_id) is None:
+                return
+            session.add(CheckIsBlocked(user_id=user_id, reason=FLOOD_REASON))
+            await session.commit()
+    except SQLAlchemyError as e:
+        logger.error(f'{bot_flow.SOFT_BLOCK_ERROR}: {e}')
+
+
+throttler = Throttler()
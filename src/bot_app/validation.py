@@ -0,0 +1,80 @@
+from typing import Optional
+
+from constants import bot_flow
+
+from contacts import normalize_email, normalize_phone
+
+TEXT_ANSWER = 'text'
+EMAIL_ANSWER = 'email'
+PHONE_ANSWER = 'phone'
+DEFAULT_MIN_WORDS = 5
+
+
+def count_words(text: str, limit: Optional[int] = None) -> int:
+    """Считает слова, не состоящие из одних цифр.
+
+    Если задан limit, сначала разбираются только первые limit слов:
+    для длинных ответов без чисел остаток текста не разбивается вовсе.
+    """
+    if limit is not None:
+        words = text.split(None, limit)
+        count = sum(not word.isdigit() for word in words[:limit])
+        if count == limit or len(words) <= limit:
+            return count
+    count = 0
+    for word in text.split():
+        if not word.isdigit():
+            count += 1
+            if count == limit:
+                break
+    return count
+
+
+class AnswerRule:
+
+    """Правило проверки ответа на вопрос анкеты."""
+
+    __slots__ = ('answer_type', 'min_words', 'max_length')
+
+    def __init__(self, answer_type: Optional[str] = None,
+                 min_words: Optional[int] = None,
+                 max_length: Optional[int] = None) -> None:
+        """Задает тип ответа и ограничения на его длину."""
+        self.answer_type = answer_type or TEXT_ANSWER
+        self.min_words = (DEFAULT_MIN_WORDS if min_words is None
+                          else min_words)
+        self.max_length = max_length
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, AnswerRule) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    @property
+    def key(self) -> tuple:
+        """Возвращает значения правила для сравнения."""
+        return self.answer_type, self.min_words, self.max_length
+
+    def check(self, text: str) -> tuple[Optional[str], Optional[str]]:
+        """Проверяет ответ.
+
+        Возвращает пару (нормализованный ответ, текст ошибки), в которой
+        заполнен только один элемент.
+        """
+        if self.max_length and len(text) > self.max_length:
+            return None, bot_flow.ANSWER_TOO_LONG.format(
+                max_length=self.max_length)
+        if self.answer_type == EMAIL_ANSWER:
+            value = normalize_email(text)
+            return value, None if value else bot_flow.INVALID_EMAIL_FORMAT
+        if self.answer_type == PHONE_ANSWER:
+            value = normalize_phone(text)
+            return value, None if value else bot_flow.INVALID_PHONE_FORMAT
+        if count_words(text, self.min_words) < self.min_words:
+            return None, bot_flow.ANSWER_TOO_SHORT.format(
+                min_words=self.min_words)
+        return text, None
+
+
+DEFAULT_RULE = AnswerRule()
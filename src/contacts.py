@@ -0,0 +1,36 @@
+import re
+from typing import Optional
+
+EMAIL_PATTERN = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+E164_PATTERN = re.compile(r'\+\d{10,15}')
+PHONE_SEPARATORS = str.maketrans('', '', ' -(). ')
+
+RUSSIAN_CODE = '7'
+RUSSIAN_NUMBER_LENGTH = 10
+
+
+def normalize_email(value: str) -> Optional[str]:
+    """Возвращает email в нижнем регистре или None, если формат неверный."""
+    email = value.strip()
+    if EMAIL_PATTERN.fullmatch(email) is None:
+        return None
+    return email.lower()
+
+
+def normalize_phone(value: str) -> Optional[str]:
+    """Приводит номер телефона к формату E.164.
+
+    Номера из десяти цифр и номера, начинающиеся с 8, считаются
+    российскими. Возвращает None, если номер не удалось распознать.
+    """
+    phone = value.strip().translate(PHONE_SEPARATORS)
+    if not phone.startswith('+'):
+        if len(phone) == RUSSIAN_NUMBER_LENGTH:
+            phone = RUSSIAN_CODE + phone
+        elif (len(phone) == RUSSIAN_NUMBER_LENGTH + 1
+              and phone.startswith('8')):
+            phone = RUSSIAN_CODE + phone[1:]
+        phone = '+' + phone
+    if E164_PATTERN.fullmatch(phone) is None:
+        return None
+    return phone
@@ -1,27 +1,35 @@
-import asyncio
-import os
 from datetime import datetime
 
-import flask_login as login
 import pytz
-from dotenv import load_dotenv
 from sqlalchemy import (
+    JSON,
+    BigInteger,
     Boolean,
     Column,
+    Date,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
-    event,
 )
-from sqlalchemy.orm import Session, declarative_base, relationship
-from telegram import Bot
+from sqlalchemy.orm import declarative_base, relationship
 
-load_dotenv()
+TIMESTAMP_FORMAT = '%H:%M %d.%m.%Y'
 
-BOT_TOKEN = os.getenv('BOT_TOKEN')
+CACHE_INVALIDATION_CHANNEL = 'bot_cache'
+ADMIN_CONTACTS_PAYLOAD = 'admin_contacts'
+USER_PAYLOAD_PREFIX = 'user:'
+
+BROADCAST_PENDING = 'pending'
+BROADCAST_SENDING = 'sending'
+BROADCAST_DONE = 'done'
+BROADCAST_CANCELLED = 'cancelled'
+DELIVERY_SENT = 'sent'
+DELIVERY_BLOCKED = 'blocked'
+DELIVERY_FAILED = 'failed'
 
 Base = declarative_base()
 
@@ -34,7 +42,7 @@ class TimestampMixin:
         String,
         default=lambda: datetime.now(
             pytz.timezone('Europe/Moscow'),
-        ).strftime('%H:%M %d.%m.%Y'),
+        ).strftime(TIMESTAMP_FORMAT),
     )
 
 
@@ -112,6 +120,9 @@ class Application(Base):
     """Модель заявок клиента."""
 
     __tablename__ = 'applications'
+    __table_args__ = (
+        Index('ix_applications_status_id_id', 'status_id', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(
@@ -127,6 +138,8 @@ class Application(Base):
     )
     answers = Column(Text, nullable=False)
     comment = Column(String)
+    assigned_to = Column(String)
+    assigned_at = Column(DateTime(timezone=True))
 
     user = relationship(
         'User',
@@ -197,6 +210,110 @@ class Question(Base):
     id = Column(Integer, primary_key=True)
     number = Column(Integer, nullable=False)
     question = Column(String, nullable=False)
+    answer_type = Column(String, default='text')
+    min_words = Column(Integer, default=5)
+    max_length = Column(Integer)
+
+
+class ApplicationDraft(Base):
+
+    """Модель черновика незавершенной анкеты пользователя."""
+
+    __tablename__ = 'application_drafts'
+
+    user_id = Column(
+        String,
+        ForeignKey(
+            'users.id',
+            name='fk_application_drafts_user_id_users',
+            ondelete='CASCADE',
+        ),
+        primary_key=True,
+    )
+    data = Column(JSON, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class StatusNotification(Base):
+
+    """Модель изменения статуса заявки, ожидающего уведомления клиента."""
+
+    __tablename__ = 'status_notifications'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(
+        String,
+        ForeignKey(
+            'users.id',
+            name='fk_status_notifications_user_id_users',
+            ondelete='CASCADE',
+        ),
+        nullable=False,
+        index=True,
+    )
+    application_id = Column(Integer, nullable=False)
+    old_status = Column(String, nullable=False)
+    new_status = Column(String, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(pytz.utc),
+    )
+
+
+class Broadcast(Base):
+
+    """Модель рассылки сообщения клиентам."""
+
+    __tablename__ = 'broadcasts'
+
+    id = Column(Integer, primary_key=True)
+    text = Column(Text, nullable=False)
+    segment = Column(String)
+    status = Column(
+        Enum(BROADCAST_PENDING, BROADCAST_SENDING, BROADCAST_DONE,
+             BROADCAST_CANCELLED, name='broadcast_status_enum'),
+        nullable=False,
+        default=BROADCAST_PENDING,
+        index=True,
+    )
+    created_by = Column(String)
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(pytz.utc),
+    )
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    total = Column(Integer, nullable=False, default=0)
+    sent = Column(Integer, nullable=False, default=0)
+    blocked = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    cursor = Column(String)
+
+
+class BroadcastDelivery(Base):
+
+    """Модель результата доставки рассылки одному клиенту."""
+
+    __tablename__ = 'broadcast_deliveries'
+
+    broadcast_id = Column(
+        Integer,
+        ForeignKey(
+            'broadcasts.id',
+            name='fk_broadcast_deliveries_broadcast_id_broadcasts',
+            ondelete='CASCADE',
+        ),
+        primary_key=True,
+    )
+    user_id = Column(String, primary_key=True)
+    status = Column(
+        Enum(DELIVERY_SENT, DELIVERY_BLOCKED, DELIVERY_FAILED,
+             name='delivery_status_enum'),
+        nullable=False,
+    )
+    delivered_at = Column(DateTime(timezone=True), nullable=False)
 
 
 class CheckIsBlocked(Base, TimestampMixin):
@@ -210,6 +327,7 @@ class CheckIsBlocked(Base, TimestampMixin):
         String,
         ForeignKey('users.id', name='fk_check_blocked_user_id_users'),
     )
+    reason = Column(String)
     user = relationship(
         'User',
         back_populates='block_history',
@@ -231,60 +349,101 @@ class CheckIsBlocked(Base, TimestampMixin):
         return self.user.phone if self.user else None
 
 
-async def notify_user(user_id: int, application_id: int, old_status: str,
-                      new_status: str) -> None:
-    """Отправляет пользователю уведомление об изменении статуса заявки."""
-    bot = Bot(token=BOT_TOKEN)
-    message = f"Статус вашей заявки № {application_id} - {new_status}."
-    await bot.send_message(chat_id=user_id, text=message)
-
-
-async def log_status_change(session: Session, flush_context: any,
-                            instances: list) -> None:
-    """Логирует изменение статуса заявки и уведомляет пользователя об этом."""
-    for instance in session.dirty:
-        if isinstance(instance, Application):
-            old_status = session.query(ApplicationStatus).get(
-                instance.status_id).status
-            new_status = instance.status.status
-
-            if old_status != new_status:
-                admin_user = session.query(AdminUser).get(
-                    login.current_user.id)
-                admin_nickname = admin_user.login
-
-                log_entry = ApplicationCheckStatus(
-                    application_id=instance.id,
-                    old_status=old_status,
-                    new_status=new_status,
-                    changed_by=admin_nickname,
-                )
-                session.add(log_entry)
-
-                await notify_user(instance.user_id, instance.id, old_status,
-                                  new_status)
-
-
-@event.listens_for(Session, 'before_flush')
-def before_flush_handler(session: Session, flush_context: any,
-                         instances: list) -> None:
-    """Обрабатывает изменения статуса заявок перед сохранением."""
-    loop = asyncio.get_event_loop()
-    if loop.is_running():
-        asyncio.create_task(log_status_change(session, flush_context,
-                                              instances))
-    else:
-        loop.run_until_complete(log_status_change(session, flush_context,
-                                                  instances))
-
-
-@event.listens_for(User.is_blocked, 'set')
-def user_blocked_listener(target: User, value: bool,
-                          oldvalue: bool, initiator: any) -> None:
-    """Отражает заблокированного клиента в разделе 'История блокировок'."""
-    if value and not oldvalue:
-        session = Session.object_session(target)
-        if session is not None:
-            new_block_record = CheckIsBlocked(user_id=target.id)
-            session.add(new_block_record)
-            session.commit()
+class ApplicationDailyRollup(Base):
+
+    """Модель суточной сводки по поступлению заявок и первому ответу."""
+
+    __tablename__ = 'rollup_applications_daily'
+
+    day = Column(Date, primary_key=True)
+    intake = Column(Integer, nullable=False, default=0)
+    first_responses = Column(Integer, nullable=False, default=0)
+    first_response_seconds = Column(BigInteger, nullable=False, default=0)
+
+
+class ApplicationHourlyRollup(Base):
+
+    """Модель почасовой сводки по поступлению заявок."""
+
+    __tablename__ = 'rollup_applications_hourly'
+
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    intake = Column(Integer, nullable=False, default=0)
+
+
+class StatusDailyRollup(Base):
+
+    """Модель суточной сводки по времени нахождения заявок в статусах."""
+
+    __tablename__ = 'rollup_statuses_daily'
+
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    transitions = Column(Integer, nullable=False, default=0)
+    seconds_in_status = Column(BigInteger, nullable=False, default=0)
+
+
+class RollupCheckpoint(Base):
+
+    """Модель отметки последней обработанной записи для сводок."""
+
+    __tablename__ = 'rollup_checkpoints'
+
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+
+
+class ImportCheckpoint(Base):
+
+    """Модель отметки прочитанных строк файла при импорте данных."""
+
+    __tablename__ = 'import_checkpoints'
+
+    source = Column(String, primary_key=True)
+    lines = Column(Integer, nullable=False, default=0)
+
+
+class ApplicationArchive(Base):
+
+    """Модель архива закрытых заявок, секционированного по месяцам."""
+
+    __tablename__ = 'applications_archive'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (timestamp)'}
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
+    user_id = Column(String, nullable=False, index=True)
+    status = Column(String, nullable=False)
+    answers = Column(Text, nullable=False)
+    comment = Column(String)
+
+
+class ApplicationCheckStatusArchive(Base):
+
+    """Модель архива журнала заявок, секционированного по месяцам заявки."""
+
+    __tablename__ = 'check_status_archive'
+    __table_args__ = {
+        'postgresql_partition_by': 'RANGE (application_timestamp)',
+    }
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    application_timestamp = Column(DateTime(timezone=True), primary_key=True)
+    application_id = Column(Integer, nullable=False, index=True)
+    old_status = Column(String, nullable=False)
+    new_status = Column(String, nullable=False)
+    changed_by = Column(String, nullable=False)
+    timestamp = Column(String)
+
+
+class CheckIsBlockedArchive(Base):
+
+    """Модель архива истории блокировок, секционированного по месяцам."""
+
+    __tablename__ = 'check_blocked_archive'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (blocked_at)'}
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    blocked_at = Column(DateTime(timezone=True), primary_key=True)
+    user_id = Column(String, index=True)
+    reason = Column(String)
@@ -0,0 +1,73 @@
+import time
+from collections import deque
+from itertools import count
+from typing import Callable, Optional
+
+UNKNOWN = float('-inf')
+
+
+class ReplicaSet:
+
+    """Свежесть реплик PostgreSQL для маршрутизации чтения.
+
+    Периодическая проверка запоминает момент и позицию WAL основной БД,
+    а затем позицию WAL, воспроизведенную каждой репликой. Реплика
+    считается свежей на момент самой поздней проверки основной БД,
+    позицию которой она уже воспроизвела. Поэтому реплика видит все
+    транзакции, подтвержденные до этого момента, и чтение можно
+    отправить на нее, если момент не старше max_lag секунд и не раньше
+    последней записи клиента.
+    """
+
+    def __init__(self, replicas: int, max_lag: float,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """Задает число реплик, допустимое отставание и источник времени."""
+        self.max_lag = max_lag
+        self.clock = clock
+        self.samples: deque[tuple[float, int]] = deque()
+        self.fresh_at = [UNKNOWN] * replicas
+        self.turns = count()
+
+    def add_primary_position(self, checked_at: float, position: int) -> None:
+        """Запоминает позицию WAL основной БД.
+
+        checked_at должен быть взят до запроса позиции: тогда все
+        транзакции, подтвержденные к этому моменту, лежат до нее.
+        """
+        self.samples.append((checked_at, position))
+        while self.samples and self.samples[0][0] < checked_at - self.max_lag:
+            self.samples.popleft()
+
+    def update_replica(self, index: int, position: Optional[int]) -> None:
+        """Обновляет свежесть реплики по воспроизведенной позиции WAL.
+
+        position равен None, если реплика недоступна или не находится в
+        режиме восстановления, и тогда чтение с нее прекращается.
+        """
+        if position is None:
+            self.fresh_at[index] = UNKNOWN
+            return
+        for checked_at, primary_position in reversed(self.samples):
+            if primary_position <= position:
+                self.fresh_at[index] = max(self.fresh_at[index], checked_at)
+                return
+
+    def lag(self, index: int) -> float:
+        """Возвращает отставание реплики в секундах."""
+        return self.clock() - self.fresh_at[index]
+
+    def choose(self, written_at: Optional[float] = None) -> Optional[int]:
+        """Выбирает реплику для чтения или None для основной БД.
+
+        written_at — момент последней записи клиента: реплика должна
+        быть свежей хотя бы на этот момент, чтобы клиент увидел свои
+        изменения.
+        """
+        threshold = self.clock() - self.max_lag
+        if written_at is not None:
+            threshold = max(threshold, written_at)
+        candidates = [index for index, fresh_at in enumerate(self.fresh_at)
+                      if fresh_at >= threshold]
+        if not candidates:
+            return None
+        return candidates[next(self.turns) % len(candidates)]
@@ -0,0 +1,356 @@
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+import pytz
+from sqlalchemy import delete, func, insert, or_, select, text, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from models import (
+    BROADCAST_CANCELLED,
+    BROADCAST_DONE,
+    BROADCAST_PENDING,
+    BROADCAST_SENDING,
+    DELIVERY_BLOCKED,
+    DELIVERY_FAILED,
+    DELIVERY_SENT,
+    AdminUser,
+    Application,
+    ApplicationArchive,
+    ApplicationStatus,
+    Base,
+    Broadcast,
+    BroadcastDelivery,
+    Question,
+    StatusNotification,
+    User,
+)
+
+QuestionRow = tuple[int, str, Optional[str], Optional[int], Optional[int]]
+
+WAL_POSITION_SQL = text(
+    "SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), '0/0')::bigint")
+REPLAY_POSITION_SQL = text(
+    "SELECT pg_wal_lsn_diff(pg_last_wal_replay_lsn(), '0/0')::bigint")
+
+
+def get_user(session: Session, user_id: str) -> Optional[User]:
+    """Получает клиента по идентификатору Telegram."""
+    return session.get(User, user_id)
+
+
+def get_admin(session: Session, admin_id: int) -> Optional[AdminUser]:
+    """Получает сотрудника по первичному ключу."""
+    return session.get(AdminUser, admin_id)
+
+
+def get_admin_by_login(session: Session, login: str) -> Optional[AdminUser]:
+    """Получает сотрудника по логину."""
+    return session.execute(
+        select(AdminUser).where(AdminUser.login == login),
+    ).scalars().first()
+
+
+def get_admin_email(session: Session) -> Optional[str]:
+    """Получает email администратора для связи с клиентами."""
+    return session.execute(
+        select(AdminUser.email).where(AdminUser.role == 'admin'),
+    ).scalars().first()
+
+
+def get_questions(session: Session) -> list[QuestionRow]:
+    """Получает вопросы анкеты и правила проверки ответов по порядку."""
+    return session.execute(
+        select(Question.number, Question.question, Question.answer_type,
+               Question.min_words, Question.max_length)
+        .order_by(Question.number),
+    ).all()
+
+
+def get_or_create_status(session: Session,
+                         status: str) -> ApplicationStatus:
+    """Получает статус заявки, создавая его при отсутствии."""
+    record = session.execute(
+        select(ApplicationStatus).where(ApplicationStatus.status == status),
+    ).scalars().first()
+    if record is None:
+        record = ApplicationStatus(status=status)
+        session.add(record)
+        session.flush()
+    return record
+
+
+def count_user_applications(session: Session, user_id: str) -> int:
+    """Считает заявки клиента, включая перенесенные в архив."""
+    return session.execute(select(
+        select(func.count()).select_from(Application)
+        .where(Application.user_id == user_id).scalar_subquery()
+        + select(func.count()).select_from(ApplicationArchive)
+        .where(ApplicationArchive.user_id == user_id).scalar_subquery(),
+    )).scalar()
+
+
+def get_user_applications(session: Session,
+                          user_id: str) -> list[tuple[int, str]]:
+    """Получает номера и статусы заявок клиента, включая архивные."""
+    applications = session.execute(
+        select(Application.id, ApplicationStatus.status)
+        .join(ApplicationStatus, Application.status_id == ApplicationStatus.id)
+        .where(Application.user_id == user_id),
+    ).all()
+    applications.extend(session.execute(
+        select(ApplicationArchive.id, ApplicationArchive.status)
+        .where(ApplicationArchive.user_id == user_id),
+    ).all())
+    applications.sort()
+    return applications
+
+
+def count_applications_in_status(session: Session, status: str) -> int:
+    """Считает заявки в указанном статусе."""
+    return session.execute(
+        select(func.count()).select_from(Application)
+        .join(ApplicationStatus, Application.status_id == ApplicationStatus.id)
+        .where(ApplicationStatus.status == status),
+    ).scalar()
+
+
+def count_applications_since(session: Session, since: datetime) -> int:
+    """Считает заявки, созданные после указанного момента."""
+    return session.execute(
+        select(func.count()).select_from(Application)
+        .where(Application.timestamp > since),
+    ).scalar()
+
+
+def claim_application(session: Session, operator: str, status: str,
+                      expires_before: datetime) -> Optional[int]:
+    """Закрепляет за оператором самую старую свободную заявку в статусе.
+
+    Свободна заявка без оператора или закрепленная до expires_before.
+    Строки, которые в этот момент закрепляют другие операторы,
+    пропускаются (FOR UPDATE SKIP LOCKED), поэтому операторы не ждут друг
+    друга. Условие повторяется в UPDATE: в БД без блокировок строк
+    заявку, которую успел занять другой оператор, сменит следующая.
+    Возвращает номер заявки или None, если свободных нет.
+    """
+    free = or_(Application.assigned_to.is_(None),
+               Application.assigned_at < expires_before)
+    status_id = (
+        select(ApplicationStatus.id)
+        .where(ApplicationStatus.status == status)
+        .scalar_subquery()
+    )
+    while True:
+        application_id = session.execute(
+            select(Application.id)
+            .where(Application.status_id == status_id, free)
+            .order_by(Application.id)
+            .limit(1)
+            .with_for_update(skip_locked=True),
+        ).scalar()
+        if application_id is None:
+            return None
+        claimed = session.execute(
+            update(Application)
+            .where(Application.id == application_id, free)
+            .values(assigned_to=operator, assigned_at=datetime.now(pytz.utc))
+            .execution_options(synchronize_session=False),
+        ).rowcount
+        if claimed:
+            return application_id
+
+
+def release_applications(session: Session, ids: list[int]) -> int:
+    """Возвращает заявки в общую очередь и сообщает их число."""
+    return session.execute(
+        update(Application)
+        .where(Application.id.in_(ids), Application.assigned_to.isnot(None))
+        .values(assigned_to=None, assigned_at=None)
+        .execution_options(synchronize_session=False),
+    ).rowcount
+
+
+def has_rows(session: Session, model: type[Base]) -> bool:
+    """Проверяет, есть ли в таблице хотя бы одна запись."""
+    return session.execute(
+        select(select(model).exists()),
+    ).scalar()
+
+
+def get_latest_application_id(session: Session) -> int:
+    """Получает идентификатор последней заявки или 0, если заявок нет."""
+    return session.execute(
+        select(func.coalesce(func.max(Application.id), 0)),
+    ).scalar()
+
+
+def get_application_ids_after(session: Session, application_id: int,
+                              limit: int) -> list[int]:
+    """Получает идентификаторы заявок, созданных после указанной."""
+    return session.execute(
+        select(Application.id)
+        .where(Application.id > application_id)
+        .order_by(Application.id)
+        .limit(limit),
+    ).scalars().all()
+
+
+def get_due_notifications(session: Session, created_before: datetime,
+                          users: int) -> list[StatusNotification]:
+    """Получает изменения статусов клиентов, ждущих уведомления.
+
+    Берутся все изменения не больше чем users клиентов, самое раннее
+    изменение которых создано до created_before, начиная с дольше всех
+    ожидающих.
+    """
+    first_created = func.min(StatusNotification.created_at)
+    user_ids = (
+        select(StatusNotification.user_id)
+        .group_by(StatusNotification.user_id)
+        .having(first_created < created_before)
+        .order_by(first_created)
+        .limit(users)
+    )
+    return session.execute(
+        select(StatusNotification)
+        .where(StatusNotification.user_id.in_(user_ids))
+        .order_by(StatusNotification.id),
+    ).scalars().all()
+
+
+def delete_notifications(session: Session, ids: list[int]) -> None:
+    """Удаляет обработанные изменения статусов."""
+    session.execute(
+        delete(StatusNotification).where(StatusNotification.id.in_(ids)),
+    )
+
+
+def get_active_broadcast(session: Session) -> Optional[Broadcast]:
+    """Получает рассылку, которую нужно отправлять, начиная с самой ранней."""
+    return session.execute(
+        select(Broadcast)
+        .where(Broadcast.status.in_([BROADCAST_PENDING, BROADCAST_SENDING]))
+        .order_by(Broadcast.id)
+        .limit(1),
+    ).scalars().first()
+
+
+def get_broadcasts(session: Session, ids: list[int]) -> list[Broadcast]:
+    """Получает рассылки по идентификаторам."""
+    return session.execute(
+        select(Broadcast).where(Broadcast.id.in_(ids)),
+    ).scalars().all()
+
+
+def select_broadcast_recipients(segment: Optional[str]) -> Select:
+    """Строит запрос клиентов, которым адресована рассылка.
+
+    Заблокированные клиенты пропускаются. Если задан segment, остаются
+    только клиенты с заявкой в этом статусе.
+    """
+    query = select(User.id).where(User.is_blocked.isnot(True))
+    if segment:
+        query = query.where(
+            select(Application.id)
+            .join(ApplicationStatus,
+                  Application.status_id == ApplicationStatus.id)
+            .where(Application.user_id == User.id,
+                   ApplicationStatus.status == segment)
+            .exists(),
+        )
+    return query
+
+
+def start_broadcast(session: Session, broadcast: Broadcast) -> None:
+    """Переводит рассылку в отправку и запоминает число получателей."""
+    total = session.execute(
+        select(func.count()).select_from(
+            select_broadcast_recipients(broadcast.segment).subquery()),
+    ).scalar()
+    session.execute(
+        update(Broadcast)
+        .where(Broadcast.id == broadcast.id,
+               Broadcast.status == BROADCAST_PENDING)
+        .values(status=BROADCAST_SENDING, total=total,
+                started_at=datetime.now(pytz.utc)),
+    )
+
+
+def get_broadcast_recipients(session: Session, broadcast: Broadcast,
+                             limit: int) -> list[str]:
+    """Получает следующих получателей рассылки по порядку идентификаторов.
+
+    Чтение продолжается после сохраненного курсора рассылки, клиенты с
+    уже записанным результатом доставки пропускаются.
+    """
+    query = select_broadcast_recipients(broadcast.segment).where(
+        ~select(BroadcastDelivery.user_id)
+        .where(BroadcastDelivery.broadcast_id == broadcast.id,
+               BroadcastDelivery.user_id == User.id)
+        .exists(),
+    )
+    if broadcast.cursor is not None:
+        query = query.where(User.id > broadcast.cursor)
+    return session.execute(
+        query.order_by(User.id).limit(limit),
+    ).scalars().all()
+
+
+def record_broadcast_batch(session: Session, broadcast_id: int,
+                           deliveries: dict[str, str],
+                           cursor: Optional[str]) -> None:
+    """Записывает результаты доставки пачки рассылки и сдвигает курсор."""
+    now = datetime.now(pytz.utc)
+    if deliveries:
+        session.execute(insert(BroadcastDelivery), [
+            {'broadcast_id': broadcast_id, 'user_id': user_id,
+             'status': status, 'delivered_at': now}
+            for user_id, status in deliveries.items()
+        ])
+    counts = Counter(deliveries.values())
+    values = {
+        'sent': Broadcast.sent + counts[DELIVERY_SENT],
+        'blocked': Broadcast.blocked + counts[DELIVERY_BLOCKED],
+        'failed': Broadcast.failed + counts[DELIVERY_FAILED],
+    }
+    if cursor is not None:
+        values['cursor'] = cursor
+    session.execute(
+        update(Broadcast).where(Broadcast.id == broadcast_id).values(values),
+    )
+
+
+def finish_broadcast(session: Session, broadcast_id: int) -> None:
+    """Завершает рассылку, если ее не отменили во время отправки."""
+    session.execute(
+        update(Broadcast)
+        .where(Broadcast.id == broadcast_id,
+               Broadcast.status == BROADCAST_SENDING)
+        .values(status=BROADCAST_DONE, finished_at=datetime.now(pytz.utc)),
+    )
+
+
+def cancel_broadcasts(session: Session, ids: list[int]) -> int:
+    """Отменяет еще не завершенные рассылки и возвращает их число."""
+    return session.execute(
+        update(Broadcast)
+        .where(Broadcast.id.in_(ids),
+               Broadcast.status.in_([BROADCAST_PENDING, BROADCAST_SENDING]))
+        .values(status=BROADCAST_CANCELLED,
+                finished_at=datetime.now(pytz.utc)),
+    ).rowcount
+
+
+def get_wal_position(session: Session) -> int:
+    """Получает текущую позицию WAL основной БД PostgreSQL в байтах."""
+    return session.execute(WAL_POSITION_SQL).scalar()
+
+
+def get_replay_position(session: Session) -> Optional[int]:
+    """Получает позицию WAL, воспроизведенную репликой PostgreSQL.
+
+    Возвращает None, если сервер не находится в режиме восстановления.
+    """
+    return session.execute(REPLAY_POSITION_SQL).scalar()